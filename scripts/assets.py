@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+Asset graph for the built site: duplicate and unused static files.
+
+Hashes every static file under docs/ and scans every rendered HTML page
+and stylesheet for the files they reference (src, srcset, href, CSS url()),
+then reports byte-identical duplicates and orphans in docs/images/,
+docs/pdfs/ and docs/blog/figures/, with the bytes each wastes. An original
+image counts as referenced when a page uses one of its derivatives (see
+images.py).
+
+Hashes and the references found in each page are kept in
+.build-cache/assets.json with each file's size and mtime, so a rerun only
+reads files that changed.
+
+It also fingerprints assets for cache-busting: asset_url() (the ``asset``
+helper in templates) copies docs/<path> to name.<hash>.ext beside it and
+returns that name, and fingerprint_references() does the same for images
+and blog figures linked from rendered Markdown. Stylesheets are left to
+css_prune.py, which relinks them to hashed per-page copies anyway.
+save_asset_manifest() writes docs/asset-manifest.json (logical name →
+fingerprinted name) and docs/_headers, which marks the fingerprinted files
+and image derivatives immutable for a year. GitHub Pages, which serves the
+site, ignores _headers (everything gets max-age=600); scripts/preview.py
+and hosts such as Netlify apply it. The manifest ships with docs/, so it
+is also the record of which copies exist: copies it no longer lists are
+deleted, even on a fresh clone.
+
+Usage:
+    python scripts/assets.py             # report duplicates and orphans
+    python scripts/assets.py --rewrite   # point pages at one copy of each duplicate
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from glob import escape as glob_escape
+from pathlib import Path
+from urllib.parse import unquote
+
+import css_prune
+import images
+import webfonts
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = BASE_DIR / "docs"
+MANIFEST_FILE = BASE_DIR / ".build-cache" / "assets.json"
+FINGERPRINTS_FILE = BASE_DIR / ".build-cache" / "fingerprints.json"
+ASSET_MANIFEST_FILE = OUTPUT_DIR / "asset-manifest.json"
+HEADERS_FILE = OUTPUT_DIR / "_headers"
+
+# Cache-Control for files whose name changes whenever their content does
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Where Markdown-rendered references are fingerprinted (templates use asset())
+FINGERPRINT_DIRS = ("images", "blog/figures")
+
+# Directories whose files should be referenced by some page
+ASSET_DIRS = ("images", "pdfs", "blog/figures")
+
+# Files that belong to the site but are never linked from pages
+IGNORED_NAMES = {"CNAME", ".nojekyll", ".DS_Store", "README.md", "_headers", "asset-manifest.json"}
+
+PAGE_SUFFIXES = {".html", ".css"}
+
+# Pre-compressed siblings written by scripts/minify.py
+COMPRESSED_SUFFIXES = {".gz", ".br"}
+
+# Bumped when reference scanning changes, so cached page scans are redone
+_SCAN_VERSION = 1
+
+_HTML_REFERENCE = re.compile(
+    r"""\b(src|href|poster|data-src)\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE
+)
+_SRCSET = re.compile(r"""\bsrcset\s*=\s*("[^"]*"|'[^']*')""", re.IGNORECASE)
+_CSS_URL = re.compile(r"""url\(\s*("[^"]*"|'[^']*'|[^)\s]+)\s*\)""", re.IGNORECASE)
+
+
+def load_manifest():
+    try:
+        manifest = json.loads(MANIFEST_FILE.read_text())
+        if manifest.get("version") == _SCAN_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": _SCAN_VERSION, "files": {}, "pages": {}}
+
+
+def save_manifest(manifest):
+    try:
+        MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = MANIFEST_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        tmp_file.replace(MANIFEST_FILE)
+    except OSError as e:
+        print(f"  ⚠ Warning: could not save asset manifest: {e}")
+
+
+def _unchanged(entry, stat):
+    return entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]
+
+
+def site_files():
+    """
+    (static files, pages) under docs/, as paths relative to docs/.
+    Fingerprinted copies, image derivatives and compressed siblings are left
+    out; they stand in for their source.
+    """
+    copies = set(fingerprint_sources())
+    static, pages = [], []
+    for root, dirs, files in os.walk(OUTPUT_DIR):
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(".") and Path(root, d) != images.DERIVED_DIR
+        )
+        for name in sorted(files):
+            if name in IGNORED_NAMES or name.startswith(".") or Path(name).suffix in COMPRESSED_SUFFIXES:
+                continue
+            path = Path(root, name).relative_to(OUTPUT_DIR).as_posix()
+            if path in copies:
+                continue
+            (pages if Path(name).suffix in PAGE_SUFFIXES else static).append(path)
+            if Path(name).suffix == ".css":
+                static.append(path)
+    return static, pages
+
+
+def _strip_quotes(value):
+    return value[1:-1] if value[:1] in "\"'" and value[-1:] == value[:1] else value
+
+
+def raw_references(text, suffix):
+    """Every URL a page or stylesheet references, as written."""
+    if suffix == ".css":
+        return [_strip_quotes(m.group(1)) for m in _CSS_URL.finditer(text)]
+    urls = [_strip_quotes(m.group(2)) for m in _HTML_REFERENCE.finditer(text)]
+    for match in _SRCSET.finditer(text):
+        for candidate in _strip_quotes(match.group(1)).split(","):
+            if candidate.strip():
+                urls.append(candidate.split()[0])
+    urls.extend(_strip_quotes(m.group(1)) for m in _CSS_URL.finditer(text))
+    return urls
+
+
+def resolve_reference(url, page):
+    """The docs/-relative file a URL in page points to, or None if external."""
+    url = unquote(url.split("#")[0].split("?")[0]).strip()
+    if not url or re.match(r"^[a-z][a-z0-9+.-]*:|^//", url, re.IGNORECASE):
+        return None
+    if url.startswith("/"):
+        target = url.lstrip("/")
+    else:
+        target = os.path.normpath(os.path.join(os.path.dirname(page), url))
+    if target.startswith(".."):
+        return None
+    return Path(target).as_posix()
+
+
+def scan(manifest=None):
+    """
+    Hash static files and collect page references, reusing the manifest for
+    files whose size and mtime are unchanged. Returns the updated manifest.
+    """
+    manifest = manifest or load_manifest()
+    static, pages = site_files()
+
+    files = {}
+    for path in static:
+        stat = (OUTPUT_DIR / path).stat()
+        entry = manifest["files"].get(path)
+        if not _unchanged(entry, stat):
+            digest = hashlib.sha256((OUTPUT_DIR / path).read_bytes()).hexdigest()
+            entry = [stat.st_size, stat.st_mtime_ns, digest]
+        files[path] = entry
+
+    copies = fingerprint_sources()
+    scanned = {}
+    for page in pages:
+        stat = (OUTPUT_DIR / page).stat()
+        entry = manifest["pages"].get(page)
+        if not _unchanged(entry, stat):
+            text = (OUTPUT_DIR / page).read_text(errors="replace")
+            targets = {resolve_reference(url, page) for url in raw_references(text, Path(page).suffix)}
+            entry = [stat.st_size, stat.st_mtime_ns, sorted(t for t in targets if t)]
+        entry[2] = sorted({copies.get(target, target) for target in entry[2]})
+        scanned[page] = entry
+
+    manifest["files"], manifest["pages"] = files, scanned
+    return manifest
+
+
+def asset_graph(manifest):
+    """Static file → set of pages referencing it (directly or via a derivative)."""
+    referrers = {}
+    for page, (_, _, targets) in manifest["pages"].items():
+        for target in targets:
+            referrers.setdefault(target, set()).add(page)
+    graph = {path: set(referrers.get(path, ())) for path in manifest["files"]}
+
+    derived_prefix = images.DERIVED_DIR.relative_to(OUTPUT_DIR).as_posix() + "/"
+    source_prefix = images.IMAGES_DIR.relative_to(OUTPUT_DIR).as_posix() + "/"
+    for source, entry in images.load_manifest().items():
+        original = source_prefix + source
+        if original not in graph:
+            continue
+        for variants in entry["variants"].values():
+            for name, _ in variants:
+                graph[original] |= referrers.get(derived_prefix + name, set())
+    return graph
+
+
+def find_duplicates(manifest):
+    """Groups of byte-identical files (2+ paths), keyed by hash."""
+    by_hash = {}
+    for path, (_, _, digest) in manifest["files"].items():
+        by_hash.setdefault(digest, []).append(path)
+    return {digest: sorted(paths) for digest, paths in by_hash.items() if len(paths) > 1}
+
+
+def find_orphans(graph):
+    """Files in ASSET_DIRS that no page or stylesheet references."""
+    return sorted(
+        path for path, pages in graph.items()
+        if path.startswith(tuple(d + "/" for d in ASSET_DIRS)) and not pages
+    )
+
+
+def canonical_copy(paths, graph):
+    """The copy to keep: the most referenced, then the shortest path."""
+    return min(paths, key=lambda path: (-len(graph[path]), len(path), path))
+
+
+def _rewrite_page(text, page, replacements):
+    """A page's text with references to replaced files pointed at their canonical copy."""
+    page_dir = (OUTPUT_DIR / page).parent
+
+    def rewrite_url(url):
+        target = resolve_reference(url, page)
+        if target not in replacements:
+            return url
+        return Path(os.path.relpath(OUTPUT_DIR / replacements[target], page_dir)).as_posix()
+
+    def rewrite_value(match, group, rewrite):
+        quoted = match.group(group)
+        value = _strip_quotes(quoted)
+        new_value = rewrite(value)
+        if new_value == value:
+            return match.group(0)
+        return match.group(0).replace(quoted, quoted.replace(value, new_value))
+
+    def rewrite_srcset(value):
+        candidates = []
+        for candidate in value.split(","):
+            parts = candidate.strip().split(maxsplit=1)
+            if parts:
+                parts[0] = rewrite_url(parts[0])
+            candidates.append(" ".join(parts))
+        return ", ".join(candidates)
+
+    text = _CSS_URL.sub(lambda m: rewrite_value(m, 1, rewrite_url), text)
+    if page.endswith(".html"):
+        text = _HTML_REFERENCE.sub(lambda m: rewrite_value(m, 2, rewrite_url), text)
+        text = _SRCSET.sub(lambda m: rewrite_value(m, 1, rewrite_srcset), text)
+    return text
+
+
+def rewrite_references(duplicates, graph):
+    """
+    Point every page at the canonical copy of each duplicate group; returns
+    the number of pages rewritten. Rendered pages are rewritten in place,
+    so sources that name a duplicate still need changing by hand.
+    """
+    replacements = {}
+    for paths in duplicates.values():
+        keep = canonical_copy(paths, graph)
+        replacements.update({path: keep for path in paths if path != keep})
+
+    rewritten = 0
+    for page in sorted({page for path in replacements for page in graph[path]}):
+        page_file = OUTPUT_DIR / page
+        text = page_file.read_text()
+        new_text = _rewrite_page(text, page, replacements)
+        if new_text != text:
+            page_file.write_text(new_text)
+            rewritten += 1
+    return rewritten
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def report_assets(rewrite=False, verbose=True):
+    """
+    Scan docs/, print duplicates and orphans with the bytes they waste, and
+    optionally rewrite duplicate references. Returns (duplicates, orphans).
+    """
+    manifest = scan()
+    graph = asset_graph(manifest)
+    if rewrite:
+        rewritten = rewrite_references(find_duplicates(manifest), graph)
+        print(f"  Rewrote duplicate references in {rewritten} pages")
+        if rewritten:
+            manifest = scan(manifest)
+            graph = asset_graph(manifest)
+
+    duplicates = find_duplicates(manifest)
+    orphans = find_orphans(graph)
+    sizes = {path: entry[0] for path, entry in manifest["files"].items()}
+
+    duplicate_bytes = sum(sizes[paths[0]] * (len(paths) - 1) for paths in duplicates.values())
+    orphan_bytes = sum(sizes[path] for path in orphans)
+
+    if verbose:
+        for paths in duplicates.values():
+            keep = canonical_copy(paths, graph)
+            print(f"  Duplicate ({_format_bytes(sizes[keep])}): keep docs/{keep}")
+            for path in paths:
+                if path != keep:
+                    print(f"    docs/{path}")
+        for path in orphans:
+            print(f"  Unreferenced ({_format_bytes(sizes[path])}): docs/{path}")
+    print(
+        f"  Assets: {len(manifest['files'])} files, {len(manifest['pages'])} pages scanned; "
+        f"{len(duplicates)} duplicate groups ({_format_bytes(duplicate_bytes)} wasted), "
+        f"{len(orphans)} unreferenced ({_format_bytes(orphan_bytes)})"
+    )
+
+    save_manifest(manifest)
+    return duplicates, orphans
+
+
+# ============================================================================
+# FINGERPRINTING
+# ============================================================================
+
+_fingerprints = None
+_fingerprints_dirty = False
+_fingerprints_lock = threading.Lock()
+
+_FINGERPRINTED_STEM = re.compile(r"\.[0-9a-f]{10}$")
+
+
+def _read_json(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def fingerprinted(path):
+    """
+    Whether asset_url() copies docs/<path> to a fingerprinted name.
+    Stylesheets aren't: prune_page_css() replaces every local stylesheet
+    link with a hashed copy in docs/css/, so a copy here would go unlinked.
+    """
+    return Path(path).suffix != ".css"
+
+
+def _load_fingerprints():
+    """
+    Source path → {file, size, mtime_ns} for every fingerprinted copy.
+    Which copies exist comes from docs/asset-manifest.json; the sizes and
+    mtimes that let unchanged sources skip rehashing come from .build-cache,
+    and are unknown (None) on a fresh clone.
+    """
+    global _fingerprints, _fingerprints_dirty
+    if _fingerprints is None:
+        stats = _read_json(FINGERPRINTS_FILE)
+        _fingerprints = {}
+        for source, copy in _read_json(ASSET_MANIFEST_FILE).items():
+            if not fingerprinted(source):
+                _fingerprints_dirty = True
+                continue
+            entry = stats.get(source)
+            if not entry or entry.get("file") != copy:
+                entry = {"file": copy, "size": None, "mtime_ns": None}
+            _fingerprints[source] = entry
+    return _fingerprints
+
+
+def fingerprint_sources():
+    """Fingerprinted copy → its source path, both relative to docs/."""
+    return {entry["file"]: source for source, entry in _load_fingerprints().items()}
+
+
+def fingerprinted_name(path, digest):
+    """E.g. styles.css → styles.3f2a9c01d4.css."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.{digest[:10]}{path.suffix}").as_posix()
+
+
+def fingerprint(path):
+    """
+    The fingerprinted copy of docs/<path>, relative to docs/, created if
+    the file changed since it was last copied. Stylesheets and paths that
+    aren't files in docs/ are returned unchanged.
+    """
+    global _fingerprints_dirty
+    source = OUTPUT_DIR / path
+    if not fingerprinted(path) or not source.is_file():
+        return path
+
+    with _fingerprints_lock:
+        fingerprints = _load_fingerprints()
+        stat = source.stat()
+        entry = fingerprints.get(path)
+        if (
+            entry
+            and [entry["size"], entry["mtime_ns"]] == [stat.st_size, stat.st_mtime_ns]
+            and (OUTPUT_DIR / entry["file"]).exists()
+        ):
+            return entry["file"]
+
+        digest = hashlib.sha256(source.read_bytes()).hexdigest()
+        copy = fingerprinted_name(path, digest)
+        if not (OUTPUT_DIR / copy).exists():
+            shutil.copy2(source, OUTPUT_DIR / copy)
+        if entry and entry["file"] != copy:
+            (OUTPUT_DIR / entry["file"]).unlink(missing_ok=True)
+        fingerprints[path] = {"file": copy, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        _fingerprints_dirty = True
+        return copy
+
+
+def asset_url(path):
+    """Template helper: the fingerprinted name to link docs/<path> by."""
+    return fingerprint(path)
+
+
+def fingerprint_references(html, page_file):
+    """
+    Point src/href attributes in a rendered page at fingerprinted copies,
+    for files in FINGERPRINT_DIRS (Markdown images, blog figures).
+    """
+    page = Path(os.path.relpath(page_file, OUTPUT_DIR)).as_posix()
+    prefixes = tuple(d + "/" for d in FINGERPRINT_DIRS)
+    derived = images.DERIVED_DIR.relative_to(OUTPUT_DIR).as_posix() + "/"
+    copies = fingerprint_sources()
+
+    def rewrite(match):
+        quoted = match.group(2)
+        url = _strip_quotes(quoted)
+        target = resolve_reference(url, page)
+        if (
+            not target
+            or not target.startswith(prefixes)
+            or target.startswith(derived)
+            or target in copies
+        ):
+            return match.group(0)
+        copy = fingerprint(target)
+        if copy == target:
+            return match.group(0)
+        new_url = Path(os.path.relpath(OUTPUT_DIR / copy, page_file.parent)).as_posix()
+        return match.group(0).replace(quoted, quoted.replace(url, new_url))
+
+    return _HTML_REFERENCE.sub(rewrite, html)
+
+
+def _stale_copies(sources, current):
+    """
+    Fingerprinted copies (name.<hash>.ext beside a source) of sources that
+    aren't in current, with their compressed siblings.
+    """
+    stale = []
+    for source in sources:
+        path = OUTPUT_DIR / source
+        if not path.parent.is_dir():
+            continue
+        for copy in path.parent.glob(f"{glob_escape(path.stem)}.*"):
+            name = copy.name
+            for suffix in COMPRESSED_SUFFIXES:
+                name = name.removesuffix(suffix)
+            if Path(name).suffix != path.suffix or not _FINGERPRINTED_STEM.search(Path(name).stem):
+                continue
+            if copy.with_name(name).relative_to(OUTPUT_DIR).as_posix() not in current:
+                stale.append(copy)
+    return stale
+
+
+def save_asset_manifest():
+    """
+    Write docs/asset-manifest.json and docs/_headers if any asset was
+    fingerprinted since the last save, and delete the copies the previous
+    manifest listed that are no longer current.
+    """
+    global _fingerprints_dirty
+    with _fingerprints_lock:
+        if not _fingerprints_dirty:
+            return
+        fingerprints = _load_fingerprints()
+        for source in [s for s in fingerprints if not (OUTPUT_DIR / s).is_file()]:
+            del fingerprints[source]
+        fingerprints = dict(fingerprints)
+        _fingerprints_dirty = False
+        manifest = {source: entry["file"] for source, entry in sorted(fingerprints.items())}
+        # Under the lock, so a copy another page is creating isn't swept
+        previous = _read_json(ASSET_MANIFEST_FILE)
+        for copy in _stale_copies(set(previous) | set(manifest), set(manifest.values())):
+            copy.unlink(missing_ok=True)
+
+    derived = images.DERIVED_DIR.relative_to(OUTPUT_DIR).as_posix()
+    pruned = css_prune.PRUNED_DIR.relative_to(OUTPUT_DIR).as_posix()
+    fonts = webfonts.WEBFONTS_DIR.relative_to(OUTPUT_DIR).as_posix()
+    headers = [
+        "# Generated by scripts/assets.py: these files never change once written.",
+        "# Applied by scripts/preview.py and Netlify-style hosts; GitHub Pages ignores it.",
+    ]
+    for path in [*manifest.values(), f"{derived}/*", f"{pruned}/*", f"{fonts}/*"]:
+        headers += [f"/{path}", f"  Cache-Control: {IMMUTABLE_CACHE_CONTROL}"]
+    try:
+        FINGERPRINTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        FINGERPRINTS_FILE.write_text(json.dumps(fingerprints, indent=2, sort_keys=True))
+        ASSET_MANIFEST_FILE.write_text(json.dumps(manifest, indent=2) + "\n")
+        HEADERS_FILE.write_text("\n".join(headers) + "\n")
+    except OSError as e:
+        print(f"  ⚠ Warning: could not write asset manifest: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report duplicate and unused files in docs/")
+    parser.add_argument(
+        "--rewrite", action="store_true", help="point pages at one copy of each duplicate"
+    )
+    args = parser.parse_args()
+
+    print("Checking site assets...")
+    report_assets(rewrite=args.rewrite)
@@ -9,21 +9,27 @@ Reads cv.md and outputs site/cv.html.
 """
 
 import re
-import urllib.request
-import urllib.error
+import threading
+import hashlib
 import json
 import os
+from contextlib import nullcontext
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, timezone
 
+import records_cache
+from assets import asset_url
+from css_prune import prune_page_css
+from images import add_image_hints
+from minify import minify_html
+from publications import load_publication_index
+from github_client import GITHUB_API, GitHubClient, prometheus_textfile
+
 LEADING_WS = "&nbsp;&nbsp;&nbsp;&nbsp;"
 
 # Global for tracking GitHub fetch statistics
-_github_stats = {"fresh": 0, "cached": 0}
-
-# Global for tracking TOC entries
-_toc_entries = []
-
+_github_stats = {"fresh": 0, "cached": 0, "deferred": 0}
 
 def slugify(text):
     """Convert heading text to a URL-friendly ID."""
@@ -38,47 +44,108 @@ def slugify(text):
     return text
 
 
-def add_heading_ids(html_content):
-    """Add IDs to h2 and h3 tags and track them for TOC."""
-    global _toc_entries
-    _toc_entries = []
+# Headings that get IDs and TOC entries (h2 only; h3s stay out of the TOC)
+_TOC_HEADING = re.compile(r"<(h2)>([^<]+)</h2>")
 
-    def replace_heading(match):
-        tag = match.group(1)  # h2 or h3
-        content = match.group(2)
-        slug = slugify(content)
 
-        # Make slugs unique if needed
-        base_slug = slug
+class TableOfContents:
+    """
+    Heading IDs and TOC entries for one CV page. Sections are added in page
+    order; IDs are deduplicated against a set, so building the TOC is linear
+    in the size of the page, and each page build keeps its own state.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._ids = set()
+
+    def _unique_id(self, text):
+        slug = base_slug = slugify(text)
         counter = 1
-        existing_slugs = [e["id"] for e in _toc_entries]
-        while slug in existing_slugs:
+        while slug in self._ids:
             slug = f"{base_slug}-{counter}"
             counter += 1
+        self._ids.add(slug)
+        return slug
 
-        # Track for TOC
-        level = int(tag[1])  # 2 or 3
-        _toc_entries.append(
-            {
-                "id": slug,
-                "text": re.sub(r"<[^>]+>", "", content),  # Strip HTML for TOC text
-                "level": level,
-            }
-        )
-
+    def _replace_heading(self, match):
+        tag, content = match.groups()
+        slug = self._unique_id(content)
+        self.entries.append({"id": slug, "text": content, "level": int(tag[1])})
         return f'<{tag} id="{slug}">{content}</{tag}>'
 
-    # Match only h2 tags for TOC (changed from h2 and h3)
-    pattern = r"<(h2)>([^<]+)</h2>"
-    return re.sub(pattern, replace_heading, html_content)
+    def add_section(self, html_content):
+        """Return a section's HTML with heading IDs added, recording its TOC entries."""
+        if "<h2>" not in html_content:
+            return html_content
+        return _TOC_HEADING.sub(self._replace_heading, html_content)
 
 
+def add_heading_ids(html_content):
+    """Add IDs to h2 tags; returns (html, toc_entries)."""
+    toc = TableOfContents()
+    return toc.add_section(html_content), toc.entries
+
+
+# Rendered CV section fragments, keyed on a hash of each section's inputs
+SECTION_CACHE_FILE = Path(__file__).resolve().parent.parent / ".build-cache" / "cv_sections.json"
+
+# Any edit to the builder or its section macros invalidates every cached fragment
+_RENDERER_SOURCE_HASH = hashlib.sha256(
+    Path(__file__).read_bytes()
+    + (Path(__file__).resolve().parent.parent / "templates" / "cv_sections.html").read_bytes()
+).hexdigest()
+
 # Cache file path
 CACHE_FILE = Path(__file__).resolve().parent.parent / "records" / "github_cache.json"
 
+# GitHub fetch telemetry, rewritten at the end of every CV build
+TELEMETRY_FILE = Path(__file__).resolve().parent.parent / ".build-cache" / "github_telemetry.json"
+
+# Fields a cache entry supplies to fetch_github_info() results
+CACHED_FIELDS = (
+    "version",
+    "last_commit_date",
+    "last_commit_sha",
+    "first_commit_date",
+    "total_commits",
+    "contributors",
+    "contributor_count",
+    "open_issues",
+    "stars",
+    "forks",
+    "description",
+    "topics",
+    "license_spdx",
+    "created_at",
+    "updated_at",
+)
+
+# Cache entry fields worth keeping: every field a result is restored from
+# (a fresh hit, a 304 or a failed refresh all read them back), plus fetch
+# bookkeeping (freshness, the commits ETag for conditional requests).
+# Fields older builders wrote are stripped.
+CACHE_KEEP_FIELDS = CACHED_FIELDS + ("last_fetched", "commits_etag")
+
+# Fields a 304 to the commits request restores from the cache entry; an
+# entry without all of them (stripped by an older build) is re-fetched
+COMMIT_FIELDS = ("last_commit_date", "last_commit_sha", "first_commit_date", "total_commits")
+
 # Default cache max age in minutes
 CACHE_MAX_AGE_MINUTES = 15
 
+# Worst-case GitHub requests to refresh one repo (repo, release + tags,
+# commits + first-commit page, contributors); a refresh only starts if the
+# remaining rate-limit budget covers all of them. The first-commit page is
+# only needed until first_commit_date is cached.
+REPO_REFRESH_COST = 6
+
+# Pipeline independent GitHub requests over one keep-alive connection
+GITHUB_HTTP_PIPELINING = False
+
+# Save every raw GitHub response to this directory (see github_replay.py)
+GITHUB_RECORD_DIR = None
+
 # Show placeholder text (XX.XX, XXXXXXX) when data is missing
 # Set to True to debug/identify missing data
 SHOW_MISSING_SOURCE_DATA = False
@@ -125,6 +192,73 @@ def save_github_cache(cache):
         print(f"  ⚠ Warning: Could not save cache file: {e}")
 
 
+def strip_cache_entry(entry):
+    """Drop fields that are neither restored into results nor fetch bookkeeping."""
+    return {k: v for k, v in entry.items() if k in CACHE_KEEP_FIELDS}
+
+
+def software_cache_keys(software):
+    """Cache keys (owner/repo) for the software entries listed in cv.md."""
+    keys = set()
+    for sw in software or []:
+        parsed = parse_github_url(sw.get("github", ""))
+        if parsed:
+            keys.add("/".join(parsed))
+    return keys
+
+
+def compact_github_cache(cache, keep_keys):
+    """
+    Drop entries for repos no longer in the software list and strip unread
+    fields from the rest. Returns (compacted_cache, removed_keys).
+    """
+    removed = sorted(k for k in cache if k not in keep_keys)
+    compacted = {k: strip_cache_entry(v) for k, v in cache.items() if k in keep_keys}
+    return compacted, removed
+
+
+def cache_command(command, dry_run=False):
+    """
+    ``cache stats``: report cache size, orphaned entries and staleness.
+    ``cache gc``: compact the cache file (see compact_github_cache).
+    """
+    records = load_cv_records(Path(__file__).resolve().parent.parent)
+    keep_keys = software_cache_keys(records.get("software"))
+    cache = load_github_cache()
+    compacted, removed = compact_github_cache(cache, keep_keys)
+
+    size = CACHE_FILE.stat().st_size if CACHE_FILE.exists() else 0
+    compacted_size = len(json.dumps(compacted, indent=2, sort_keys=True))
+    print(f"{CACHE_FILE.name}: {len(cache)} entries, {size:,} bytes")
+
+    if command == "stats":
+        for key in sorted(cache):
+            is_fresh, age_minutes = is_cache_fresh(cache[key])
+            if key not in keep_keys:
+                state = "orphaned"
+            elif "last_fetched" not in cache[key]:
+                state = "never fetched"
+            else:
+                state = "fresh" if is_fresh else f"stale ({age_minutes / 1440:.1f} days)"
+            print(f"  {key:<40} {len(json.dumps(cache[key])):>6,} bytes  {state}")
+        missing = sorted(keep_keys - set(cache))
+        for key in missing:
+            print(f"  {key:<40} {'-':>6}        not cached")
+        print(
+            f"After gc: {len(compacted)} entries, {compacted_size:,} bytes "
+            f"({len(removed)} orphaned entries dropped)"
+        )
+        return
+
+    for key in removed:
+        print(f"  - {key}")
+    if dry_run:
+        print(f"Dry run: would shrink to {len(compacted)} entries, {compacted_size:,} bytes")
+        return
+    save_github_cache(compacted)
+    print(f"Compacted to {len(compacted)} entries, {compacted_size:,} bytes")
+
+
 def is_cache_fresh(cache_entry, max_age_minutes=CACHE_MAX_AGE_MINUTES):
     """Check if cache entry is fresh (within max_age_minutes)."""
     if not cache_entry or "last_fetched" not in cache_entry:
@@ -141,43 +275,114 @@ def is_cache_fresh(cache_entry, max_age_minutes=CACHE_MAX_AGE_MINUTES):
         return False, 0
 
 
+# Shared keep-alive client, so every GitHub call in a build reuses connections
+_github_client = None
+
+
+def get_github_client():
+    """Return the build's shared GitHubClient, creating it on first use."""
+    global _github_client
+    if _github_client is None:
+        _github_client = GitHubClient(
+            base_url=os.environ.get("GITHUB_API_URL", GITHUB_API),
+            pipelining=GITHUB_HTTP_PIPELINING,
+            record_dir=GITHUB_RECORD_DIR,
+        )
+    return _github_client
+
+
 def check_rate_limit():
     """Check GitHub API rate limit status. Returns (remaining, limit) or None on error."""
     try:
-        url = "https://api.github.com/rate_limit"
-        req = urllib.request.Request(url, headers=get_github_headers())
-        with urllib.request.urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode())
-            core = data.get("resources", {}).get("core", {})
-            return core.get("remaining", 0), core.get("limit", 60)
+        status, _, body = get_github_client().request(
+            "/rate_limit", headers=get_github_headers(), timeout=5
+        )
+        if status != 200:
+            return None, None
+        data = json.loads(body.decode())
+        core = data.get("resources", {}).get("core", {})
+        get_github_client().budget.update(
+            core.get("remaining", 0), core.get("limit", 60), core.get("reset")
+        )
+        return core.get("remaining", 0), core.get("limit", 60)
     except Exception:
         return None, None
 
 
-def make_github_request(url):
+def make_github_request(url, extra_headers=None):
     """
     Make a GitHub API request with proper error handling.
     Returns (data, headers, error_type) where error_type is None on success,
-    'rate_limit' if rate limited, 'not_found' for 404, or 'error' for other errors.
+    'not_modified' for a 304 to a conditional request, 'rate_limit' if rate
+    limited, 'not_found' for 404, 'unavailable' for other 4xx answers (e.g.
+    409 for the commits of an empty repo, 403 for the contributors of a
+    very large one), or 'error' for transport failures and 5xx. A 204 is
+    success with no data.
     """
+    headers = get_github_headers()
+    headers.update(extra_headers or {})
     try:
-        req = urllib.request.Request(url, headers=get_github_headers())
-        with urllib.request.urlopen(req, timeout=10) as response:
-            headers = dict(response.headers)
-            data = json.loads(response.read().decode())
-            return data, headers, None
-    except urllib.error.HTTPError as e:
-        if e.code == 403:
-            # Check if rate limited
-            body = e.read().decode() if e.fp else ""
-            if "rate limit" in body.lower():
-                return None, None, "rate_limit"
-        elif e.code == 404:
-            return None, None, "not_found"
-        return None, None, "error"
+        status, headers, body = get_github_client().request(url, headers=headers)
     except Exception:
         return None, None, "error"
 
+    if status == 304:
+        return None, headers, "not_modified"
+    if status == 403:
+        # Check if rate limited
+        if "rate limit" in body.decode(errors="replace").lower():
+            return None, None, "rate_limit"
+        return None, None, "unavailable"
+    if status == 404:
+        return None, None, "not_found"
+    if 400 <= status < 500:
+        return None, None, "unavailable"
+    if not 200 <= status < 300:
+        return None, None, "error"
+    if status == 204 or not body.strip():
+        return None, headers, None
+
+    try:
+        return json.loads(body.decode()), headers, None
+    except ValueError:
+        return None, None, "error"
+
+
+def has_commit_fields(cached_entry):
+    """Whether a cache entry holds everything a 304 to the commits request restores."""
+    return bool(cached_entry) and all(field in cached_entry for field in COMMIT_FIELDS)
+
+
+def commits_request_headers(cached_entry):
+    """
+    Conditional headers for the commits?per_page=1 request. Only sent when
+    the cache entry can answer a 304 on its own; otherwise the request is
+    unconditional so the missing fields are fetched.
+    """
+    if has_commit_fields(cached_entry) and cached_entry.get("commits_etag"):
+        return {"If-None-Match": cached_entry["commits_etag"]}
+    return {}
+
+
+def prefetch_repo_requests(owner, repo, cached_entry=None):
+    """
+    Pipeline the independent per-repo requests when pipelining is enabled.
+    The commits request carries the same If-None-Match fetch_commits_info()
+    sends, so it can still be answered by a free 304.
+    """
+    base = f"https://api.github.com/repos/{owner}/{repo}"
+    commits_url = f"{base}/commits?per_page=1"
+    get_github_client().prefetch(
+        [
+            base,
+            f"{base}/releases/latest",
+            commits_url,
+            f"{base}/contributors?per_page=100",
+        ],
+        headers=get_github_headers(),
+        url_headers={commits_url: commits_request_headers(cached_entry)},
+    )
+
 
 def fetch_repo_info(owner, repo):
     """Fetch basic repository info from /repos endpoint."""
@@ -221,60 +426,78 @@ def fetch_version_info(owner, repo):
     return "", error
 
 
-def fetch_commits_info(owner, repo):
-    """Fetch commit info: latest commit and total count."""
+def parse_commit_date(commit):
+    """Return a commit's committer date as YYYY-MM-DD, or "" if unparseable."""
+    date_str = commit["commit"]["committer"]["date"]
+    try:
+        dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        return ""
+
+
+def fetch_commits_info(owner, repo, cached_entry=None):
+    """
+    Fetch commit info: latest commit and total count.
+
+    A single per_page=1 request gives both the latest commit and, from the
+    rel="last" page number in its Link header, the total count. It is sent
+    conditionally on the cached ETag, so an unchanged HEAD costs a 304 that
+    GitHub doesn't count against the rate limit. The first commit date
+    never changes, so once cached it is reused rather than re-fetching the
+    last page of history.
+    """
+    cached_entry = cached_entry or {}
     result = {
         "last_commit_date": "",
         "last_commit_sha": "",
         "first_commit_date": "",
         "total_commits": 0,
+        "commits_etag": "",
     }
 
     # Fetch latest commit
     url = f"https://api.github.com/repos/{owner}/{repo}/commits?per_page=1"
-    data, headers, error = make_github_request(url)
-
-    if error == "rate_limit":
-        return None, "rate_limit"
+    data, headers, error = make_github_request(url, commits_request_headers(cached_entry))
+
+    if error == "not_modified":
+        # HEAD unchanged since the last refresh (the request is only
+        # conditional when cached_entry holds every commit field)
+        for key in result:
+            result[key] = cached_entry.get(key, result[key])
+        return result, None
+
+    # A rate limit or transport failure fails the refresh; a 4xx answer
+    # (409 for an empty repository) just means there are no commits
+    if error in ("rate_limit", "error"):
+        return None, error
 
     if not error and data and len(data) > 0:
         commit = data[0]
         result["last_commit_sha"] = commit["sha"][:7]
-        date_str = commit["commit"]["committer"]["date"]
-        try:
-            dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-            result["last_commit_date"] = dt.strftime("%Y-%m-%d")
-        except ValueError:
-            pass
-
-        # Try to get total commit count from Link header
-        if headers:
-            link = headers.get("Link", "")
-            # Parse the last page number from Link header
-            # Format: <url>; rel="last"
-            import re as re_module
-
-            match = re_module.search(r'page=(\d+)>; rel="last"', link)
-            if match:
-                result["total_commits"] = int(match.group(1))
-            else:
-                # If no pagination, it's just 1 commit
-                result["total_commits"] = 1
+        result["last_commit_date"] = parse_commit_date(commit)
+        result["commits_etag"] = headers.get("ETag", "")
+
+        # Parse the last page number from the Link header
+        # Format: <url>; rel="last"
+        match = re.search(r'page=(\d+)>; rel="last"', headers.get("Link", ""))
+        if match:
+            result["total_commits"] = int(match.group(1))
+        else:
+            # If no pagination, it's just 1 commit
+            result["total_commits"] = 1
+            result["first_commit_date"] = result["last_commit_date"]
 
-    # Try to get first commit (oldest)
-    # This requires getting the last page of commits
+    # The first (oldest) commit is immutable: reuse it once known,
+    # otherwise get the last page of commits, once
     if result["total_commits"] > 1:
+        result["first_commit_date"] = cached_entry.get("first_commit_date", "")
+    if result["total_commits"] > 1 and not result["first_commit_date"]:
         last_page = result["total_commits"]
         url = f"https://api.github.com/repos/{owner}/{repo}/commits?per_page=1&page={last_page}"
         data, _, error = make_github_request(url)
         if not error and data and len(data) > 0:
-            commit = data[0]
-            date_str = commit["commit"]["committer"]["date"]
-            try:
-                dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                result["first_commit_date"] = dt.strftime("%Y-%m-%d")
-            except ValueError:
-                pass
+            result["first_commit_date"] = parse_commit_date(data[0])
 
     return result, None
 
@@ -284,8 +507,10 @@ def fetch_contributors(owner, repo):
     url = f"https://api.github.com/repos/{owner}/{repo}/contributors?per_page=100"
     data, headers, error = make_github_request(url)
 
-    if error == "rate_limit":
-        return None, "rate_limit"
+    # GitHub answers 403 for the contributors of a very large repository,
+    # and 204 for an empty one; both leave the list empty
+    if error in ("rate_limit", "error"):
+        return None, error
 
     if not error and data:
         contributors = [c.get("login", "") for c in data if c.get("login")]
@@ -297,7 +522,83 @@ def fetch_contributors(owner, repo):
     return {"contributors": [], "contributor_count": 0}, None
 
 
-def fetch_github_info(github_url, yaml_data=None, force_refresh=False):
+def count_field_cache(outcome, fields=CACHED_FIELDS):
+    """Record a cache outcome ("hit", "stale" or "miss") for each field."""
+    telemetry = get_github_client().telemetry
+    for field in fields:
+        telemetry.count_field(field, outcome)
+
+
+def write_github_telemetry(prometheus_file=None):
+    """
+    Write the GitHub fetch telemetry as JSON to TELEMETRY_FILE and, if
+    prometheus_file is given, as a Prometheus textfile.
+    """
+    client = get_github_client()
+    budget = client.budget
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "packages": dict(_github_stats),
+        "http": dict(client.stats),
+        "rate_limit": {
+            "limit": budget.limit,
+            "initial": budget.initial,
+            "remaining": budget.remaining,
+            "consumed": budget.consumed(),
+        },
+        **client.telemetry.as_dict(),
+    }
+    try:
+        TELEMETRY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        TELEMETRY_FILE.write_text(json.dumps(report, indent=2) + "\n")
+        if prometheus_file:
+            # Write then rename so the collector never reads a partial file
+            prometheus_file = Path(prometheus_file)
+            tmp_file = prometheus_file.with_suffix(prometheus_file.suffix + ".tmp")
+            tmp_file.write_text(prometheus_textfile(report))
+            tmp_file.replace(prometheus_file)
+    except IOError as e:
+        print(f"  ⚠ Warning: Could not write telemetry: {e}")
+    return report
+
+
+def parse_github_url(github_url):
+    """Parse (owner, repo) from a GitHub URL, or return None."""
+    github_url = (github_url or "").strip().rstrip("/")
+    match = re.match(r"https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?$", github_url)
+    return match.groups() if match else None
+
+
+def apply_cached_entry(result, cached_entry, age_minutes):
+    """Overlay a cache entry onto a fetch_github_info() result dict."""
+    result.update(
+        {
+            "version": cached_entry.get("version", result["version"]),
+            "last_commit_date": cached_entry.get(
+                "last_commit_date", result["last_commit_date"]
+            ),
+            "last_commit_sha": cached_entry.get(
+                "last_commit_sha", result["last_commit_sha"]
+            ),
+            "first_commit_date": cached_entry.get("first_commit_date", ""),
+            "total_commits": cached_entry.get("total_commits", 0),
+            "contributors": cached_entry.get("contributors", []),
+            "contributor_count": cached_entry.get("contributor_count", 0),
+            "open_issues": cached_entry.get("open_issues", 0),
+            "stars": cached_entry.get("stars", 0),
+            "forks": cached_entry.get("forks", 0),
+            "description": cached_entry.get("description", ""),
+            "topics": cached_entry.get("topics", []),
+            "license_spdx": cached_entry.get("license_spdx", ""),
+            "created_at": cached_entry.get("created_at", ""),
+            "updated_at": cached_entry.get("updated_at", ""),
+            "from_cache": True,
+            "cache_age_minutes": age_minutes,
+        }
+    )
+
+
+def fetch_github_info(github_url, yaml_data=None, force_refresh=False, allow_network=True):
     """
     Fetch version and commit info from GitHub API with caching.
     Falls back to cached data, then YAML data, then to placeholders.
@@ -309,7 +610,10 @@ def fetch_github_info(github_url, yaml_data=None, force_refresh=False):
     - stars, forks, open_issues (popularity)
     - description, topics, license_spdx (metadata)
     - created_at, updated_at (dates)
-    - from_cache, cache_age_minutes (cache status)
+    - from_cache, cache_age_minutes, stale (cache status)
+
+    With allow_network=False, an expired cache entry is served as-is and
+    flagged stale so the caller can revalidate it later.
     """
     global _github_stats
 
@@ -335,6 +639,7 @@ def fetch_github_info(github_url, yaml_data=None, force_refresh=False):
         "updated_at": "",
         "from_cache": False,
         "cache_age_minutes": 0,
+        "stale": False,
     }
 
     if not github_url:
@@ -342,13 +647,12 @@ def fetch_github_info(github_url, yaml_data=None, force_refresh=False):
         return result
 
     # Parse owner/repo from GitHub URL
-    github_url = github_url.strip().rstrip("/")
-    match = re.match(r"https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?$", github_url)
-    if not match:
+    parsed = parse_github_url(github_url)
+    if not parsed:
         print(f"    ⚠ Could not parse GitHub URL: {github_url}")
         return result
 
-    owner, repo = match.groups()
+    owner, repo = parsed
     cache_key = f"{owner}/{repo}"
 
     # Load cache
@@ -362,118 +666,114 @@ def fetch_github_info(github_url, yaml_data=None, force_refresh=False):
     if yaml_data.get("force-api-call"):
         force_refresh = True
 
-    if is_fresh and not force_refresh:
+    # An entry missing commit fields (stripped by an older build) is
+    # refreshed rather than served with zeros
+    if is_fresh and not force_refresh and has_commit_fields(cached_entry):
         # Use cached data
         print(f"    ✓ Using cached data ({age_minutes:.0f} min old)")
-        result.update(
-            {
-                "version": cached_entry.get("version", result["version"]),
-                "last_commit_date": cached_entry.get(
-                    "last_commit_date", result["last_commit_date"]
-                ),
-                "last_commit_sha": cached_entry.get(
-                    "last_commit_sha", result["last_commit_sha"]
-                ),
-                "first_commit_date": cached_entry.get("first_commit_date", ""),
-                "total_commits": cached_entry.get("total_commits", 0),
-                "contributors": cached_entry.get("contributors", []),
-                "contributor_count": cached_entry.get("contributor_count", 0),
-                "open_issues": cached_entry.get("open_issues", 0),
-                "stars": cached_entry.get("stars", 0),
-                "forks": cached_entry.get("forks", 0),
-                "description": cached_entry.get("description", ""),
-                "topics": cached_entry.get("topics", []),
-                "license_spdx": cached_entry.get("license_spdx", ""),
-                "created_at": cached_entry.get("created_at", ""),
-                "updated_at": cached_entry.get("updated_at", ""),
-                "from_cache": True,
-                "cache_age_minutes": age_minutes,
-            }
-        )
+        apply_cached_entry(result, cached_entry, age_minutes)
+        count_field_cache("hit")
         _github_stats["cached"] += 1
         return result
 
-    # Fetch fresh data
+    # Defer rather than start a refresh the rate-limit budget can't finish
+    cost = REPO_REFRESH_COST - (1 if cached_entry.get("first_commit_date") else 0)
+    deferred = allow_network and not get_github_client().budget.can_afford(cost)
+
+    if not allow_network or deferred:
+        # Stale-while-revalidate: serve whatever is cached, however old
+        result["stale"] = True
+        if deferred:
+            budget = get_github_client().budget.describe()
+            print(f"    ⚠ Deferred - rate-limit budget too low ({budget})")
+        if cached_entry:
+            print(f"    ✓ Using stale cached data ({age_minutes:.0f} min old)")
+            apply_cached_entry(result, cached_entry, age_minutes)
+            count_field_cache("stale")
+            _github_stats["cached"] += 1
+        else:
+            print(f"    ⚠ Not cached yet")
+            count_field_cache("miss")
+        if deferred:
+            _github_stats["deferred"] += 1
+        return result
+
+    # Fetch fresh data. The entry is only written back once every field
+    # has been fetched, so a failure partway never leaves it half-updated.
     print(f"    → Fetching fresh data from API...")
-    rate_limited = False
+    prefetch_repo_requests(owner, repo, None if force_refresh else cached_entry)
+    failure = None
     new_data = {"last_fetched": datetime.now(timezone.utc).isoformat()}
 
     # Fetch repo info
     repo_info, error = fetch_repo_info(owner, repo)
-    if error == "rate_limit":
-        rate_limited = True
-        print(f"    ⚠ Rate limited")
+    if error in ("rate_limit", "error"):
+        failure = error
     elif repo_info:
         new_data.update(repo_info)
         result.update(repo_info)
 
     # Fetch version
-    if not rate_limited:
+    if not failure:
         version, error = fetch_version_info(owner, repo)
-        if error == "rate_limit":
-            rate_limited = True
-            print(f"    ⚠ Rate limited")
+        if error in ("rate_limit", "error"):
+            failure = error
         elif version:
             new_data["version"] = version
             result["version"] = version
 
     # Fetch commits info
-    if not rate_limited:
-        commits_info, error = fetch_commits_info(owner, repo)
-        if error == "rate_limit":
-            rate_limited = True
-            print(f"    ⚠ Rate limited")
+    if not failure:
+        commits_info, error = fetch_commits_info(
+            owner, repo, None if force_refresh else cached_entry
+        )
+        if error:
+            failure = error
         elif commits_info:
             new_data.update(commits_info)
             result.update(commits_info)
 
     # Fetch contributors
-    if not rate_limited:
+    if not failure:
         contrib_info, error = fetch_contributors(owner, repo)
-        if error == "rate_limit":
-            rate_limited = True
-            print(f"    ⚠ Rate limited")
+        if error:
+            failure = error
         elif contrib_info:
             new_data.update(contrib_info)
             result.update(contrib_info)
 
-    # Handle rate limiting: fall back to cache
-    if rate_limited and cached_entry:
-        print(f"    ⚠ Rate limited - using cached data as fallback")
-        result.update(
-            {
-                "version": cached_entry.get("version", result["version"]),
-                "last_commit_date": cached_entry.get(
-                    "last_commit_date", result["last_commit_date"]
-                ),
-                "last_commit_sha": cached_entry.get(
-                    "last_commit_sha", result["last_commit_sha"]
-                ),
-                "first_commit_date": cached_entry.get("first_commit_date", ""),
-                "total_commits": cached_entry.get("total_commits", 0),
-                "contributors": cached_entry.get("contributors", []),
-                "contributor_count": cached_entry.get("contributor_count", 0),
-                "open_issues": cached_entry.get("open_issues", 0),
-                "stars": cached_entry.get("stars", 0),
-                "forks": cached_entry.get("forks", 0),
-                "description": cached_entry.get("description", ""),
-                "topics": cached_entry.get("topics", []),
-                "license_spdx": cached_entry.get("license_spdx", ""),
-                "created_at": cached_entry.get("created_at", ""),
-                "updated_at": cached_entry.get("updated_at", ""),
-                "from_cache": True,
-                "cache_age_minutes": age_minutes if cached_entry else 0,
-            }
-        )
+    if failure == "rate_limit":
+        print(f"    ⚠ Rate limited")
+    elif failure:
+        print(f"    ⚠ Request failed")
+
+    # Handle a failed refresh: fall back to cache
+    if failure and cached_entry:
+        print(f"    ⚠ Refresh incomplete - using cached data as fallback")
+        apply_cached_entry(result, cached_entry, age_minutes)
+        result["stale"] = True
+        count_field_cache("stale")
         _github_stats["cached"] += 1
         return result
 
-    # Save to cache if we got any new data
-    if not rate_limited and new_data.get("last_fetched"):
-        cache[cache_key] = new_data
+    # Save to cache only if the refresh completed
+    if not failure:
+        cache[cache_key] = strip_cache_entry(new_data)
         save_github_cache(cache)
         _github_stats["fresh"] += 1
 
+        # Commit fields answered by a 304 and the reused first commit
+        # date count as cache hits; everything else was fetched
+        conditional = commits_request_headers(None if force_refresh else cached_entry)
+        etag = conditional.get("If-None-Match")
+        revalidated = bool(etag) and new_data.get("commits_etag") == etag
+        for field in CACHED_FIELDS:
+            if field == "first_commit_date":
+                reused = revalidated or (bool(cached_entry.get(field)) and not force_refresh)
+            else:
+                reused = revalidated and field in ("last_commit_date", "last_commit_sha", "total_commits")
+            count_field_cache("hit" if reused else "miss", (field,))
+
     result["from_cache"] = False
     result["cache_age_minutes"] = 0
 
@@ -497,41 +797,126 @@ def md_links_to_html(text):
     return md_to_html(text)
 
 
-try:
-    import yaml
-except ImportError:
-    print("Error: pyyaml package not found. Run: pixi add pyyaml")
-    exit(1)
+def parse_frontmatter(content: str, cache_name=None) -> dict:
+    """
+    Extract YAML frontmatter from markdown content. With cache_name the
+    parsed structure is cached on disk (see records_cache.py).
+    """
+    frontmatter, _ = records_cache.parse_frontmatter(content, cache_name)
+    return {} if frontmatter is None else frontmatter
+
+
+# clean_text() passes, in order: LaTeX commands to drop, then superscripts
+# like 21^st^, bold (before italics), and italics; md_to_html() follows
+_CLEAN_TEXT_PASSES = [
+    (re.compile(r"\\newline"), ""),
+    (re.compile(r"\\footnotesize"), ""),
+    (re.compile(r"\\vspace\{[^}]*\}"), ""),
+    (re.compile(r"\\ind\s*"), ""),
+    (re.compile(r"\^(\w+)\^"), r"<sup>\1</sup>"),
+    (re.compile(r"\*\*([^*]+)\*\*"), r"<strong>\1</strong>"),
+    (re.compile(r"\*([^*]+)\*"), r"<em>\1</em>"),
+]
+
+# The same inline markup as one alternation, so a single scan finds every
+# construct: ^superscript^, **bold**, *italics*, [links](url) and `code`
+_INLINE_TOKEN = re.compile(
+    r"\^(?P<sup>\w+)\^"
+    r"|\*\*(?P<bold>[^*]+)\*\*"
+    r"|\*(?P<em>[^*]+)\*"
+    r"|\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)]+)\)"
+    r"|`(?P<code>[^`]+)`"
+)
+_MARKUP_CHARS = re.compile(r"[\\^*\[`]")
+
+
+def _clean_text_reference(text: str) -> str:
+    """
+    The original pass-per-construct clean_text(). Kept as the definition
+    of the output: the one-pass formatter falls back to it for markup
+    whose result depends on the pass order, and check_clean_text()
+    compares the two.
+    """
+    for pattern, replacement in _CLEAN_TEXT_PASSES:
+        text = pattern.sub(replacement, text)
+    text = md_to_html(text)
+    return text.strip()
 
 
-def parse_frontmatter(content: str) -> dict:
-    """Extract YAML frontmatter from markdown content."""
-    if content.startswith("---"):
-        parts = content.split("---", 2)
-        if len(parts) >= 3:
-            return yaml.safe_load(parts[1])
-    return {}
+def _depends_on_pass_order(text: str) -> bool:
+    """
+    True for markup where the sequential passes and a single scan can
+    disagree: LaTeX commands, stars mixed with links or code, links mixed
+    with code, runs of three or more stars, or bold mixed with italics.
+    """
+    if "\\" in text or "***" in text:
+        return True
+    kinds = ("*" in text) + ("`" in text) + ("[" in text)
+    if kinds > 1:
+        return True
+    return "**" in text and "*" in text.replace("**", "")
+
+
+def _render_token(match):
+    sup, bold, em, link_text, link_url, code = match.groups()
+    if sup is not None:
+        return f"<sup>{sup}</sup>"
+    if bold is not None:
+        return f"<strong>{_format_inline(bold)}</strong>"
+    if em is not None:
+        return f"<em>{_format_inline(em)}</em>"
+    if link_text is not None:
+        return f'<a href="{_format_inline(link_url)}">{_format_inline(link_text)}</a>'
+    return f"<code>{_format_inline(code)}</code>"
+
+
+def _format_inline(text: str) -> str:
+    return _INLINE_TOKEN.sub(_render_token, text)
+
+
+@lru_cache(maxsize=4096)
+def _clean_text(text: str) -> str:
+    if not _MARKUP_CHARS.search(text):
+        return text.strip()
+    if _depends_on_pass_order(text):
+        return _clean_text_reference(text)
+    return _format_inline(text).strip()
 
 
 def clean_text(text: str) -> str:
-    """Clean LaTeX and special formatting from text, convert markdown to HTML."""
+    """
+    Clean LaTeX and special formatting from text, convert markdown to HTML.
+
+    Plain text returns after one character scan; markup is converted in a
+    single tokenizing pass. Results are memoized, since titles, journals
+    and institutions repeat across the CV.
+    """
     if not text:
         return ""
-    text = str(text)
-    # Remove LaTeX newlines and formatting
-    text = re.sub(r"\\newline", "", text)
-    text = re.sub(r"\\footnotesize", "", text)
-    text = re.sub(r"\\vspace\{[^}]*\}", "", text)
-    text = re.sub(r"\\ind\s*", "", text)
-    # Handle superscripts like 21^st^
-    text = re.sub(r"\^(\w+)\^", r"<sup>\1</sup>", text)
-    # Handle bold marked with double asterisks (must come before italics)
-    text = re.sub(r"\*\*([^*]+)\*\*", r"<strong>\1</strong>", text)
-    # Handle italics marked with single asterisks
-    text = re.sub(r"\*([^*]+)\*", r"<em>\1</em>", text)
-    # Convert markdown syntax to HTML (links, inline code)
-    text = md_to_html(text)
-    return text.strip()
+    return _clean_text(str(text))
+
+
+def check_clean_text(records):
+    """
+    Differential check of clean_text() against _clean_text_reference() over
+    every string in the CV records. Returns the strings that differ.
+    """
+    strings = set()
+
+    def collect(value):
+        if isinstance(value, dict):
+            for v in value.values():
+                collect(v)
+        elif isinstance(value, list):
+            for v in value:
+                collect(v)
+        elif value is not None and not isinstance(value, bool):
+            strings.add(str(value))
+
+    for key in records.keys():
+        collect(records.get(key))
+    mismatches = sorted(t for t in strings if t and clean_text(t) != _clean_text_reference(t))
+    return strings, mismatches
 
 
 def format_pages(pages):
@@ -550,1077 +935,1084 @@ def format_volume_issue(volume, issue):
     return f" {volume}"
 
 
-def render_cv_page(sections_html: str) -> str:
-    """Render the CV page through the shared Jinja2 base template.
-
-    Args:
-        sections_html: Pre-built HTML for all CV sections, with heading IDs
-            already added by ``add_heading_ids``.
-
-    Returns:
-        The complete CV page as an HTML string.
-    """
-    from jinja2 import Environment, FileSystemLoader, select_autoescape
-
-    templates_dir = Path(__file__).resolve().parent.parent / "templates"
-    env = Environment(
-        loader=FileSystemLoader(templates_dir),
-        autoescape=select_autoescape(["html", "xml"]),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-    env.globals["current_year"] = datetime.now().year
-    template = env.get_template("cv.html")
-    return template.render(
-        base_path="",
-        title="CV",
-        active="cv",
-        toc_entries=_toc_entries,
-        content=sections_html,
+# License badge mapping
+LICENSE_BADGES = {
+    "MIT License": "https://img.shields.io/badge/License-MIT-yellow.svg",
+    "MIT": "https://img.shields.io/badge/License-MIT-yellow.svg",
+    "GNU GPL2": "https://img.shields.io/badge/License-GPL_v2-blue.svg",
+    "GNU GPL3": "https://img.shields.io/badge/License-GPLv3-blue.svg",
+    "Apache 2.0": "https://img.shields.io/badge/License-Apache_2.0-yellowgreen.svg",
+    "BSD 3-Clause": "https://img.shields.io/badge/License-BSD_3--Clause-orange.svg",
+}
+
+# GitHub badge
+GITHUB_BADGE = "https://img.shields.io/badge/github-%23121011.svg?style=flat&logo=github&logoColor=white"
+# Language and tool badges
+LANGUAGE_BADGES = {
+    # Languages
+    "Python": "https://img.shields.io/badge/python-3670A0?style=flat&logo=python&logoColor=ffdd54",
+    "R": "https://img.shields.io/badge/r-%23276DC3.svg?style=flat&logo=r&logoColor=white",
+    "Julia": "https://img.shields.io/badge/-Julia-9558B2?style=flat&logo=julia&logoColor=white",
+    "Bash": "https://img.shields.io/badge/bash-%23121011.svg?style=flat&logo=gnu-bash&logoColor=white",
+    "Shell": "https://img.shields.io/badge/shell-%23121011.svg?style=flat&logo=gnu-bash&logoColor=white",
+    # ML/NLP tools
+    "HuggingFace": "https://img.shields.io/badge/HuggingFace-%23FFD21E.svg?style=flat&logo=huggingface&logoColor=black",
+    "Transformers": "https://img.shields.io/badge/Transformers-%23FFD21E.svg?style=flat&logo=huggingface&logoColor=black",
+    "spaCy": "https://img.shields.io/badge/spaCy-09A3D5?style=flat&logo=spacy&logoColor=white",
+    # Network analysis
+    "graph-tool": "https://img.shields.io/badge/graph--tool-7B68EE?style=flat",
+    # Bibliometric databases
+    "OpenAlex": "https://img.shields.io/badge/OpenAlex-A6CE39?style=flat",
+    "Web of Science": "https://img.shields.io/badge/Web_of_Science-5C5C5C?style=flat",
+    "Scopus": "https://img.shields.io/badge/Scopus-E9711C?style=flat",
+}
+
+# Display order for software status groups; other statuses follow
+SOFTWARE_STATUS_ORDER = [
+    "Active Development",
+    "Maintained, Occasional Updates",
+    "Archived",
+]
+
+
+def is_missing(val):
+    """Check if a value is a placeholder/missing."""
+    if not val:
+        return True
+    missing_markers = [
+        "XX.XX",
+        "XXXX-XX-XX",
+        "XXXXXXX",
+        "add documentation website here",
+        "add citation here",
+    ]
+    return str(val).strip() in missing_markers
+
+
+def print_rate_limit_status():
+    """Check and display GitHub API rate limit status."""
+    remaining, limit = check_rate_limit()
+    has_token = os.environ.get("GITHUB_TOKEN") is not None
+    auth_status = (
+        "(authenticated)"
+        if has_token
+        else "(unauthenticated - set GITHUB_TOKEN for higher limits)"
     )
+    if remaining is not None:
+        print(f"  GitHub API: {remaining}/{limit} requests remaining {auth_status}")
+    else:
+        print(f"  GitHub API: Could not check rate limit {auth_status}")
 
 
-def build_cv():
-    base_dir = Path(__file__).resolve().parent.parent
-    cv_file = base_dir / "records" / "cv.md"
-    output_file = base_dir / "docs" / "cv.html"
-
-    print(f"Reading: {cv_file}")
-    content = cv_file.read_text()
-    data = parse_frontmatter(content)
-
-    # Build HTML sections
-    sections = []
-
-    # Contact Info
-    name = clean_text(data.get("name", ""))
-    # Clean up the name further
-    name = re.sub(r"\s+", " ", name).strip()
-    if "Dr." in name:
-        name = name.replace("Dr. ", "")
-    # sections.append(f"<h1>{name}</h1>")
-
-    address = data.get("address", [])
-    address = "<br>".join(address)
-    email = data.get("email", "")
-    phone = data.get("phone", "")
-    urls = data.get("urls", [])
-    # Wrap URLs in anchor tags
-    urls = [f'<a href="https://{url}">{url}</a>' for url in urls]
-    urls = "<br>".join(urls)
-
-    contact_html = "<h2>Contact Information</h2>\n"
-    if len(address) > 0:
-        contact_html += f"<p>{address}</p>\n"
-
-    contact_html += "<p>\n"
-    if len(email) > 0:
-        contact_html += f'<a href="mailto:{email}">{email}</a>\n'
-    if len(phone) > 0:
-        contact_html += f"<br>\n{phone}\n"
-    contact_html += "</p>\n"
-
-    if len(urls) > 0:
-        contact_html += f"<p>{urls}</p>\n"
-
-    sections.append(contact_html)
-
-    # Areas
-    if data.get("areas"):
-        sections.append(
-            f"""
-<h2>Research Areas</h2>
-<p>{clean_text(" ⋅ ".join(data["areas"]))}</p>
-"""
-        )
-
-    # Education
-    if data.get("education"):
-        edu_items = []
-        for edu in data["education"]:
-            edu_items.append(
-                f'<p>{edu.get("year", "")} | <strong>{clean_text(edu.get("subject", ""))}</strong><br>{LEADING_WS}{clean_text(edu.get("institute", ""))}, {clean_text(edu.get("city", ""))}</p>'
-            )
+def plan_github_refresh(software, indices=None):
+    """
+    Order software entries for fetching: entries whose cache is fresh come
+    first (they cost nothing), then the ones needing a refresh, most
+    important first (force-api-call, then status order) and stalest first
+    within each group. fetch_github_info() defers any refresh the remaining
+    rate-limit budget can't complete, so the budget goes to these first.
+    """
+    if indices is None:
+        indices = range(len(software))
+    cache = load_github_cache()
 
-        sections.append(
-            f"""
-<h2>Education</h2>
-{"\n".join(edu_items)}
-"""
+    cached, refresh = [], []
+    for i in indices:
+        sw = software[i]
+        parsed = parse_github_url(sw.get("github", ""))
+        entry = cache.get("/".join(parsed), {}) if parsed else {}
+        is_fresh, age_minutes = is_cache_fresh(entry)
+        forced = bool(sw.get("force-api-call"))
+        if not parsed or (is_fresh and not forced):
+            cached.append(i)
+            continue
+        if not entry.get("last_fetched"):
+            age_minutes = float("inf")
+        status = sw.get("status", "Other")
+        rank = (
+            SOFTWARE_STATUS_ORDER.index(status)
+            if status in SOFTWARE_STATUS_ORDER
+            else len(SOFTWARE_STATUS_ORDER)
         )
+        refresh.append((not forced, rank, -age_minutes, i))
 
-    # Appointments
-    if data.get("appointments"):
-        appt_items = []
-        for appt in data["appointments"]:
-            appointment_str = f"""
-<p>{appt.get("years", "")} | <strong>{clean_text(appt.get("job", ""))}</strong><br>
-"""
-
-            if appt.get("notes"):
-                appointment_str += f"{LEADING_WS}{appt.get("notes")}<br>"
+    refresh.sort()
+    return cached + [i for *_, i in refresh]
 
-            appointment_str += f"""
-{LEADING_WS}{clean_text(appt.get("department", ""))}, {clean_text(appt.get("faculty", ""))}<br>
-"""
-
-            if appt.get("cross"):
-                appointment_str += f"{LEADING_WS}{appt.get("cross")}<br>"
-
-            appointment_str += f"{LEADING_WS}{clean_text(appt.get("employer", ""))}"
-
-            appointment_str += "</p>"
-            appt_items.append(appointment_str)
-
-        sections.append(
-            f"""
-<h2>Academic Appointments</h2>
-{"\n".join(appt_items)}
-""".replace(
-                "--", " to "
-            )
-        )
 
-    # leaves
-    if data.get("leaves"):
-        leave_items = []
-        for leave in data["leaves"]:
-            leave_items.append(
-                f'<p>{leave.get("years", "")} | <strong>{clean_text(leave.get("type", ""))}</strong><br>'
-                f"{LEADING_WS}{leave.get("employer", "")}</p>"
-            )
-        sections.append(
-            f"""
-<h3>Leaves</h3>
-{"\n".join(leave_items)}
-""".replace(
-                "--", " to "
-            )
+def fetch_software_info(software, allow_network=True):
+    """
+    Fetch GitHub info for every software entry, in plan_github_refresh() order.
+    Returns (gh_infos, stale) where gh_infos is aligned with ``software`` and
+    stale lists the indices of entries served from an expired cache entry
+    (in stale-while-revalidate mode, or deferred for lack of budget).
+    """
+    gh_infos = [None] * len(software)
+    stale = []
+    for i in plan_github_refresh(software):
+        sw = software[i]
+        print(f"  → {clean_text(sw.get('package', ''))}...")
+        gh_infos[i] = fetch_github_info(sw.get("github", ""), sw, allow_network=allow_network)
+        if gh_infos[i]["stale"]:
+            stale.append(i)
+    return gh_infos, sorted(stale)
+
+
+def render_software_item(sw, gh_info):
+    """Render a single software entry as an HTML list item."""
+    package = clean_text(sw.get("package", ""))
+    language = sw.get("language", "")
+    description = clean_text(sw.get("description", ""))
+    license_text = sw.get("license", "")
+    github_url = sw.get("github", "")
+    team = clean_text(sw.get("development", ""))
+    documentation_url = sw.get("documentation", "")
+    citation = sw.get("citation", "")
+    learn_more = clean_text(sw.get("learn-more", ""))
+
+    # All available variables from GitHub API / cache:
+    version = gh_info["version"]
+    last_commit_date = gh_info["last_commit_date"]
+    last_commit_sha = gh_info["last_commit_sha"]
+
+    # Get language badge
+    language_badge = LANGUAGE_BADGES.get(language)
+    if language_badge:
+        language_html = f'<img src="{language_badge}" alt="{language}">'
+    else:
+        language_html = ""
+
+    badge_url = LICENSE_BADGES.get(license_text)
+    if badge_url:
+        license_html = f'<img src="{badge_url}" alt="{license_text}">'
+    else:
+        license_html = license_text
+
+    # GitHub badge with link
+    if github_url:
+        github_html = (
+            f'<a href="{github_url}">'
+            f'<img src="{GITHUB_BADGE}" alt="GitHub"></a>'
         )
-
-    # Affiliations
-    if data.get("affiliations"):
-        aff_items = []
-        for aff in data["affiliations"]:
-            aff_str = f'<p>{aff.get("years", "")} | <strong>{clean_text(aff.get("role", ""))}</strong><br>'
-            aff_str += f'{LEADING_WS}{clean_text(aff.get("organization", ""))}'.replace(
-                ": ", f"<br>{LEADING_WS}"
+        # Package name links to GitHub, include version if available
+        if is_missing(version) and not SHOW_MISSING_SOURCE_DATA:
+            package_html = (
+                f'<a href="{github_url}"><strong>{package}</strong></a>'
             )
-            if aff.get("notes"):
-                aff_str += f"<br>{LEADING_WS}"
-                aff_str += f"{aff.get("notes")}"
-            aff_str += "</p>"
-
-            aff_items.append(aff_str)
-        sections.append(
-            f"""
-<h3>Affiliations</h3>
-{"\n".join(aff_items)}
-""".replace(
-                "--", " to "
+        else:
+            package_html = (
+                f'<a href="{github_url}"><strong>{package}</strong></a> '
+                f"(v{version})"
             )
-        )
+    else:
+        github_html = ""
+        package_html = f"<strong>{package}</strong>"
 
-    # Books
-    if data.get("books"):
-        book_items = []
-        for book in data["books"]:
-            link = (
-                f' <a href="{book.get("ilink", "")}">[link]</a>'
-                if book.get("ilink")
-                else ""
-            )
-            book_items.append(
-                f'<li>{clean_text(book.get("authors", ""))}. {book.get("year", "")}. <em>{clean_text(book.get("title", ""))}</em>. {clean_text(book.get("press", ""))}: {clean_text(book.get("city", ""))}.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Books</h2>
-<ol reversed>
-{"\n".join(book_items)}
-</ol>
-"""
-        )
+    # Format date for display (e.g., "Feb 3, 2026")
+    formatted_date = format_date_long(last_commit_date)
 
-    # Articles
-    if data.get("articles"):
-        article_items = []
-        for art in data["articles"]:
-            vol_issue = format_volume_issue(art.get("volume"), art.get("issue"))
-            pages = format_pages(art.get("pages"))
-            article_items.append(
-                f'<li>{clean_text(art.get("authors", ""))}. {art.get("year", "")}. '
-                f'"{clean_text(art.get("title", ""))}." '
-                f'<em>{clean_text(art.get("journal", ""))}</em>{vol_issue}{pages}.</li>'
+    # Build last commit display, hide if missing
+    has_commit_info = not is_missing(last_commit_date) or not is_missing(
+        last_commit_sha
+    )
+    if has_commit_info or SHOW_MISSING_SOURCE_DATA:
+        if is_missing(last_commit_date) and is_missing(last_commit_sha):
+            last_commit_line = "Last commit: (no data)<br>\n"
+        elif is_missing(last_commit_sha):
+            last_commit_line = f"Last commit: {formatted_date}<br>\n"
+        elif is_missing(last_commit_date):
+            last_commit_line = f"Last commit: (commit: {last_commit_sha})<br>\n"
+        else:
+            last_commit_line = (
+                f"<code>Last commit ({last_commit_sha}): "
+                f"{formatted_date}</code><br>\n"
             )
-        sections.append(
-            f"""
-<h2>Peer-Reviewed Articles</h2>
-<ol reversed>
-{"\n".join(article_items)}
-</ol>
-"""
+    else:
+        last_commit_line = ""
+
+    # Build documentation line
+    if not is_missing(documentation_url):
+        doc_line = f'Documentation: <a href="{documentation_url}">{documentation_url}</a><br>\n'
+    elif SHOW_MISSING_SOURCE_DATA:
+        doc_line = "Documentation: (no link)<br>\n"
+    else:
+        doc_line = ""
+
+    # # Build citation line (bibtex format)
+    # if not is_missing(citation):
+    #     citation_line = f"Citation:<br>\n<pre><code>{citation}</code></pre>\n"
+    # elif SHOW_MISSING_SOURCE_DATA:
+    #     citation_line = "Citation: (no citation)<br>\n"
+    # else:
+    #     citation_line = ""
+
+    # Build learn more line
+    # if learn_more:
+    #     learn_more_line = f"{learn_more}<br>\n"
+    # else:
+    #     learn_more_line = ""
+
+    # Entries served from an expired cache entry carry their age until
+    # the background refresh re-renders the section
+    if gh_info["stale"] and gh_info["from_cache"]:
+        software_str = f'<li data-cache-age-minutes="{gh_info["cache_age_minutes"]:.0f}">\n'
+    else:
+        software_str = "<li>\n"
+    software_str += f'{package_html} | {description}. Developed by {team}. <a href="{github_url}">{github_url}</a><br>\n'
+    # {doc_line}
+    software_str += f"{language_html} {license_html} {github_html}<br>\n"
+    software_str += f"{last_commit_line}"
+    software_str += "</li>"
+
+    return software_str.replace("..", ".")
+
+def build_software_section(software, gh_infos):
+    """Build the software section with H3 subsections for each status."""
+    sw_by_status = {}
+    for sw, gh_info in zip(software, gh_infos):
+        status = sw.get("status", "Other")
+        sw_by_status.setdefault(status, []).append(render_software_item(sw, gh_info))
+
+    software_html = "\n<h2>Scientific Software</h2>\n"
+
+    # Output in defined order, then any remaining statuses
+    all_statuses = SOFTWARE_STATUS_ORDER + [
+        s for s in sw_by_status.keys() if s not in SOFTWARE_STATUS_ORDER
+    ]
+
+    for status in all_statuses:
+        if status in sw_by_status and sw_by_status[status]:
+            software_html += f"<h3>{status}</h3>\n"
+            software_html += "<ol reversed>\n"
+            software_html += "\n".join(sw_by_status[status])
+            software_html += "\n</ol>\n"
+
+    return software_html
+
+
+# ---------------------------------------------------------------------------
+# CV sections. Each spec in CV_SECTIONS names the YAML keys it reads and how
+# its entries render through the macros in templates/cv_sections.html:
+#
+#   name         id used by the fragment cache
+#   keys         YAML keys read; entries come from the first unless
+#                "entries" builds them from all the keys' values
+#   title, level heading text and level (default 2)
+#   layout       "ol" (default), "ul", "year-list", "inline" or "p"
+#   item         item macro rendering one entry
+#   sort_key     optional sort for the entries, with "reverse"
+#   group_by     optional function assigning each entry to one of "groups",
+#                each with its own title, layout and item macro
+#   subsections  child specs rendered under one heading
+#   macro        a macro rendering the whole section from its inputs
+#   render       a Python function doing the same, for sections that
+#                need more than a template (software)
+#
+# Adding a section means adding a spec here and, usually, an item macro.
+# ---------------------------------------------------------------------------
+
+SECTION_TEMPLATE = Path(__file__).resolve().parent.parent / "templates" / "cv_sections.html"
+
+_section_macros = None
+
+
+def _clean_filter(value):
+    """clean_text for template values; missing fields render as ""."""
+    from jinja2 import Undefined
+
+    return clean_text("" if isinstance(value, Undefined) else value)
+
+
+def get_section_macros():
+    """Compile templates/cv_sections.html once and return its macros."""
+    global _section_macros
+    if _section_macros is None:
+        from jinja2 import Environment, FileSystemLoader
+
+        env = Environment(
+            loader=FileSystemLoader(SECTION_TEMPLATE.parent),
+            autoescape=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
         )
-
-    # Chapters
-    if data.get("chapters"):
-        chap_items = []
-        for chap in data["chapters"]:
-            oa_link = (
-                f' <a href="{chap.get("oa", "")}">[open access]</a>'
-                if chap.get("oa")
-                else ""
-            )
-            chap_items.append(
-                f'<li>{clean_text(chap.get("authors", ""))}. {chap.get("year", "")}. '
-                f'"{clean_text(chap.get("title", ""))}." '
-                f'In {clean_text(chap.get("editors", ""))} (Eds.), '
-                f'<em>{clean_text(chap.get("book", ""))}</em>. '
-                f'{clean_text(chap.get("press", ""))}: {clean_text(chap.get("city", ""))}.{oa_link}</li>'
-            )
-        sections.append(
-            f"""
-<h2>Book Chapters</h2>
-<ol reversed>
-{"\n".join(chap_items)}
-</ol>
-"""
+        env.filters["clean"] = _clean_filter
+        env.filters["md_links"] = md_links_to_html
+        env.globals.update(
+            ws=LEADING_WS,
+            format_pages=format_pages,
+            format_volume_issue=format_volume_issue,
         )
+        _section_macros = env.get_template(SECTION_TEMPLATE.name).module
+    return _section_macros
 
-    # Special Issues
-    if data.get("issues"):
-        issue_items = []
-        for iss in data["issues"]:
-            issue_items.append(
-                f'<li>{clean_text(iss.get("editors", ""))} (Eds.). {iss.get("year", "")}. '
-                f'"{clean_text(iss.get("theme", ""))}." '
-                f'<em>{clean_text(iss.get("journal", ""))}</em>.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Edited Special Issues</h2>
-<ol reversed>
-{"\n".join(issue_items)}
-</ol>
-"""
-        )
 
-    # Reports
-    if data.get("reports"):
-        report_items = []
-        for rep in data["reports"]:
-            report_items.append(
-                f'<li>{clean_text(rep.get("authors", ""))}. {rep.get("year", "")}. '
-                f'"{clean_text(rep.get("report", ""))}." '
-                f'{clean_text(rep.get("client", ""))}.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Research Reports</h2>
-<ol reversed>
-{"\n".join(report_items)}
-</ol>
-"""
-        )
+def manuscript_entries(data):
+    """Article then book manuscripts, tagged with their kind."""
+    entries = [dict(ms, kind="article") for ms in data.get("article-manuscripts") or []]
+    entries += [dict(ms, kind="book") for ms in data.get("book-manuscripts") or []]
+    return entries
 
-    # Publication Supplements and Replication Kits
-    if data.get("publication_supplements_and_replication_kits"):
-        supp_items = []
-        for item in data["publication_supplements_and_replication_kits"]:
-            supp_items.append(f"<li>{clean_text(item)}</li>")
-        sections.append(
-            f"""
-<h2>Replication Kits & Supplements</h2>
-<ol reversed>
-{chr(10).join(supp_items)}
-</ol>
-"""
-        )
 
-    # Manuscripts in Progress
-    manuscripts = []
-    if data.get("article-manuscripts"):
-        for ms in data["article-manuscripts"]:
-            manuscripts.append(
-                f'<li>{clean_text(ms.get("authors", ""))}. '
-                f'"{clean_text(ms.get("title", ""))}." '
-                f'{ms.get("status", "In Progress")}.</li>'
-            )
-    if data.get("book-manuscripts"):
-        for ms in data["book-manuscripts"]:
-            manuscripts.append(
-                f'<li>{clean_text(ms.get("authors", ""))}. '
-                f'<em>{clean_text(ms.get("title", ""))}</em>. '
-                f'{ms.get("status", "In Progress")}.</li>'
-            )
-    if manuscripts:
-        sections.append(
-            f"""
-<h2>Manuscripts in Progress</h2>
-<ol reversed>
-{"\n".join(manuscripts)}
-</ol>
-"""
-        )
+def supervision_status(student):
+    """Return "Completed" when a student's status is a year, otherwise "Active"."""
+    status_val = student.get("status", "")
+    is_completed = isinstance(status_val, int) or (
+        isinstance(status_val, str) and status_val.isdigit()
+    )
+    return "Completed" if is_completed else "Active"
 
-    # Miscellaneous Publications
-    if data.get("misc"):
-        misc_items = []
-        for m in data["misc"]:
-            misc_items.append(
-                f'<li>{clean_text(m.get("authors", ""))}. {m.get("year", "")}. '
-                f'"{clean_text(m.get("title", ""))}." '
-                f'{clean_text(m.get("details", ""))}</li>'
-            )
-        sections.append(
-            f"""
-<h2>Other Publications</h2>
-<ol reversed>
-{"\n".join(misc_items)}
-</ol>
-"""
-        )
 
-    # Grants
-    if data.get("grants"):
-        grant_items = []
-        for g in data["grants"]:
-            years = str(g.get("years", "")).replace("--", " to ")
-            grant_string = f'<li>{clean_text(g.get("title", ""))}<br>'
-            grant_string += f'{clean_text(g.get("pi", ""))} (PI). {years}. {clean_text(g.get("grant", ""))}. {g.get("amount", "")}<br>'
-
-            if g.get("ci"):
-                grant_string += f"CI: {g.get("ci")}.<br>"
-            if g.get("collaborators"):
-                grant_string += f"CO: {g.get("collaborators")}."
-            grant_string += "</li>"
-
-            grant_items.append(grant_string)
-        sections.append(
-            f"""
-<h2>Research Grants</h2>
-<ol reversed>
-{"\n".join(grant_items)}
-</ol>
-"""
-        )
+def _term_order(offering):
+    """Sort key for offerings: numeric term code, unparseable codes last."""
+    try:
+        return (0, float(offering.get("term-code")))
+    except (TypeError, ValueError):
+        return (1, 0.0)
 
-    # Teaching Grants
-    if data.get("teachinggrants"):
-        tg_items = []
-        for tg in data["teachinggrants"]:
-            years = str(tg.get("years", "")).replace("--", " to ")
-            tg_items.append(
-                f'<li>{years}. "{clean_text(tg.get("title", ""))}." '
-                f'{clean_text(tg.get("grant", ""))}. {tg.get("amount", "")}.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Teaching Grants</h2>
-<ol reversed>
-{"\n".join(tg_items)}
-</ol>
-"""
-        )
 
-    # Awards
-    if data.get("awards"):
-        award_items = []
-        for a in data["awards"]:
-            org = clean_text(a.get("organization", ""))
-            org = md_links_to_html(org)
+def _enrollment(offering):
+    """An offering's enrollment as an int; blank (not yet known) counts as 0."""
+    value = offering.get("enrollment")
+    if value is None or value != value:  # None or NaN
+        return 0
+    return int(value)
 
-            award = clean_text(a.get("award", ""))
-            award = md_links_to_html(award)
 
-            award_items.append(
-                f'<li>{a.get("year", "")}. {award}.<br>'
-                f'{org} {a.get("amount", "")}</li>'.replace("--", " to ")
-            )
-        sections.append(
-            f"""
-<h2>Awards and Scholarships</h2>
-<ol reversed>
-{"\n".join(award_items)}
-</ol>
-"""
+def teaching_summaries(courses, teaching):
+    """
+    One summary per course id, in id order: course number and name, total
+    enrollment, and the offerings' semesters sorted by term code.
+    """
+    catalogue = {course.get("id"): course for course in courses}
+    offerings_by_id = {}
+    for offering in teaching:
+        if offering.get("id") is not None:
+            offerings_by_id.setdefault(offering["id"], []).append(offering)
+
+    summaries = []
+    for course_id in sorted(offerings_by_id):
+        offerings = sorted(offerings_by_id[course_id], key=_term_order)
+        course = catalogue.get(course_id, {})
+        summaries.append(
+            {
+                "number": course.get("number", course_id),
+                "name": course.get("name", ""),
+                "enrollment": sum(_enrollment(o) for o in offerings),
+                "offerings": [o.get("semester-year") for o in offerings],
+            }
         )
+    return summaries
 
-    # Contracts
-    if data.get("contracts"):
-        contract_items = []
-        for c in data["contracts"]:
-            years = str(c.get("years", "")).replace("--", " to ")
-            org = md_links_to_html(clean_text(c.get("organization", "")))
-            contract_items.append(
-                f'<li>{c.get("contracted", "")}. {years}. "{clean_text(c.get("title", ""))}." '
-                f"{org}.</li>"
-            )
-        sections.append(
-            f"""
-<h2>Research Contracts</h2>
-<ol reversed>
-{"\n".join(contract_items)}
-</ol>
-"""
-        )
 
-    # License badge mapping
-    LICENSE_BADGES = {
-        "MIT License": "https://img.shields.io/badge/License-MIT-yellow.svg",
-        "MIT": "https://img.shields.io/badge/License-MIT-yellow.svg",
-        "GNU GPL2": "https://img.shields.io/badge/License-GPL_v2-blue.svg",
-        "GNU GPL3": "https://img.shields.io/badge/License-GPLv3-blue.svg",
-        "Apache 2.0": "https://img.shields.io/badge/License-Apache_2.0-yellowgreen.svg",
-        "BSD 3-Clause": "https://img.shields.io/badge/License-BSD_3--Clause-orange.svg",
-    }
+def course_entries(data):
+    """
+    Per-course summaries of teaching offerings, from records/teaching.yml
+    when it exists, otherwise from the courses and teaching lists in cv.md.
+    """
+    teaching_data = data.get("teaching_file") or data
+    if not teaching_data.get("teaching"):
+        return []
+    return teaching_summaries(
+        teaching_data.get("courses") or [], teaching_data.get("teaching") or []
+    )
 
-    # GitHub badge
-    GITHUB_BADGE = "https://img.shields.io/badge/github-%23121011.svg?style=flat&logo=github&logoColor=white"
-    # Language and tool badges
-    LANGUAGE_BADGES = {
-        # Languages
-        "Python": "https://img.shields.io/badge/python-3670A0?style=flat&logo=python&logoColor=ffdd54",
-        "R": "https://img.shields.io/badge/r-%23276DC3.svg?style=flat&logo=r&logoColor=white",
-        "Julia": "https://img.shields.io/badge/-Julia-9558B2?style=flat&logo=julia&logoColor=white",
-        "Bash": "https://img.shields.io/badge/bash-%23121011.svg?style=flat&logo=gnu-bash&logoColor=white",
-        "Shell": "https://img.shields.io/badge/shell-%23121011.svg?style=flat&logo=gnu-bash&logoColor=white",
-        # ML/NLP tools
-        "HuggingFace": "https://img.shields.io/badge/HuggingFace-%23FFD21E.svg?style=flat&logo=huggingface&logoColor=black",
-        "Transformers": "https://img.shields.io/badge/Transformers-%23FFD21E.svg?style=flat&logo=huggingface&logoColor=black",
-        "spaCy": "https://img.shields.io/badge/spaCy-09A3D5?style=flat&logo=spacy&logoColor=white",
-        # Network analysis
-        "graph-tool": "https://img.shields.io/badge/graph--tool-7B68EE?style=flat",
-        # Bibliometric databases
-        "OpenAlex": "https://img.shields.io/badge/OpenAlex-A6CE39?style=flat",
-        "Web of Science": "https://img.shields.io/badge/Web_of_Science-5C5C5C?style=flat",
-        "Scopus": "https://img.shields.io/badge/Scopus-E9711C?style=flat",
-    }
 
-    # Software
-    if data.get("software"):
-        # Group software by status
-        sw_by_status = {}
-        # Define the order of status groups
-        status_order = [
-            "Active Development",
-            "Maintained, Occasional Updates",
-            "Archived",
-        ]
+def render_software(data):
+    """Software, grouped by status, with GitHub metadata."""
+    return build_software_section(data["software"], data["github"])
+
+
+SUPERVISION_GROUPS = {
+    "phd": [
+        {"title": "Active", "layout": "p", "item": "phd_active"},
+        {"title": "Completed", "layout": "ol", "item": "phd_completed"},
+    ],
+    "masters": [
+        {"title": "Active", "layout": "p", "item": "masters_active"},
+        {"title": "Completed", "layout": "ol", "item": "masters_completed"},
+    ],
+}
+
+# Sections in page order
+CV_SECTIONS = [
+    {"name": "contact", "keys": ("address", "email", "phone", "urls"), "macro": "contact"},
+    {"name": "areas", "keys": ("areas",), "title": "Research Areas", "layout": "inline"},
+    {
+        "name": "education",
+        "keys": ("education",),
+        "title": "Education",
+        "layout": "p",
+        "item": "education",
+    },
+    {
+        "name": "appointments",
+        "keys": ("appointments",),
+        "title": "Academic Appointments",
+        "layout": "p",
+        "item": "appointment",
+    },
+    {
+        "name": "leaves",
+        "keys": ("leaves",),
+        "title": "Leaves",
+        "level": 3,
+        "layout": "p",
+        "item": "leave",
+    },
+    {
+        "name": "affiliations",
+        "keys": ("affiliations",),
+        "title": "Affiliations",
+        "level": 3,
+        "layout": "p",
+        "item": "affiliation",
+    },
+    {"name": "books", "keys": ("books",), "title": "Books", "item": "book"},
+    {
+        "name": "articles",
+        "keys": ("articles",),
+        "title": "Peer-Reviewed Articles",
+        "item": "article",
+    },
+    {"name": "chapters", "keys": ("chapters",), "title": "Book Chapters", "item": "chapter"},
+    {
+        "name": "issues",
+        "keys": ("issues",),
+        "title": "Edited Special Issues",
+        "item": "special_issue",
+    },
+    {"name": "reports", "keys": ("reports",), "title": "Research Reports", "item": "report"},
+    {
+        "name": "supplements",
+        "keys": ("publication_supplements_and_replication_kits",),
+        "title": "Replication Kits & Supplements",
+        "item": "supplement",
+    },
+    {
+        "name": "manuscripts",
+        "keys": ("article-manuscripts", "book-manuscripts"),
+        "entries": manuscript_entries,
+        "title": "Manuscripts in Progress",
+        "item": "manuscript",
+    },
+    {"name": "misc", "keys": ("misc",), "title": "Other Publications", "item": "misc"},
+    {"name": "grants", "keys": ("grants",), "title": "Research Grants", "item": "grant"},
+    {
+        "name": "teaching_grants",
+        "keys": ("teachinggrants",),
+        "title": "Teaching Grants",
+        "item": "teaching_grant",
+    },
+    {"name": "awards", "keys": ("awards",), "title": "Awards and Scholarships", "item": "award"},
+    {
+        "name": "contracts",
+        "keys": ("contracts",),
+        "title": "Research Contracts",
+        "item": "contract",
+    },
+    {"name": "software", "keys": ("software",), "render": render_software},
+    {
+        "name": "conferences",
+        "keys": ("conferences",),
+        "title": "Conference Presentations",
+        "item": "talk",
+        "sort_key": lambda c: str(c.get("year", "")),
+        "reverse": True,
+    },
+    {
+        "name": "invited",
+        "keys": ("invited",),
+        "title": "Invited Talks",
+        "item": "invited_talk",
+        "sort_key": lambda i: str(i.get("year", "")),
+        "reverse": True,
+    },
+    {
+        "name": "courses",
+        "keys": ("teaching_file", "courses", "teaching"),
+        "entries": course_entries,
+        "title": "Courses Taught",
+        "layout": "p",
+        "item": "course",
+    },
+    {
+        "name": "reading",
+        "keys": ("reading",),
+        "title": "Directed Reading Courses",
+        "item": "reading_course",
+    },
+    {
+        "name": "phd",
+        "keys": ("phd",),
+        "title": "PhD Students",
+        "group_by": supervision_status,
+        "groups": SUPERVISION_GROUPS["phd"],
+    },
+    {
+        "name": "masters",
+        "keys": ("masters",),
+        "title": "Masters Students",
+        "group_by": supervision_status,
+        "groups": SUPERVISION_GROUPS["masters"],
+    },
+    {"name": "hqp", "keys": ("hqp",), "title": "Research Assistants (HQP)", "item": "hqp"},
+    {
+        "name": "othergrad",
+        "keys": ("othergrad",),
+        "title": "Methods & Scientific Computing Workshops",
+        "item": "workshop",
+    },
+    {
+        "name": "undergraduate",
+        "keys": ("undergraduate",),
+        "title": "Undergraduate Thesis Supervision",
+        "item": "undergraduate",
+    },
+    {
+        "name": "profession",
+        "keys": ("profession",),
+        "title": "Professional Service",
+        "layout": "year-list",
+        "item": "service_role",
+    },
+    {
+        "name": "sessions",
+        "keys": ("sessions",),
+        "title": "Conference Sessions Organized",
+        "layout": "year-list",
+        "item": "session",
+    },
+    {
+        "name": "peer_review",
+        "keys": ("prarticles", "prbooks", "prgrants"),
+        "title": "Peer Review",
+        "subsections": [
+            {
+                "keys": ("prarticles",),
+                "title": "Peer Reviewing - Academic Journals",
+                "layout": "ul",
+                "item": "reviewed_journal",
+            },
+            {
+                "keys": ("prbooks",),
+                "title": "Peer Reviewing - Books",
+                "layout": "ul",
+                "item": "reviewed_book",
+            },
+            {
+                "keys": ("prgrants",),
+                "title": "Peer Reviewing / Evaluation - Grants",
+                "layout": "year-list",
+                "item": "reviewed_grant",
+            },
+        ],
+    },
+    {
+        "name": "university_service",
+        "keys": ("smemorial", "suwaterloo", "mcmaster"),
+        "title": "University Service",
+        "subsections": [
+            {
+                "keys": ("smemorial",),
+                "title": "Memorial University",
+                "layout": "year-list",
+                "item": "service_role",
+            },
+            {
+                "keys": ("suwaterloo",),
+                "title": "University of Waterloo",
+                "layout": "year-list",
+                "item": "service_role",
+            },
+            {
+                "keys": ("mcmaster",),
+                "title": "McMaster University",
+                "layout": "year-list",
+                "item": "service_role",
+            },
+        ],
+    },
+    {
+        "name": "training",
+        "keys": ("training",),
+        "title": "Professional Development",
+        "layout": "year-list",
+        "item": "training",
+    },
+    {
+        "name": "rata",
+        "keys": ("rata",),
+        "title": "Research and Teaching Assistantships",
+        "layout": "year-list",
+        "item": "assistantship",
+    },
+    {
+        "name": "memberships",
+        "keys": ("memberships",),
+        "title": "Professional Memberships",
+        "layout": "inline",
+    },
+]
+
+
+def render_cv_section(spec, inputs):
+    """
+    Render one section spec (see CV_SECTIONS) from its inputs. Returns the
+    section's HTML, or None when it has no entries.
+    """
+    if "render" in spec:
+        return spec["render"](inputs) if inputs.get(spec["keys"][0]) else None
+
+    macros = get_section_macros()
+    if "macro" in spec:
+        return getattr(macros, spec["macro"])(inputs)
+
+    if "subsections" in spec:
+        parts = [render_cv_section(dict(child, level=3), inputs) for child in spec["subsections"]]
+        parts = [part for part in parts if part]
+        return macros.subsections(dict({"level": 2}, **spec), parts) if parts else None
+
+    if "entries" in spec:
+        entries = spec["entries"](inputs)
+    else:
+        entries = inputs.get(spec["keys"][0])
+    if not entries:
+        return None
+    if "sort_key" in spec:
+        entries = sorted(entries, key=spec["sort_key"], reverse=spec.get("reverse", False))
+
+    spec = dict({"level": 2, "layout": "ol"}, **spec)
+    if "group_by" in spec:
+        groups = []
+        for group in spec["groups"]:
+            members = [e for e in entries if spec["group_by"](e) == group["title"]]
+            if members:
+                groups.append(dict(group, entries=members, item=getattr(macros, group["item"])))
+        return macros.grouped_section(spec, groups)
+
+    item = getattr(macros, spec["item"]) if "item" in spec else None
+    return macros.section(spec, entries, item)
+
+
+def load_section_cache():
+    """Load rendered section fragments from SECTION_CACHE_FILE."""
+    if SECTION_CACHE_FILE.exists():
+        try:
+            with open(SECTION_CACHE_FILE) as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+    return {}
 
-        print("\nFetching GitHub info for software packages...")
 
-        # Check and display rate limit status
-        remaining, limit = check_rate_limit()
-        has_token = os.environ.get("GITHUB_TOKEN") is not None
-        auth_status = (
-            "(authenticated)"
-            if has_token
-            else "(unauthenticated - set GITHUB_TOKEN for higher limits)"
-        )
-        if remaining is not None:
-            print(f"  GitHub API: {remaining}/{limit} requests remaining {auth_status}")
-        else:
-            print(f"  GitHub API: Could not check rate limit {auth_status}")
-
-        for sw in data["software"]:
-            package = clean_text(sw.get("package", ""))
-            language = sw.get("language", "")
-            status = sw.get("status", "Other")
-            description = clean_text(sw.get("description", ""))
-            license_text = sw.get("license", "")
-            github_url = sw.get("github", "")
-            team = clean_text(sw.get("development", ""))
-            documentation_url = sw.get("documentation", "")
-            citation = sw.get("citation", "")
-            learn_more = clean_text(sw.get("learn-more", ""))
-
-            # Fetch GitHub info (version, commit, and more)
-            print(f"  → {package}...")
-            gh_info = fetch_github_info(github_url, sw)
-
-            # All available variables from GitHub API / cache:
-            version = gh_info["version"]
-            last_commit_date = gh_info["last_commit_date"]
-            last_commit_sha = gh_info["last_commit_sha"]
-
-            # Get language badge
-            language_badge = LANGUAGE_BADGES.get(language)
-            if language_badge:
-                language_html = f'<img src="{language_badge}" alt="{language}">'
-            else:
-                language_html = ""
+def save_section_cache(cache):
+    """Save rendered section fragments to SECTION_CACHE_FILE."""
+    SECTION_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(SECTION_CACHE_FILE, "w") as f:
+        json.dump(cache, f, sort_keys=True)
 
-            badge_url = LICENSE_BADGES.get(license_text)
-            if badge_url:
-                license_html = f'<img src="{badge_url}" alt="{license_text}">'
-            else:
-                license_html = license_text
-
-            # Helper to check if a value is a placeholder/missing
-            def is_missing(val):
-                if not val:
-                    return True
-                missing_markers = [
-                    "XX.XX",
-                    "XXXX-XX-XX",
-                    "XXXXXXX",
-                    "add documentation website here",
-                    "add citation here",
-                ]
-                return str(val).strip() in missing_markers
-
-            # GitHub badge with link
-            if github_url:
-                github_html = (
-                    f'<a href="{github_url}">'
-                    f'<img src="{GITHUB_BADGE}" alt="GitHub"></a>'
-                )
-                # Package name links to GitHub, include version if available
-                if is_missing(version) and not SHOW_MISSING_SOURCE_DATA:
-                    package_html = (
-                        f'<a href="{github_url}"><strong>{package}</strong></a>'
-                    )
-                else:
-                    package_html = (
-                        f'<a href="{github_url}"><strong>{package}</strong></a> '
-                        f"(v{version})"
-                    )
-            else:
-                github_html = ""
-                package_html = f"<strong>{package}</strong>"
 
-            # Format date for display (e.g., "Feb 3, 2026")
-            formatted_date = format_date_long(last_commit_date)
+def section_hash(name, inputs):
+    """
+    Hash a section's inputs. The builder's source and section macros are
+    part of the key, so editing a renderer invalidates every cached fragment.
+    """
+    h = hashlib.sha256(_RENDERER_SOURCE_HASH.encode())
+    h.update(name.encode())
+    h.update(json.dumps(inputs, sort_keys=True, default=str).encode())
+    return h.hexdigest()
 
-            # Build last commit display, hide if missing
-            has_commit_info = not is_missing(last_commit_date) or not is_missing(
-                last_commit_sha
-            )
-            if has_commit_info or SHOW_MISSING_SOURCE_DATA:
-                if is_missing(last_commit_date) and is_missing(last_commit_sha):
-                    last_commit_line = "Last commit: (no data)<br>\n"
-                elif is_missing(last_commit_sha):
-                    last_commit_line = f"Last commit: {formatted_date}<br>\n"
-                elif is_missing(last_commit_date):
-                    last_commit_line = f"Last commit: (commit: {last_commit_sha})<br>\n"
-                else:
-                    last_commit_line = (
-                        f"<code>Last commit ({last_commit_sha}): "
-                        f"{formatted_date}</code><br>\n"
-                    )
-            else:
-                last_commit_line = ""
 
-            # Build documentation line
-            if not is_missing(documentation_url):
-                doc_line = f'Documentation: <a href="{documentation_url}">{documentation_url}</a><br>\n'
-            elif SHOW_MISSING_SOURCE_DATA:
-                doc_line = "Documentation: (no link)<br>\n"
-            else:
-                doc_line = ""
-
-            # # Build citation line (bibtex format)
-            # if not is_missing(citation):
-            #     citation_line = f"Citation:<br>\n<pre><code>{citation}</code></pre>\n"
-            # elif SHOW_MISSING_SOURCE_DATA:
-            #     citation_line = "Citation: (no citation)<br>\n"
-            # else:
-            #     citation_line = ""
-
-            # Build learn more line
-            # if learn_more:
-            #     learn_more_line = f"{learn_more}<br>\n"
-            # else:
-            #     learn_more_line = ""
-
-            software_str = "<li>\n"
-            software_str += f'{package_html} | {description}. Developed by {team}. <a href="{github_url}">{github_url}</a><br>\n'
-            # {doc_line}
-            software_str += f"{language_html} {license_html} {github_html}<br>\n"
-            software_str += f"{last_commit_line}"
-            software_str += "</li>"
-
-            # Add to appropriate status group
-            if status not in sw_by_status:
-                sw_by_status[status] = []
-            sw_by_status[status].append(software_str.replace("..", "."))
+def section_digest(spec, records, extra):
+    """
+    Hash of everything a section renders from: its records, identified by
+    CVRecords.fingerprint(), plus any extra inputs.
+    """
+    fingerprint = {key: records.fingerprint(key) for key in spec["keys"]}
+    fingerprint.update(extra)
+    return section_hash(spec["name"], fingerprint)
 
-        # Print summary
-        print(
-            f"\n  GitHub data: {_github_stats['fresh']} packages fetched fresh, "
-            f"{_github_stats['cached']} from cache"
-        )
 
-        # Build software section with H3 subsections for each status
-        software_html = "\n<h2>Scientific Software</h2>\n"
-
-        # Output in defined order, then any remaining statuses
-        all_statuses = status_order + [
-            s for s in sw_by_status.keys() if s not in status_order
-        ]
-
-        for status in all_statuses:
-            if status in sw_by_status and sw_by_status[status]:
-                software_html += f"<h3>{status}</h3>\n"
-                software_html += "<ol reversed>\n"
-                software_html += "\n".join(sw_by_status[status])
-                software_html += "\n</ol>\n"
-
-        sections.append(software_html)
-
-    # Conference Presentations
-    if data.get("conferences"):
-        conf_items = []
-        for c in sorted(
-            data["conferences"], key=lambda x: str(x.get("year", "")), reverse=True
-        ):
-            conf_items.append(
-                f'<li>{clean_text(c.get("authors", ""))}. {str(c.get("year", ""))[:7]}. '
-                f'"{clean_text(c.get("title", ""))}." '
-                f'{clean_text(c.get("conference", ""))}. {clean_text(c.get("location", ""))}.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Conference Presentations</h2>
-<ol reversed>
-{"\n".join(conf_items)}
-</ol>
-""".replace(
-                "..", "."
-            ).replace(
-                "?.", "?"
-            )
-        )
+def render_section(spec, records, extra, fragment_cache, stats=None, digest=None):
+    """
+    Render one section spec, reusing the cached fragment when its input hash is
+    unchanged; its records are only loaded when it has to be re-rendered.
+    fragment_cache is updated in place; stats, if given, counts "rendered"
+    and "cached" sections.
+    """
+    name = spec["name"]
+    if digest is None:
+        digest = section_digest(spec, records, extra)
+    cached = fragment_cache.get(name)
+    if cached and cached["hash"] == digest:
+        if stats is not None:
+            stats["cached"] += 1
+        return cached["html"]
+
+    inputs = {key: records.get(key) for key in spec["keys"]}
+    inputs.update(extra)
+    html = render_cv_section(spec, inputs)
+    fragment_cache[name] = {"hash": digest, "html": html}
+    if stats is not None:
+        stats["rendered"] += 1
+    return html
+
+
+def github_render_inputs(gh_infos):
+    """
+    GitHub info as the software section sees it: the cache age only matters,
+    in whole minutes, for stale entries, so it doesn't defeat the fragment
+    cache on every build.
+    """
+    inputs = []
+    for gh_info in gh_infos:
+        gh_info = dict(gh_info)
+        if gh_info["stale"] and gh_info["from_cache"]:
+            gh_info["cache_age_minutes"] = round(gh_info["cache_age_minutes"])
+        else:
+            gh_info["cache_age_minutes"] = 0
+        inputs.append(gh_info)
+    return inputs
 
-    # Invited Talks
-    if data.get("invited"):
-        inv_items = []
-        for i in sorted(
-            data["invited"], key=lambda x: str(x.get("year", "")), reverse=True
-        ):
-            inv_items.append(
-                f'<li>{clean_text(i.get("authors", ""))}. {str(i.get("year", ""))[:7]}. '
-                f'"{clean_text(i.get("title", ""))}." '
-                f'{clean_text(i.get("conference", ""))}. {clean_text(i.get("location", ""))}.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Invited Talks</h2>
-<ol reversed>
-{"\n".join(inv_items)}
-</ol>
-"""
-        )
 
-    # Courses Taught
-    teaching_file = base_dir / "records" / "teaching.yml"
-    if teaching_file.exists():
-        import pandas as pd
+def load_cv_records(base_dir):
+    """
+    CV data from records/cv.md and records/cv.d/, with records/teaching.yml
+    available as "teaching_file". See records_cache.CVRecords.
+    """
+    records_dir = base_dir / "records"
+    return records_cache.CVRecords(
+        records_dir / "cv.md",
+        records_dir / "cv.d",
+        extra_files={"teaching_file": records_dir / "teaching.yml"},
+        root=base_dir,
+    )
 
-        with open(teaching_file, "r") as f:
-            teaching_data = yaml.safe_load(f)
 
-        courses = teaching_data.get("courses", [])
-        df_courses = pd.DataFrame(courses)
-        teaching = teaching_data.get("teaching", [])
-        df_teaching = pd.DataFrame(teaching)
+def render_cv_page(sections_html: str, toc_entries) -> str:
+    """Render the CV page through the shared Jinja2 base template.
 
-        # Lookup dicts
-        lookup_course_id_to_number = dict(zip(df_courses["id"], df_courses["number"]))
-        lookup_course_id_to_name = dict(zip(df_courses["id"], df_courses["name"]))
+    Args:
+        sections_html: Pre-built HTML for all CV sections, with heading IDs
+            already added by ``TableOfContents``.
+        toc_entries: TOC entries for the sidebar, in page order.
 
-        course_strings = []
+    Returns:
+        The complete CV page as an HTML string.
+    """
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
 
-        # Group by 'id'
-        for course_id, group in df_teaching.groupby("id"):
-            # Sort by 'term-code'
-            group_sorted = group.sort_values(
-                by="term-code", key=lambda col: pd.to_numeric(col, errors="coerce")
-            )
-            # Sum total enrollment (treat NaN as 0)
-            total_enrollment = group_sorted["enrollment"].fillna(0).astype(int).sum()
-            # Create ordered list of semester-year values
-            semester_years = group_sorted["semester-year"].tolist()
-            offering_list = ", ".join(semester_years)
-            # Get course number and name
-            course_number = lookup_course_id_to_number.get(course_id, course_id)
-            course_name = lookup_course_id_to_name.get(course_id, "")
-
-            # Format string
-            section_string = (
-                f"<p>{course_number} | <strong>{course_name}</strong><br>\n"
-            )
-            if total_enrollment > 0:
-                section_string += (
-                    f"{LEADING_WS}{total_enrollment} total enrolments from "
-                    f"{len(semester_years)} sections:<br>\n"
-                    f"{LEADING_WS}{offering_list}\n"
-                ).replace("1 sections:", "1 section:")
-            else:
-                section_string += f"{LEADING_WS}Scheduled for {offering_list}\n"
-            section_string += "</p>\n"
+    templates_dir = Path(__file__).resolve().parent.parent / "templates"
+    env = Environment(
+        loader=FileSystemLoader(templates_dir),
+        autoescape=select_autoescape(["html", "xml"]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    env.globals["current_year"] = datetime.now().year
+    env.globals["asset"] = asset_url
+    template = env.get_template("cv.html")
+    return template.render(
+        base_path="",
+        title="CV",
+        active="cv",
+        toc_entries=toc_entries,
+        content=sections_html,
+    )
 
-            course_strings.append(section_string)
 
-        if course_strings:
-            sections.append(
-                f"""
-<h2>Courses Taught</h2>
-{chr(10).join(course_strings)}
-"""
-            )
+def write_cv_page(sections, output_file, output_lock=None):
+    """
+    Add heading IDs section by section, render the page and write it,
+    holding output_lock (if given) while it is pruned and written.
+    """
+    toc = TableOfContents()
+    sections_html = "".join(toc.add_section(section) for section in sections)
 
-    # Reading Courses
-    if data.get("reading"):
-        read_items = []
-        for r in data["reading"]:
-            who = f' ({clean_text(r.get("who", ""))})' if r.get("who") else ""
-            read_items.append(
-                f'<li>{r.get("year", "")}. {clean_text(r.get("name", ""))} ({r.get("level", "")}){who}.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Directed Reading Courses</h2>
-<ol reversed>
-{"\n".join(read_items)}
-</ol>
-"""
-        )
+    # Render through the shared site template so the CV picks up the
+    # redesigned header, footer, and styles.
+    html = render_cv_page(sections_html, toc.entries)
+
+    # The lock also covers pruning, so the stylesheet it writes isn't swept
+    # as unlinked before the page linking it exists
+    with output_lock or nullcontext():
+        html = prune_page_css(html, output_file)
+        output_file.write_text(minify_html(add_image_hints(html, output_file)))
+
+
+def revalidate_software_section(
+    records,
+    gh_infos,
+    stale,
+    sections,
+    software_index,
+    output_file,
+    prometheus_file=None,
+    output_lock=None,
+):
+    """
+    Refresh stale GitHub entries, then re-render only the software section.
+    Runs on a background thread after the CV has been written from cache;
+    the other sections are reused as already rendered.
+    """
+    software = records["software"]
+    print(f"\n[revalidate] Refreshing {len(stale)} stale GitHub entries...")
+    check_rate_limit()
+    for i in plan_github_refresh(software, stale):
+        sw = software[i]
+        print(f"  → {clean_text(sw.get('package', ''))}...")
+        gh_infos[i] = fetch_github_info(sw.get("github", ""), sw)
+
+    fragment_cache = load_section_cache()
+    extra = {"github": github_render_inputs(gh_infos)}
+    spec = next(spec for spec in CV_SECTIONS if spec["name"] == "software")
+    sections[software_index] = render_section(spec, records, extra, fragment_cache)
+    save_section_cache(fragment_cache)
+    write_cv_page(sections, output_file, output_lock)
+    print(f"[revalidate] GitHub HTTP: {get_github_client().summary()}")
+    print(f"[revalidate] Re-rendered software section → {output_file.name}")
+    write_github_telemetry(prometheus_file)
+
+
+def build_cv(
+    stale_while_revalidate=False,
+    offline=False,
+    prometheus_file=None,
+    use_section_cache=True,
+    output_lock=None,
+):
+    """
+    Build docs/cv.html from records/cv.md and records/cv.d/.
 
-    # PhD Supervision
-    if data.get("phd"):
-        phd_active = []
-        phd_completed = []
-        for p in data["phd"]:
-            status_val = p.get("status", "")
-            # Check if completed: status is a year (int or string that's a 4-digit number)
-            is_completed = isinstance(status_val, int) or (
-                isinstance(status_val, str) and status_val.isdigit()
-            )
-            role = (
-                "Supervisor"
-                if p.get("supervisor") == "John McLevey"
-                else "Committee Member"
-            )
-            if is_completed:
-                phd_completed.append(
-                    f"<li>{role} for "
-                    f'<strong>{clean_text(p.get("student", ""))} ({status_val})</strong><br>'
-                    f'{LEADING_WS}{clean_text(p.get("department", ""))}<br>'
-                    f'{LEADING_WS}Supervisor: {p.get("supervisor", "")}<br>'
-                    f'{LEADING_WS}Committee: {p.get("committee", "")}</li>'
-                )
-            else:
-                # Only show status if it's "ABD", otherwise hide it
-                status_str = " (ABD)" if status_val == "ABD" else ""
-                phd_active.append(
-                    f"<p>{role} for "
-                    f'<strong>{clean_text(p.get("student", ""))}{status_str}</strong><br>'
-                    f'{LEADING_WS}{clean_text(p.get("department", ""))}<br>'
-                    f'{LEADING_WS}Supervisor: {p.get("supervisor", "")}<br>'
-                    f'{LEADING_WS}Committee: {p.get("committee", "")}</p>'
-                )
-        phd_section = "\n<h2>PhD Students</h2>\n"
-        if phd_active:
-            phd_section += "<h3>Active</h3>\n"
-            phd_section += "\n".join(phd_active) + "\n"
-        if phd_completed:
-            phd_section += "<h3>Completed</h3>\n<ol reversed>\n"
-            phd_section += "\n".join(phd_completed)
-            phd_section += "\n</ol>\n"
-        sections.append(phd_section)
-
-    # Masters Supervision
-    if data.get("masters"):
-        ma_active = []
-        ma_completed = []
-        for m in data["masters"]:
-            status_val = m.get("status", "")
-            is_completed = isinstance(status_val, int) or (
-                isinstance(status_val, str) and status_val.isdigit()
-            )
-            if is_completed:
-                ma_completed.append(
-                    f'<li>{m.get("role", "")} for <strong>{clean_text(m.get("student", ""))} ({status_val})</strong><br>'
-                    f'{m.get("degree", "")}, {clean_text(m.get("department", ""))}.'
-                    "</li>"
-                )
-            else:
-                status_str = f" ({status_val})" if status_val else ""
-                ma_active.append(
-                    f'<p>{clean_text(m.get("student", ""))}{status_str}. '
-                    f'{m.get("degree", "")}, {clean_text(m.get("department", ""))}. '
-                    f'Role: {m.get("role", "")}</p>'
-                )
-        ma_section = "\n<h2>Masters Students</h2>\n"
-        if ma_active:
-            ma_section += "<h3>Active</h3>\n"
-            ma_section += "\n".join(ma_active) + "\n"
-        if ma_completed:
-            ma_section += "<h3>Completed</h3>\n<ol reversed>\n"
-            ma_section += "\n".join(ma_completed)
-            ma_section += "\n</ol>\n"
-        sections.append(ma_section)
-
-    # HQP
-    if data.get("hqp"):
-        hqp_items = []
-        for h in data["hqp"]:
-            gra = (
-                f' Graduate RAs: {clean_text(h.get("gra", ""))}.'
-                if h.get("gra")
-                else ""
-            )
-            ura = (
-                f' Undergraduate RAs: {clean_text(h.get("ura", ""))}.'
-                if h.get("ura")
-                else ""
-            )
-            hqp_items.append(f'<li>{h.get("year", "")}.{gra}{ura}</li>')
-        sections.append(
-            f"""
-<h2>Research Assistants (HQP)</h2>
-<ol reversed>
-{"\n".join(hqp_items)}
-</ol>
-"""
-        )
+    GitHub fetch telemetry is written to TELEMETRY_FILE at the end of the
+    build, and also as a Prometheus textfile when prometheus_file is set.
 
-    # Other Graduate Training
-    if data.get("othergrad"):
-        og_items = []
-        for og in data["othergrad"]:
-            og_items.append(
-                f'<li>{og.get("who", "")}. {og.get("year", "")}. <strong>{clean_text(og.get("training", ""))}</strong>. {clean_text(og.get("details", ""))}. {clean_text(og.get("length", ""))}.</li>'
-            )
-        sections.append(
-            f"""
-<h2>Methods & Scientific Computing Workshops</h2>
-<ol reversed>
-{"\n".join(og_items)}
-</ol>
-""".replace(
-                "..", "."
-            )
-        )
+    With offline=True GitHub data is served from the cache only and the
+    network is never touched.
 
-    # Undergraduate Supervision
-    if data.get("undergraduate"):
-        ug_items = []
-        for ug in data["undergraduate"]:
-            ug_items.append(
-                f'<li>{clean_text(ug.get("student", ""))} ({ug.get("year", "")})<br>{clean_text(ug.get("department", ""))}</li>'
-            )
-        sections.append(
-            f"""
-<h2>Undergraduate Thesis Supervision</h2>
-<ol reversed>
-{"\n".join(ug_items)}
-</ol>
-"""
-        )
+    With stale_while_revalidate=True the CV is rendered straight from the
+    GitHub cache, whatever its age, and stale entries are refreshed on a
+    background thread that re-renders the software section when done. The
+    thread is returned (None if nothing needed refreshing) so callers can
+    join it; it is non-daemon, so a script exit also waits for it. The
+    refresher holds output_lock while it rewrites docs/cv.html, so a caller
+    post-processing docs/ under the same lock never races it.
 
-    # Professional Service (year-marker format)
-    if data.get("profession"):
-        prof_items = []
-        for p in data["profession"]:
-            years = str(p.get("year", "")).replace("--", "-")
-            role = clean_text(p.get("role", ""))
-            prof_items.append(
-                f'<li><span class="year">{years}</span>'
-                f'<span class="content">{role}</span></li>'
-            )
-        sections.append(
-            f"""
-<h2>Professional Service</h2>
-<ul class="cv-year-list">
-{chr(10).join(prof_items)}
-</ul>
-"""
-        )
+    Only docs/cv.html is written: site-wide stages (asset manifest, fonts,
+    compression) are run by build_site.py.
 
-    # Sessions Organized (year-marker format)
-    if data.get("sessions"):
-        sess_items = []
-        for s in data["sessions"]:
-            year = s.get("year", "")
-            session = clean_text(s.get("session", ""))
-            panelists = (
-                f' Panelists: {clean_text(s.get("panelists", ""))}.'
-                if s.get("panelists")
-                else ""
-            )
-            sess_items.append(
-                f'<li><span class="year">{year}</span>'
-                f'<span class="content">{session}.{panelists}</span></li>'
-            )
-        sections.append(
-            f"""
-<h2>Conference Sessions Organized</h2>
-<ul class="cv-year-list">
-{chr(10).join(sess_items)}
-</ul>
-"""
-        )
+    Sections whose inputs are unchanged since the last build are served
+    from SECTION_CACHE_FILE; use_section_cache=False re-renders them all.
+    """
+    base_dir = Path(__file__).resolve().parent.parent
+    cv_file = base_dir / "records" / "cv.md"
+    output_file = base_dir / "docs" / "cv.html"
 
-    # Peer Review (separate subsections)
-    pr_section = ""
-    if data.get("prarticles"):
-        journals = [
-            f"<li><em>{clean_text(j.get('journal', ''))}</em></li>"
-            for j in data["prarticles"]
-        ]
-        pr_section += f"""
-<h3>Peer Reviewing - Academic Journals</h3>
-<ul>
-{chr(10).join(journals)}
-</ul>
-"""
-    if data.get("prbooks"):
-        books = [
-            f"<li>{clean_text(prb.get('book', ''))}</li>" for prb in data["prbooks"]
-        ]
-        pr_section += f"""
-<h3>Peer Reviewing - Books</h3>
-<ul>
-{chr(10).join(books)}
-</ul>
-"""
-    if data.get("prgrants"):
-        grant_items = []
-        for prg in data["prgrants"]:
-            year = prg.get("year", "")
-            grant = clean_text(prg.get("grant", ""))
-            grant_items.append(
-                f'<li><span class="year">{year}</span>'
-                f'<span class="content">{grant}</span></li>'
-            )
-        pr_section += f"""
-<h3>Peer Reviewing / Evaluation - Grants</h3>
-<ul class="cv-year-list">
-{chr(10).join(grant_items)}
-</ul>
-"""
-    if pr_section:
-        sections.append(f"\n<h2>Peer Review</h2>\n{pr_section}")
-
-    # University Service - Memorial (year-marker format)
-    if data.get("smemorial"):
-        mem_items = []
-        for mem in data["smemorial"]:
-            years = str(mem.get("year", "")).replace("--", "-")
-            role = clean_text(mem.get("role", ""))
-            mem_items.append(
-                f'<li><span class="year">{years}</span>'
-                f'<span class="content">{role}</span></li>'
-            )
-        sections.append(
-            f"""
-<h2>University Service</h2>
-<h3>Memorial University</h3>
-<ul class="cv-year-list">
-{chr(10).join(mem_items)}
-</ul>
-"""
-        )
+    print(f"Reading: {cv_file}")
+    data = load_cv_records(base_dir)
+    if records_cache.load_log:
+        _, load_ms, source = records_cache.load_log[-1]
+        print(f"  Loaded in {load_ms:.1f} ms ({source})")
+    split_files = [key for key in data.files if key != "teaching_file"]
+    if split_files:
+        print(f"  records/cv.d: {len(split_files)} files, parsed as their sections need them")
+
+    # Refresh the publication index the site pages render from
+    publications = load_publication_index(records=data, records_dir=base_dir / "records")
+    print(
+        f"  Publication index: {len(publications.entries)} entries, "
+        f"{len(publications.featured())} featured"
+    )
 
-    # University Service - Waterloo (year-marker format)
-    if data.get("suwaterloo"):
-        uw_items = []
-        for uw in data["suwaterloo"]:
-            years = str(uw.get("year", "")).replace("--", "-")
-            role = clean_text(uw.get("role", ""))
-            uw_items.append(
-                f'<li><span class="year">{years}</span>'
-                f'<span class="content">{role}</span></li>'
-            )
-        sections.append(
-            f"""
-<h3>University of Waterloo</h3>
-<ul class="cv-year-list">
-{chr(10).join(uw_items)}
-</ul>
-"""
-        )
+    # Software needs its GitHub data before the sections render
+    gh_infos = []
+    stale = []
+    if data.get("software"):
+        print("\nFetching GitHub info for software packages...")
+        if offline:
+            print("  GitHub API: offline, serving from cache only")
+        elif stale_while_revalidate:
+            print("  GitHub API: serving from cache, stale entries refresh in the background")
+        else:
+            print_rate_limit_status()
 
-    # University Service - McMaster (year-marker format)
-    if data.get("mcmaster"):
-        mc_items = []
-        for mc in data["mcmaster"]:
-            years = str(mc.get("year", "")).replace("--", "-")
-            role = clean_text(mc.get("role", ""))
-            mc_items.append(
-                f'<li><span class="year">{years}</span>'
-                f'<span class="content">{role}</span></li>'
-            )
-        sections.append(
-            f"""
-<h3>McMaster University</h3>
-<ul class="cv-year-list">
-{chr(10).join(mc_items)}
-</ul>
-"""
+        gh_infos, stale = fetch_software_info(
+            data["software"], allow_network=not (stale_while_revalidate or offline)
         )
+        if offline:
+            # Offline builds are reproducible: no time-dependent age markers
+            for gh_info in gh_infos:
+                gh_info["stale"] = False
 
-    # Professional Training (year-marker format)
-    if data.get("training"):
-        tr_items = []
-        for tr in data["training"]:
-            year = str(tr.get("year", "")).replace("--", "-")
-            training = clean_text(tr.get("training", ""))
-            tr_items.append(
-                f'<li><span class="year">{year}</span>'
-                f'<span class="content">{training}</span></li>'
-            )
-        sections.append(
-            f"""
-<h2>Professional Development</h2>
-<ul class="cv-year-list">
-{chr(10).join(tr_items)}
-</ul>
-"""
+        # Print summary
+        print(
+            f"\n  GitHub data: {_github_stats['fresh']} packages fetched fresh, "
+            f"{_github_stats['cached']} from cache"
         )
-
-    # RA/TA Experience (year-marker format)
-    if data.get("rata"):
-        rata_items = []
-        for r in data["rata"]:
-            year = str(r.get("year", "")).replace("--", "-")
-            position = clean_text(r.get("position", ""))
-            rata_items.append(
-                f'<li><span class="year">{year}</span>'
-                f'<span class="content">{position}</span></li>'
+        if _github_stats["deferred"]:
+            print(
+                f"  GitHub API budget: {_github_stats['deferred']} refreshes deferred "
+                f"to a later build (budget {get_github_client().budget.describe()})"
             )
-        sections.append(
-            f"""
-<h2>Research and Teaching Assistantships</h2>
-<ul class="cv-year-list">
-{chr(10).join(rata_items)}
-</ul>
-"""
+        print(f"  GitHub HTTP: {get_github_client().summary()}")
+
+    # Extra inputs beyond the section's YAML keys
+    extra_inputs = {"software": {"github": github_render_inputs(gh_infos)}}
+
+    # Build HTML sections, reusing fragments whose inputs are unchanged.
+    # The records files behind the sections that do need re-rendering are
+    # parsed up front, in parallel.
+    fragment_cache = load_section_cache() if use_section_cache else {}
+    digests = {
+        spec["name"]: section_digest(spec, data, extra_inputs.get(spec["name"], {}))
+        for spec in CV_SECTIONS
+    }
+    data.prefetch(
+        key
+        for spec in CV_SECTIONS
+        if fragment_cache.get(spec["name"], {}).get("hash") != digests[spec["name"]]
+        for key in spec["keys"]
+    )
+    stats = {"rendered": 0, "cached": 0}
+    sections = []
+    software_index = None
+    for spec in CV_SECTIONS:
+        extra = extra_inputs.get(spec["name"], {})
+        html = render_section(
+            spec, data, extra, fragment_cache, stats, digest=digests[spec["name"]]
         )
+        if html is None:
+            continue
+        if spec["name"] == "software":
+            software_index = len(sections)
+        sections.append(html)
+    save_section_cache(fragment_cache)
+
+    write_cv_page(sections, output_file, output_lock)
+    print(f"  → {output_file.relative_to(base_dir)}")
+    print(
+        f"\nBuilt CV with {len(sections)} sections "
+        f"({stats['rendered']} rendered, {stats['cached']} from the fragment cache)"
+    )
 
-    # Memberships
-    if data.get("memberships"):
-        sections.append(
-            f"""
-<h2>Professional Memberships</h2>
-<p>{clean_text(" ⋅ ".join(data["memberships"]))}</p>
-"""
-        )
+    if data.get("software") and not offline:
+        # Keep the committed cache small as the software list churns
+        cache = load_github_cache()
+        compacted, removed = compact_github_cache(cache, software_cache_keys(data["software"]))
+        if compacted != cache:
+            save_github_cache(compacted)
+            print(f"  GitHub cache compacted ({len(removed)} orphaned entries dropped)")
 
-    # Build sections content and add heading IDs
-    sections_html = add_heading_ids("".join(sections))
+    if data.get("software"):
+        write_github_telemetry(prometheus_file)
+        print(f"  GitHub telemetry → {TELEMETRY_FILE.relative_to(base_dir)}")
 
-    # Render through the shared site template so the CV picks up the
-    # redesigned header, footer, and styles.
-    html = render_cv_page(sections_html)
+    if not stale_while_revalidate or offline or not stale:
+        return None
 
-    output_file.write_text(html)
-    print(f"  → {output_file.relative_to(base_dir)}")
-    print(f"\nBuilt CV with {len(sections)} sections")
+    refresher = threading.Thread(
+        target=revalidate_software_section,
+        args=(data, gh_infos, stale, sections, software_index, output_file),
+        kwargs={"prometheus_file": prometheus_file, "output_lock": output_lock},
+        name="cv-revalidate",
+    )
+    refresher.start()
+    return refresher
 
 
 if __name__ == "__main__":
-    build_cv()
+    import argparse
+    import sys
+
+    if sys.argv[1:2] == ["cache"]:
+        cache_parser = argparse.ArgumentParser(
+            prog="build_cv.py cache", description="Inspect or compact records/github_cache.json"
+        )
+        cache_parser.add_argument("command", choices=["stats", "gc"])
+        cache_parser.add_argument("--dry-run", action="store_true", help="gc: report without writing")
+        cache_parser.add_argument("--cache-file", metavar="PATH", help="cache file to operate on")
+        cache_args = cache_parser.parse_args(sys.argv[2:])
+        if cache_args.cache_file:
+            CACHE_FILE = Path(cache_args.cache_file)
+        cache_command(cache_args.command, dry_run=cache_args.dry_run)
+        sys.exit(0)
+
+    if sys.argv[1:2] == ["check-clean-text"]:
+        strings, mismatches = check_clean_text(load_cv_records(Path(__file__).resolve().parent.parent))
+        for text in mismatches:
+            print(f"  ✗ {text!r}")
+            print(f"      clean_text: {clean_text(text)!r}")
+            print(f"      reference:  {_clean_text_reference(text)!r}")
+        print(f"clean_text: {len(strings) - len(mismatches)}/{len(strings)} record strings match the reference")
+        sys.exit(1 if mismatches else 0)
+
+    parser = argparse.ArgumentParser(description="Build docs/cv.html from records/cv.md")
+    parser.add_argument(
+        "--swr",
+        "--stale-while-revalidate",
+        dest="stale_while_revalidate",
+        action="store_true",
+        help="render from the GitHub cache immediately and refresh stale entries in the background",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="pipeline independent GitHub requests over one keep-alive connection",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="serve GitHub data from the cache only; never touch the network",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="save every raw GitHub response, with headers, to DIR",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="serve GitHub responses recorded in DIR from a local stand-in",
+    )
+    parser.add_argument(
+        "--replay-rate-limit",
+        metavar="N",
+        type=int,
+        help="make the --replay stand-in rate limit after N requests",
+    )
+    parser.add_argument(
+        "--prometheus",
+        metavar="PATH",
+        help="also write GitHub fetch telemetry as a Prometheus textfile",
+    )
+    parser.add_argument(
+        "--cache-file",
+        metavar="PATH",
+        help="GitHub cache to use instead of records/github_cache.json",
+    )
+    parser.add_argument(
+        "--no-section-cache",
+        action="store_true",
+        help="re-render every CV section instead of reusing unchanged fragments",
+    )
+    args = parser.parse_args()
+    if args.pipeline:
+        GITHUB_HTTP_PIPELINING = True
+    if args.record:
+        GITHUB_RECORD_DIR = Path(args.record)
+    if args.cache_file:
+        CACHE_FILE = Path(args.cache_file)
+    if args.replay:
+        from github_replay import start_replay_server
+
+        replay_server = start_replay_server(args.replay, rate_limit=args.replay_rate_limit)
+        os.environ["GITHUB_API_URL"] = replay_server.url
+        print(f"Replaying GitHub responses from {args.replay} at {replay_server.url}")
+    refresher = build_cv(
+        stale_while_revalidate=args.stale_while_revalidate,
+        offline=args.offline,
+        prometheus_file=args.prometheus,
+        use_section_cache=not args.no_section_cache,
+    )
+    if refresher is not None:
+        refresher.join()
@@ -10,6 +10,8 @@ CONTENT SOURCES:
     content/teaching/*.md    → docs/teaching/*.html (course pages)
     content/posts/*.qmd      → docs/blog/*.html (blog posts via Quarto)
     records/cv.md            → docs/cv.html (CV from YAML)
+    records/cv.md            → .build-cache/publications.json (publication index)
+    docs/images/*            → docs/images/derived/ (resized WebP + fallback, for images pages show)
 
 TEMPLATES:
     templates/base.html       - Common page structure
@@ -26,20 +28,20 @@ USAGE:
     pixi run build-pages     # Build static pages only
     pixi run build-blog      # Build blog only
     pixi run build-cv        # Build CV only
+    pixi run build-cv-swr    # Build CV from cache, refresh GitHub data in background
+                             # (the site is ready before the refresh; the command
+                             # exits once the refreshed CV has been written)
+    pixi run build-cv-offline # Build CV from cache without touching the network
 """
 
 import re
 import shutil
 import subprocess
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 
-try:
-    import yaml
-except ImportError:
-    print("Error: pyyaml not found. Run: pixi install")
-    exit(1)
-
 try:
     import markdown
 except ImportError:
@@ -52,6 +54,16 @@ except ImportError:
     print("Error: jinja2 not found. Run: pixi install")
     exit(1)
 
+import records_cache
+from assets import asset_url, fingerprint_references, report_assets, save_asset_manifest
+from css_prune import prune_page_css, remove_unlinked_css
+from highlight import HighlightExtension, save_highlight_cache, write_token_stylesheet
+from images import add_image_hints, build_images, image_variants
+from minify import minify_html, report_compression
+from page_weight import check_budgets
+from publications import load_publication_index
+from webfonts import self_host_fonts
+
 
 # ============================================================================
 # CONFIGURATION
@@ -72,24 +84,48 @@ env = Environment(
     lstrip_blocks=True,
 )
 env.globals["current_year"] = datetime.now().year
+env.globals["image_variants"] = image_variants
+env.globals["asset"] = asset_url
 
-# Markdown converter
-md_converter = markdown.Markdown(extensions=["fenced_code", "tables", "attr_list"])
+# Markdown converter; fenced code is highlighted at build time (see highlight.py)
+md_converter = markdown.Markdown(
+    extensions=[HighlightExtension(), "fenced_code", "tables", "attr_list"]
+)
+
+# Publication index, loaded on first use (see get_publications)
+_publications = None
+
+# Held while docs/ is post-processed, and by the CV's background refresher
+# while it rewrites docs/cv.html
+_output_lock = threading.Lock()
+
+# Pages older than this weren't written by this build, so budgets only warn
+# about them
+_build_started = time.time()
 
 
 # ============================================================================
 # UTILITIES
 # ============================================================================
 
-def parse_frontmatter(content: str) -> tuple[dict, str]:
-    """Extract YAML frontmatter and body from content."""
-    if content.startswith("---"):
-        parts = content.split("---", 2)
-        if len(parts) >= 3:
-            frontmatter = yaml.safe_load(parts[1])
-            body = parts[2].strip()
-            return frontmatter or {}, body
-    return {}, content
+def parse_frontmatter(content: str, cache_name: str = None) -> tuple[dict, str]:
+    """Extract YAML frontmatter and body from content.
+
+    With cache_name (the file's path relative to the repo root) the parsed
+    frontmatter is cached on disk; see records_cache.py.
+    """
+    frontmatter, body = records_cache.parse_frontmatter(content, cache_name)
+    if frontmatter is None:
+        return {}, body
+    return frontmatter or {}, body.strip()
+
+
+def get_publications():
+    """The publication index from the CV records, loaded once per build."""
+    global _publications
+    if _publications is None:
+        _publications = load_publication_index()
+    return _publications
 
 
 def format_date_display(date_str: str) -> str:
@@ -109,6 +145,19 @@ def format_date_display(date_str: str) -> str:
     return f"{parsed.strftime('%b')} {parsed.day}, {parsed.year}"
 
 
+def write_html(output_file: Path, html: str):
+    """
+    Write a rendered page, linking images by their fingerprinted names, the
+    stylesheet pruned to the page's rules, and adding image dimensions and
+    loading hints, then minify it.
+    """
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    html = fingerprint_references(html, output_file)
+    html = prune_page_css(html, output_file)
+    output_file.write_text(minify_html(add_image_hints(html, output_file)))
+    save_asset_manifest()
+
+
 def get_excerpt(html_content: str, max_length: int = 200) -> str:
     """Extract plain text excerpt from HTML."""
     text = re.sub(r"<[^>]+>", "", html_content)
@@ -125,7 +174,9 @@ def get_excerpt(html_content: str, max_length: int = 200) -> str:
 def build_page(content_file: Path, output_file: Path, base_path: str = ""):
     """Build a single page from markdown content."""
     content = content_file.read_text()
-    frontmatter, body = parse_frontmatter(content)
+    frontmatter, body = parse_frontmatter(
+        content, cache_name=content_file.relative_to(BASE_DIR).as_posix()
+    )
 
     template_name = frontmatter.get("template", "page") + ".html"
     template = env.get_template(template_name)
@@ -137,11 +188,11 @@ def build_page(content_file: Path, output_file: Path, base_path: str = ""):
     html = template.render(
         base_path=base_path,
         content=html_content,
+        publications=get_publications(),
         **frontmatter
     )
 
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(html)
+    write_html(output_file, html)
     return frontmatter
 
 
@@ -174,6 +225,8 @@ def build_static_pages():
             frontmatter = build_page(md_file, output_file, base_path="../")
             print(f"  → {output_file.relative_to(BASE_DIR)}")
 
+    save_highlight_cache()
+
 
 # ============================================================================
 # BLOG BUILDER
@@ -322,6 +375,7 @@ def build_blog():
         print("  No .qmd files found")
         return []
 
+    write_token_stylesheet()
     template = env.get_template("blog_post.html")
     posts = []
 
@@ -377,8 +431,7 @@ def build_blog():
         )
 
         output_file = OUTPUT_DIR / "blog" / f"{slug}.html"
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        output_file.write_text(html)
+        write_html(output_file, html)
         print(f"    → docs/blog/{slug}.html")
 
         posts.append({
@@ -393,6 +446,7 @@ def build_blog():
         cleanup_post_files(slug)
 
     cleanup_quarto_cache()
+    save_highlight_cache()
 
     # Sort by date
     posts.sort(key=lambda p: p["date"], reverse=True)
@@ -404,7 +458,7 @@ def build_blog():
         posts=posts,
         active="blog"
     )
-    (OUTPUT_DIR / "blog.html").write_text(html)
+    write_html(OUTPUT_DIR / "blog.html", html)
     print(f"  → docs/blog.html")
 
     return posts
@@ -417,7 +471,7 @@ def update_index_with_posts(posts: list):
 
     # Re-render index page with posts
     index_content = (CONTENT_DIR / "index.md").read_text()
-    frontmatter, body = parse_frontmatter(index_content)
+    frontmatter, body = parse_frontmatter(index_content, cache_name="content/index.md")
 
     template = env.get_template("index.html")
     md_converter.reset()
@@ -427,10 +481,11 @@ def update_index_with_posts(posts: list):
         base_path="",
         content=html_content,
         latest_posts=posts[:2],
+        publications=get_publications(),
         **frontmatter
     )
 
-    (OUTPUT_DIR / "index.html").write_text(html)
+    write_html(OUTPUT_DIR / "index.html", html)
     print("  Updated index.html with latest posts")
 
 
@@ -438,15 +493,43 @@ def update_index_with_posts(posts: list):
 # CV BUILDER (imports from existing build_cv.py)
 # ============================================================================
 
-def build_cv():
-    """Build CV from records/cv.md - delegates to existing script."""
+def build_cv(stale_while_revalidate=False, offline=False):
+    """
+    Build CV from records/cv.md - delegates to existing script. Returns the
+    background refresher thread in stale-while-revalidate mode, else None.
+    """
     print("Building CV...")
     # Import and run the existing CV builder
     import importlib.util
     spec = importlib.util.spec_from_file_location("build_cv", BASE_DIR / "scripts" / "build_cv.py")
     build_cv_module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(build_cv_module)
-    build_cv_module.build_cv()
+    return build_cv_module.build_cv(
+        stale_while_revalidate=stale_while_revalidate,
+        offline=offline,
+        output_lock=_output_lock,
+    )
+
+
+# ============================================================================
+# POST-PROCESSING
+# ============================================================================
+
+def post_process():
+    """
+    Site-wide stages run after pages are written: image derivatives (and
+    removing those no page links), removing pruned stylesheets no page
+    links, the asset manifest, self-hosted fonts and pre-compressed
+    siblings.
+    """
+    with _output_lock:
+        build_images()
+        removed = remove_unlinked_css()
+        if removed:
+            print(f"  Pruned CSS: {removed} unlinked files removed")
+        save_asset_manifest()
+        self_host_fonts()
+        report_compression()
 
 
 # ============================================================================
@@ -471,26 +554,56 @@ def build_all():
     build_cv()
     print()
 
+    print("Checking site assets...")
+    report_assets(verbose=False)
+    print()
+
+    post_process()
+    print()
+
+    print("Checking page weight...")
+    within_budget = check_budgets(since=_build_started)
+    print()
+
+    print(f"YAML: {records_cache.describe_load_stats()}")
     print("=" * 60)
     print("BUILD COMPLETE")
     print("=" * 60)
 
+    if not within_budget:
+        print("✗ Pages over budget or linking missing files (see budgets.yml)")
+        exit(1)
+
 
 if __name__ == "__main__":
     import sys
 
     if len(sys.argv) > 1:
         cmd = sys.argv[1]
+        refresher = None
         if cmd == "pages":
             build_static_pages()
         elif cmd == "blog":
             posts = build_blog()
             update_index_with_posts(posts)
         elif cmd == "cv":
-            build_cv()
+            refresher = build_cv(
+                stale_while_revalidate="--swr" in sys.argv[2:],
+                offline="--offline" in sys.argv[2:],
+            )
         else:
             print(f"Unknown command: {cmd}")
-            print("Usage: build_site.py [pages|blog|cv]")
+            print("Usage: build_site.py [pages|blog|cv [--swr] [--offline]]")
+            exit(1)
+        post_process()
+        if refresher is not None:
+            # docs/ is complete; let the background refresh land, then
+            # post-process the re-rendered CV
+            print("Site ready; waiting for the background GitHub refresh...")
+            refresher.join()
+            post_process()
+        if not check_budgets(since=_build_started):
+            print("✗ Pages over budget or linking missing files (see budgets.yml)")
             exit(1)
     else:
         build_all()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Per-page stylesheet pruning.
+
+Every page links the whole of docs/styles.css, including the CV TOC,
+lightbox and book-page rules that most pages never use. When a page is
+written, prune_page_css() replaces that link with a stylesheet holding only
+the rules whose selectors can match the page, written to
+docs/css/<name>.<hash>.css. Pages built from the same template usually
+prune to the same rules and so share one file. remove_unlinked_css(),
+run once the site is written, deletes the pruned files that no page in
+docs/ links any more.
+
+Matching is conservative: a selector is kept when every tag, class and id
+it names occurs somewhere in the page (pseudo-classes are ignored along
+with their arguments, e.g. :is(.a, .b), and attribute selectors always
+match). Selector lists split only on top-level commas. Classes that scripts add at runtime are
+picked up from string literals in inline scripts, plus SAFELIST. Pruned
+CSS is cached in .build-cache/css/ by (stylesheet hash, page token set).
+"""
+
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = BASE_DIR / "docs"
+PRUNED_DIR = OUTPUT_DIR / "css"
+CACHE_DIR = BASE_DIR / ".build-cache" / "css"
+
+# Pre-compressed siblings written by scripts/minify.py
+COMPRESSED_SUFFIXES = (".br", ".gz")
+
+# Classes added by external scripts, which the page scan can't see
+SAFELIST = set()
+
+# At-rules whose block holds rules to prune; other blocks are kept whole
+_GROUPING_AT_RULES = ("@media", "@supports")
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_TAG = re.compile(r"<([a-zA-Z][\w-]*)")
+_CLASS_ATTRIBUTE = re.compile(r"""\bclass\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE)
+_ID_ATTRIBUTE = re.compile(r"""\bid\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE)
+_SCRIPT = re.compile(r"<script\b[^>]*>(.*?)</script>", re.DOTALL | re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"""(["'])([\w\s-]+)\1""")
+_STYLESHEET_LINK = re.compile(
+    r"""<link\b[^>]*\brel\s*=\s*["']?stylesheet["']?[^>]*>""", re.IGNORECASE
+)
+_HREF = re.compile(r"""\bhref\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE)
+
+# One compound selector's requirements: .class, #id, or a leading tag name
+_SELECTOR_TOKEN = re.compile(r"([.#])(-?[_a-zA-Z][\w-]*)|^([a-zA-Z][\w-]*)")
+_PSEUDO = re.compile(r"::?[\w-]+")
+_COMBINATOR = re.compile(r"\s*[>+~]\s*|\s+")
+
+_parsed = {}
+_pruned = {}
+_lock = threading.Lock()
+
+
+def _unquote(value):
+    return value[1:-1] if value[:1] in "\"'" and value[-1:] == value[:1] else value
+
+
+def parse_stylesheet(css):
+    """
+    Split CSS into top-level items: ("rule", selectors, text),
+    ("group", prelude, [items]) for @media/@supports, or ("raw", text) for
+    anything kept as written (other at-rules, stray text).
+    """
+    css = _COMMENT.sub("", css)
+    items = []
+    pos = 0
+    while pos < len(css):
+        brace = css.find("{", pos)
+        semicolon = css.find(";", pos)
+        if brace == -1:
+            if css[pos:].strip():
+                items.append(("raw", css[pos:].strip()))
+            break
+        prelude = css[pos:brace].strip()
+        if prelude.startswith("@") and semicolon != -1 and semicolon < brace:
+            # Statement at-rule, e.g. @import or @charset
+            items.append(("raw", css[pos:semicolon + 1].strip()))
+            pos = semicolon + 1
+            continue
+
+        depth, end = 0, brace
+        while end < len(css):
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            end += 1
+        body = css[brace + 1:end]
+        if prelude.startswith(_GROUPING_AT_RULES):
+            items.append(("group", prelude, parse_stylesheet(body)))
+        elif prelude.startswith("@"):
+            items.append(("raw", f"{prelude} {{{body}}}"))
+        else:
+            selectors = split_selectors(prelude)
+            items.append(("rule", selectors, body.strip()))
+        pos = end + 1
+    return items
+
+
+def _scan(text):
+    """
+    (index, char, depth) for each character of text outside strings and
+    escapes, with depth counting the enclosing () and [] pairs.
+    """
+    depth, quote, i = 0, None, 0
+    while i < len(text):
+        char = text[i]
+        if char == "\\":
+            i += 2
+            continue
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        else:
+            if char in ")]":
+                depth = max(depth - 1, 0)
+            yield i, char, depth
+            if char in "([":
+                depth += 1
+        i += 1
+
+
+def split_selectors(prelude):
+    """
+    A rule's selector list, split on its top-level commas only (not those
+    in :is()/:where()/:not() arguments, attribute selectors or strings).
+    """
+    selectors, start = [], 0
+    for i, char, depth in _scan(prelude):
+        if char == "," and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return [s.strip() for s in selectors if s.strip()]
+
+
+def _strip_pseudo(selector):
+    """selector without its pseudo-classes and -elements, arguments included."""
+    out, pos = [], 0
+    for match in _PSEUDO.finditer(selector):
+        if match.start() < pos:
+            continue
+        out.append(selector[pos:match.start()])
+        pos = match.end()
+        if selector[pos:pos + 1] == "(":
+            for i, char, depth in _scan(selector[pos:]):
+                if char == ")" and depth == 0:
+                    pos += i + 1
+                    break
+            else:
+                pos = len(selector)
+    out.append(selector[pos:])
+    return "".join(out)
+
+
+def page_tokens(html):
+    """The tags, classes and ids a page uses, as one sorted token list."""
+    tags = {tag.lower() for tag in _TAG.findall(html)}
+    classes = set(SAFELIST)
+    for value in _CLASS_ATTRIBUTE.findall(html):
+        classes.update(_unquote(value).split())
+    for script in _SCRIPT.findall(html):
+        for _, literal in _STRING_LITERAL.findall(script):
+            classes.update(literal.split())
+    ids = {_unquote(value) for value in _ID_ATTRIBUTE.findall(html)}
+    return sorted({f"<{t}" for t in tags} | {f".{c}" for c in classes} | {f"#{i}" for i in ids})
+
+
+def selector_matches(selector, tokens):
+    """Whether every tag, class and id in selector occurs in the page."""
+    if "[" in selector:
+        return True
+    for compound in _COMBINATOR.split(_strip_pseudo(selector)):
+        for prefix, name, tag in _SELECTOR_TOKEN.findall(compound):
+            token = f"{prefix}{name}" if prefix else f"<{tag.lower()}"
+            if token not in tokens:
+                return False
+    return True
+
+
+def _prune_items(items, tokens):
+    out = []
+    for item in items:
+        if item[0] == "rule":
+            _, selectors, body = item
+            kept = [s for s in selectors if selector_matches(s, tokens)]
+            if kept:
+                out.append(f"{', '.join(kept)} {{ {body} }}")
+        elif item[0] == "group":
+            _, prelude, children = item
+            inner = _prune_items(children, tokens)
+            if inner:
+                out.append(f"{prelude} {{\n" + "\n".join(inner) + "\n}")
+        else:
+            out.append(item[1])
+    return out
+
+
+def prune_css(css, tokens):
+    """The rules of css that can match a page with the given tokens."""
+    css_hash = hashlib.sha256(css.encode()).hexdigest()
+    key = hashlib.sha256(f"{css_hash}\n{' '.join(tokens)}".encode()).hexdigest()[:32]
+    with _lock:
+        if key in _pruned:
+            return _pruned[key]
+    cache_file = CACHE_DIR / f"{key}.css"
+    try:
+        pruned = cache_file.read_text()
+    except OSError:
+        if css_hash not in _parsed:
+            _parsed[css_hash] = parse_stylesheet(css)
+        token_set = set(tokens)
+        pruned = "\n".join(_prune_items(_parsed[css_hash], token_set)) + "\n"
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(pruned)
+        except OSError as e:
+            print(f"  ⚠ Warning: could not cache pruned CSS: {e}")
+    with _lock:
+        _pruned[key] = pruned
+    return pruned
+
+
+def _write_pruned(files):
+    """Write pruned stylesheets (name → CSS) that don't exist yet."""
+    with _lock:
+        if files:
+            PRUNED_DIR.mkdir(parents=True, exist_ok=True)
+        for name, css in files.items():
+            if not (PRUNED_DIR / name).exists():
+                (PRUNED_DIR / name).write_text(css)
+
+
+def linked_css(output_dir=OUTPUT_DIR):
+    """Pruned stylesheets (names in PRUNED_DIR) linked by the pages in output_dir."""
+    linked = set()
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if not name.endswith(".html"):
+                continue
+            page_file = Path(root, name)
+            for link in _STYLESHEET_LINK.findall(page_file.read_text(errors="replace")):
+                href = _HREF.search(link)
+                if not href:
+                    continue
+                url = _unquote(href.group(1)).split("?")[0].split("#")[0]
+                target = Path(os.path.normpath(page_file.parent / url))
+                if target.parent == PRUNED_DIR:
+                    linked.add(target.name)
+    return linked
+
+
+def remove_unlinked_css(output_dir=OUTPUT_DIR):
+    """
+    Delete pruned stylesheets (and their compressed siblings) that no page
+    in output_dir links. Which files are linked is read from the pages
+    themselves, never from .build-cache, so a partial build or a fresh
+    clone keeps the stylesheets of pages it didn't rewrite. Call it once
+    every page is written; returns the number of files removed.
+    """
+    if not PRUNED_DIR.is_dir():
+        return 0
+    linked = linked_css(output_dir)
+    removed = 0
+    with _lock:
+        for path in PRUNED_DIR.iterdir():
+            name = path.name
+            for suffix in COMPRESSED_SUFFIXES:
+                name = name.removesuffix(suffix)
+            if name.endswith(".css") and name not in linked:
+                path.unlink()
+                removed += 1
+    return removed
+
+
+def prune_page_css(html, page_file):
+    """
+    Point a page's local stylesheet links at copies pruned to the rules the
+    page can use. Returns the rewritten HTML.
+    """
+    tokens = None
+    written = {}
+
+    def replace(match):
+        nonlocal tokens
+        link = match.group(0)
+        href = _HREF.search(link)
+        if not href:
+            return link
+        url = _unquote(href.group(1))
+        if re.match(r"^[a-z][a-z0-9+.-]*:|^//", url, re.IGNORECASE):
+            return link
+        source = Path(os.path.normpath(page_file.parent / url.split("?")[0].split("#")[0]))
+        if not source.is_file():
+            return link
+
+        if tokens is None:
+            tokens = page_tokens(html)
+        pruned = prune_css(source.read_text(), tokens)
+        stem = source.name.split(".")[0]
+        name = f"{stem}.{hashlib.sha256(pruned.encode()).hexdigest()[:10]}.css"
+        written[name] = pruned
+        new_url = Path(os.path.relpath(PRUNED_DIR / name, page_file.parent)).as_posix()
+        return link.replace(href.group(1), f'"{new_url}"')
+
+    html = _STYLESHEET_LINK.sub(replace, html)
+    _write_pruned(written)
+    return html
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Keep-alive HTTP client for the GitHub API.
+
+Every GitHub call in a build goes through one GitHubClient, which keeps a
+small pool of persistent HTTP/1.1 connections to api.github.com so that
+each request after the first skips the TCP and TLS handshakes.
+Independent requests can optionally be pipelined over a single connection.
+
+Used by build_cv.py; not meant to be run directly.
+"""
+
+import hashlib
+import http.client
+import json
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+GITHUB_API = "https://api.github.com"
+
+# Redirects GitHub issues for renamed or transferred repositories
+REDIRECT_CODES = (301, 302, 307, 308)
+
+# Headers describing the original connection rather than the response;
+# not worth recording, and the replay server sets its own
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length"}
+
+
+def fixture_name(path):
+    """File name for a recorded response: readable slug plus a short hash."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:80]
+    digest = hashlib.sha1(path.encode()).hexdigest()[:8]
+    return f"{slug}-{digest}.json"
+
+
+def save_fixture(record_dir, path, status, headers, body):
+    """Write one raw response, with its headers, to record_dir."""
+    record_dir = Path(record_dir)
+    record_dir.mkdir(parents=True, exist_ok=True)
+    fixture = {
+        "path": path,
+        "status": status,
+        "headers": [[k, v] for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS],
+        "body": body.decode("utf-8", errors="replace"),
+    }
+    (record_dir / fixture_name(path)).write_text(json.dumps(fixture, indent=2) + "\n")
+
+
+def load_fixtures(record_dir):
+    """Load recorded responses from record_dir, keyed by request path."""
+    fixtures = {}
+    for fixture_file in sorted(Path(record_dir).glob("*.json")):
+        fixture = json.loads(fixture_file.read_text())
+        fixtures[fixture["path"]] = fixture
+    return fixtures
+
+
+class RateLimitBudget:
+    """Tracks the GitHub core rate limit from X-RateLimit-* response headers.
+
+    Every response the client sees updates ``remaining``, ``limit`` and
+    ``reset`` (epoch seconds), so callers can check whether a multi-request
+    operation fits in what is left before starting it.
+    """
+
+    def __init__(self):
+        self.remaining = None
+        self.limit = None
+        self.reset = None
+        self.initial = None
+        self._lock = threading.Lock()
+
+    def observe(self, headers):
+        """Update the budget from a response's rate-limit headers."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        # Conditional and cached responses may not report a resource;
+        # only the core budget matters here
+        resource = headers.get("X-RateLimit-Resource", "core")
+        if resource != "core":
+            return
+        try:
+            self.update(
+                int(remaining),
+                int(headers.get("X-RateLimit-Limit", self.limit or 0)) or None,
+                int(headers.get("X-RateLimit-Reset", 0)) or None,
+            )
+        except ValueError:
+            pass
+
+    def update(self, remaining, limit=None, reset=None):
+        """Set the budget directly, e.g. from the /rate_limit endpoint."""
+        with self._lock:
+            if self.initial is None:
+                self.initial = remaining
+            self.remaining = remaining
+            if limit is not None:
+                self.limit = limit
+            if reset is not None:
+                self.reset = reset
+
+    def available(self):
+        """Requests left in the current window, or None if not yet known."""
+        with self._lock:
+            if self.remaining is None:
+                return None
+            if self.reset is not None and self.limit is not None and time.time() >= self.reset:
+                return self.limit
+            return self.remaining
+
+    def can_afford(self, cost):
+        """True if ``cost`` more requests fit in the budget (or it is unknown)."""
+        available = self.available()
+        return available is None or available >= cost
+
+    def consumed(self):
+        """Requests spent since the budget was first seen (within one window)."""
+        with self._lock:
+            if self.initial is None or self.remaining is None:
+                return None
+            return max(0, self.initial - self.remaining)
+
+    def describe(self):
+        """Human-readable budget summary."""
+        available = self.available()
+        if available is None:
+            return "unknown"
+        line = f"{available}/{self.limit}" if self.limit else str(available)
+        if self.reset:
+            minutes = max(0, (self.reset - time.time()) / 60)
+            line += f", resets in {minutes:.0f} min"
+        return line
+
+
+# Upper bounds (ms) of the request latency histogram buckets
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def endpoint_name(path):
+    """Collapse a request path to its endpoint, e.g. /repos/{owner}/{repo}/tags."""
+    path = path.split("?", 1)[0]
+    return re.sub(r"^/repos/[^/]+/[^/]+", "/repos/{owner}/{repo}", path)
+
+
+class GitHubTelemetry:
+    """Structured metrics for the GitHub metadata layer.
+
+    Per endpoint: request count, status codes, 304s, bytes received and a
+    latency histogram. Per cached field: how often it was served from a
+    fresh cache entry (hit), a stale one (stale) or fetched (miss).
+    Retries and redirects are counted client-wide.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self.fields = {}
+        self.retries = 0
+        self.redirects = 0
+        self._lock = threading.Lock()
+
+    def observe_response(self, path, status, nbytes, seconds):
+        """Record one completed HTTP exchange."""
+        name = endpoint_name(path)
+        ms = seconds * 1000
+        with self._lock:
+            ep = self.endpoints.setdefault(
+                name,
+                {
+                    "requests": 0,
+                    "not_modified": 0,
+                    "bytes": 0,
+                    "status": {},
+                    "latency_ms_sum": 0.0,
+                    "latency_ms_max": 0.0,
+                    "latency_ms_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                },
+            )
+            ep["requests"] += 1
+            ep["bytes"] += nbytes
+            ep["status"][str(status)] = ep["status"].get(str(status), 0) + 1
+            if status == 304:
+                ep["not_modified"] += 1
+            ep["latency_ms_sum"] += ms
+            ep["latency_ms_max"] = max(ep["latency_ms_max"], ms)
+            bucket = next(
+                (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound),
+                len(LATENCY_BUCKETS_MS),
+            )
+            ep["latency_ms_buckets"][bucket] += 1
+
+    def count(self, what):
+        """Count a retry or a redirect."""
+        with self._lock:
+            setattr(self, what, getattr(self, what) + 1)
+
+    def count_field(self, field, outcome):
+        """Count a cache outcome ("hit", "stale" or "miss") for one field."""
+        with self._lock:
+            counts = self.fields.setdefault(field, {"hit": 0, "stale": 0, "miss": 0})
+            counts[outcome] += 1
+
+    def as_dict(self):
+        """Snapshot of the metrics as plain JSON-serializable data."""
+        with self._lock:
+            fields = {}
+            for field, counts in sorted(self.fields.items()):
+                total = sum(counts.values())
+                fields[field] = dict(counts, hit_ratio=round(counts["hit"] / total, 3) if total else None)
+            return {
+                "endpoints": {
+                    name: dict(
+                        ep,
+                        status=dict(ep["status"]),
+                        latency_ms_buckets=dict(
+                            zip([str(b) for b in LATENCY_BUCKETS_MS] + ["+Inf"], ep["latency_ms_buckets"])
+                        ),
+                    )
+                    for name, ep in sorted(self.endpoints.items())
+                },
+                "fields": fields,
+                "retries": self.retries,
+                "redirects": self.redirects,
+            }
+
+
+class _SharedReader:
+    """File wrapper that lets several pipelined responses share one buffer.
+
+    http.client.HTTPResponse closes its file when a response completes,
+    which would drop bytes already buffered for the next response.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+    def close(self):
+        pass
+
+
+class _ReaderSocket:
+    """Minimal socket stand-in handing HTTPResponse the shared reader."""
+
+    def __init__(self, reader):
+        self._reader = reader
+
+    def makefile(self, mode, *args, **kwargs):
+        return self._reader
+
+
+class GitHubClient:
+    """Pooled, keep-alive HTTP client for a single API host.
+
+    Connections are created lazily, up to max_connections of them, and
+    returned to the pool once their response has been read in full.
+    ``stats`` counts requests issued, handshakes performed, connection
+    reuses and pipelined requests; ``budget`` follows the rate limit
+    reported by every response and ``telemetry`` collects per-endpoint
+    metrics. With record_dir set, every raw response
+    is also saved there as a fixture for github_replay.py.
+    """
+
+    def __init__(
+        self,
+        base_url=GITHUB_API,
+        timeout=10,
+        max_connections=4,
+        pipelining=False,
+        record_dir=None,
+    ):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.pipelining = pipelining
+        self.record_dir = record_dir
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._prefetched = {}
+        self.budget = RateLimitBudget()
+        self.telemetry = GitHubTelemetry()
+        self.stats = {"requests": 0, "handshakes": 0, "reused": 0, "pipelined": 0}
+
+    # ------------------------------------------------------------------
+    # Connection pool
+    # ------------------------------------------------------------------
+
+    def _new_connection(self):
+        if self.scheme == "http":
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _release(self, conn, reusable=True):
+        if reusable:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def _ensure_connected(self, conn, timeout):
+        """Open the socket if needed; returns True if a handshake happened."""
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+            self._count("reused")
+            return False
+        conn.connect()
+        self._count("handshakes")
+        return True
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def close(self):
+        """Close every idle connection in the pool."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _path(self, url):
+        """Reduce an absolute API URL to the request path for this host."""
+        if url.startswith(self.base_url):
+            url = url[len(self.base_url):]
+        elif "://" in url:
+            parts = urlsplit(url)
+            url = parts.path + (f"?{parts.query}" if parts.query else "")
+        return url or "/"
+
+    def _send(self, path, headers, timeout):
+        conn = self._acquire()
+        started = time.perf_counter()
+        try:
+            fresh = self._ensure_connected(conn, timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if fresh:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once
+                self.telemetry.count("retries")
+                conn.close()
+                self._ensure_connected(conn, timeout)
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+            body = response.read()
+        except Exception:
+            self._release(conn, reusable=False)
+            raise
+        self._count("requests")
+        self._observe(path, response, body, time.perf_counter() - started)
+        self._release(conn, reusable=not response.will_close)
+        return response.status, response.msg, body
+
+    def _observe(self, path, response, body, seconds):
+        """Per-response bookkeeping: budget, telemetry and fixture recording."""
+        self.budget.observe(response.msg)
+        self.telemetry.observe_response(path, response.status, len(body), seconds)
+        # A 304 only makes sense against the recorded 200, so keep that
+        if self.record_dir and response.status != 304:
+            save_fixture(self.record_dir, path, response.status, response.msg, body)
+
+    def request(self, url, headers=None, timeout=None):
+        """
+        GET a URL (absolute, or a path on this host) over a pooled connection.
+        Returns (status, headers, body) with headers as a case-insensitive
+        http.client.HTTPMessage; same-host redirects are followed.
+        """
+        headers = dict(headers or {})
+        timeout = timeout or self.timeout
+        path = self._path(url)
+
+        with self._lock:
+            prefetched = self._prefetched.pop(path, None)
+        # A prefetched response only answers a request with the same headers;
+        # an unconditional 200 must not stand in for a conditional request
+        if prefetched is not None and prefetched[0] == headers:
+            status, msg, body = prefetched[1]
+        else:
+            status, msg, body = self._send(path, headers, timeout)
+
+        for _ in range(3):
+            if status not in REDIRECT_CODES or not msg.get("Location"):
+                break
+            path = self._path(msg["Location"])
+            self.telemetry.count("redirects")
+            status, msg, body = self._send(path, headers, timeout)
+        return status, msg, body
+
+    def prefetch(self, urls, headers=None, url_headers=None):
+        """
+        Issue independent GETs ahead of time so later request() calls for the
+        same URLs are answered from memory. url_headers maps a URL to extra
+        headers for it alone (e.g. If-None-Match); a later request() only
+        takes the prefetched response if it sends the same headers. With
+        pipelining enabled the GETs are written back-to-back on one
+        connection; otherwise this does nothing.
+        """
+        if not self.pipelining or len(urls) < 2:
+            return
+        url_headers = url_headers or {}
+        requests = [
+            (self._path(url), {**(headers or {}), **url_headers.get(url, {})}) for url in urls
+        ]
+        try:
+            results = self._pipeline(requests)
+        except (OSError, http.client.HTTPException):
+            # Pipelining is an optimization only; fall back to on-demand requests
+            return
+        with self._lock:
+            self._prefetched.update(results)
+
+    def _pipeline(self, requests):
+        """Send [(path, headers)] back-to-back; returns path → (headers, response)."""
+        conn = self._acquire()
+        results = {}
+        reusable = True
+        try:
+            self._ensure_connected(conn, self.timeout)
+            payload = ""
+            for path, headers in requests:
+                lines = [f"{k}: {v}" for k, v in headers.items()]
+                if not any(k.lower() == "host" for k in headers):
+                    lines.insert(0, f"Host: {self.host}")
+                head = "\r\n".join(lines)
+                payload += f"GET {path} HTTP/1.1\r\n{head}\r\n\r\n"
+            started = time.perf_counter()
+            conn.sock.sendall(payload.encode("latin-1"))
+
+            reader = _SharedReader(conn.sock.makefile("rb"))
+            for path, headers in requests:
+                response = http.client.HTTPResponse(_ReaderSocket(reader), method="GET")
+                response.begin()
+                body = response.read()
+                results[path] = (headers, (response.status, response.msg, body))
+                self._observe(path, response, body, time.perf_counter() - started)
+                if response.will_close:
+                    # Later responses were never sent; those paths are
+                    # simply fetched on demand
+                    reusable = False
+                    break
+            reader._fp.close()
+            self._count("requests", len(results))
+            self._count("pipelined", len(results))
+        except Exception:
+            self._release(conn, reusable=False)
+            raise
+        self._release(conn, reusable=reusable)
+        return results
+
+    def summary(self):
+        """One-line report of requests issued and handshakes performed."""
+        s = self.stats
+        line = f"{s['requests']} requests, {s['handshakes']} handshakes, {s['reused']} connection reuses"
+        if s["pipelined"]:
+            line += f", {s['pipelined']} pipelined"
+        return line
+
+
+def prometheus_textfile(report, prefix="cv_github"):
+    """Render a telemetry report (see build_cv.write_github_telemetry) in the
+    Prometheus text exposition format, for node_exporter's textfile collector.
+    """
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{prefix}_{name}{{{label_str}}} {value}" if label_str else f"{prefix}_{name} {value}")
+
+    endpoints = report["endpoints"]
+    metric(
+        "requests_total",
+        "counter",
+        "GitHub API responses by endpoint and status code.",
+        [
+            ({"endpoint": name, "status": status}, count)
+            for name, ep in endpoints.items()
+            for status, count in sorted(ep["status"].items())
+        ],
+    )
+    metric(
+        "response_bytes_total",
+        "counter",
+        "Response body bytes received by endpoint.",
+        [({"endpoint": name}, ep["bytes"]) for name, ep in endpoints.items()],
+    )
+
+    lines.append(f"# HELP {prefix}_request_duration_seconds GitHub API request latency.")
+    lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+    for name, ep in endpoints.items():
+        cumulative = 0
+        for bound, count in ep["latency_ms_buckets"].items():
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{int(bound) / 1000:g}"
+            lines.append(
+                f'{prefix}_request_duration_seconds_bucket{{endpoint="{name}",le="{le}"}} {cumulative}'
+            )
+        lines.append(
+            f'{prefix}_request_duration_seconds_sum{{endpoint="{name}"}} {ep["latency_ms_sum"] / 1000:.6f}'
+        )
+        lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{name}"}} {ep["requests"]}')
+
+    metric(
+        "field_cache_total",
+        "counter",
+        "Cached field outcomes: hit (fresh cache), stale (expired cache) or miss (fetched).",
+        [
+            ({"field": field, "outcome": outcome}, counts[outcome])
+            for field, counts in report["fields"].items()
+            for outcome in ("hit", "stale", "miss")
+        ],
+    )
+    metric("retries_total", "counter", "Requests retried on a dropped keep-alive connection.", [({}, report["retries"])])
+    metric("redirects_total", "counter", "Redirects followed.", [({}, report["redirects"])])
+    metric("handshakes_total", "counter", "Connections opened (TCP/TLS handshakes).", [({}, report["http"]["handshakes"])])
+
+    rate = report["rate_limit"]
+    for key in ("remaining", "consumed"):
+        if rate[key] is not None:
+            metric(f"rate_limit_{key}", "gauge", f"Core rate-limit requests {key}.", [({}, rate[key])])
+    return "\n".join(lines) + "\n"
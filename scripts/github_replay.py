@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Local GitHub API stand-in that replays recorded responses.
+
+Serves fixtures captured with ``build_cv.py --record DIR`` over HTTP/1.1
+keep-alive, so the full CV fetch path (Link-header commit counting,
+pagination, rate limiting) runs and can be timed without network access.
+
+Usage:
+    python scripts/github_replay.py DIR [--port 8765] [--latency-ms 50] [--rate-limit 20]
+
+    # in another shell
+    GITHUB_API_URL=http://127.0.0.1:8765 python scripts/build_cv.py --cache-file /tmp/cache.json
+
+Or let build_cv.py start the stand-in itself with ``--replay DIR``.
+Unrecorded paths return GitHub's 404 body, and a matching If-None-Match
+gets a 304. With --rate-limit N, the
+stand-in counts requests down from N in X-RateLimit-* headers and answers
+403 "API rate limit exceeded" once the budget is spent.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from github_client import load_fixtures
+
+NOT_FOUND_BODY = json.dumps(
+    {"message": "Not Found", "documentation_url": "https://docs.github.com/rest"}
+)
+RATE_LIMITED_BODY = json.dumps(
+    {
+        "message": "API rate limit exceeded (replayed).",
+        "documentation_url": "https://docs.github.com/rest/overview/resources-in-the-rest-api#rate-limiting",
+    }
+)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Answers GETs from the server's fixture table."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        rate_headers = server.take_request(self.path)
+        fixture = server.fixtures.get(self.path)
+
+        if rate_headers and self.path.startswith("/rate_limit"):
+            # Report the simulated budget rather than the recorded one
+            status, headers, body = 200, [], server.rate_limit_body()
+        elif rate_headers and int(rate_headers["X-RateLimit-Remaining"]) < 0:
+            rate_headers["X-RateLimit-Remaining"] = "0"
+            status, headers, body = 403, [], RATE_LIMITED_BODY
+        elif fixture is None:
+            status, headers, body = 404, [], NOT_FOUND_BODY
+        else:
+            status, headers, body = fixture["status"], fixture["headers"], fixture["body"]
+            etag = next((v for k, v in headers if k.lower() == "etag"), None)
+            if etag and self.headers.get("If-None-Match") == etag:
+                status, body = 304, ""
+                # Conditional hits are free on GitHub
+                rate_headers = server.refund_request(rate_headers)
+
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers:
+            if rate_headers and name.lower() in {k.lower() for k in rate_headers}:
+                continue
+            self.send_header(name, value)
+        for name, value in (rate_headers or {}).items():
+            self.send_header(name, value)
+        if not any(name.lower() == "content-type" for name, _ in headers):
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fixtures and the simulated budget."""
+
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency_ms=0, rate_limit=None, verbose=False):
+        super().__init__(address, ReplayHandler)
+        self.fixtures = fixtures
+        self.latency = latency_ms / 1000
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.verbose = verbose
+        self.reset = int(time.time()) + 3600
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def take_request(self, path):
+        """Spend one request from the simulated budget; returns its headers."""
+        if self.rate_limit is None:
+            return None
+        with self._lock:
+            # /rate_limit itself is free, as on GitHub
+            if not path.startswith("/rate_limit"):
+                self.remaining -= 1
+            return {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(self.remaining),
+                "X-RateLimit-Reset": str(self.reset),
+                "X-RateLimit-Resource": "core",
+            }
+
+    def refund_request(self, rate_headers):
+        """Give back a request that GitHub wouldn't have charged for."""
+        if rate_headers is None:
+            return None
+        with self._lock:
+            self.remaining += 1
+            return dict(rate_headers, **{"X-RateLimit-Remaining": str(self.remaining)})
+
+    def rate_limit_body(self):
+        """Body for /rate_limit reflecting the simulated budget."""
+        core = {"limit": self.rate_limit, "remaining": max(self.remaining, 0), "reset": self.reset}
+        return json.dumps({"resources": {"core": core}, "rate": core})
+
+
+def start_replay_server(fixture_dir, port=0, latency_ms=0, rate_limit=None, verbose=False):
+    """Start a replay server on a background thread and return it."""
+    fixtures = load_fixtures(fixture_dir)
+    server = ReplayServer(("127.0.0.1", port), fixtures, latency_ms, rate_limit, verbose)
+    threading.Thread(target=server.serve_forever, name="github-replay", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay recorded GitHub API responses")
+    parser.add_argument("fixture_dir", help="directory written by build_cv.py --record")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every response")
+    parser.add_argument("--rate-limit", type=int, default=None, help="simulate a budget of N requests")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = start_replay_server(
+        args.fixture_dir, args.port, args.latency_ms, args.rate_limit, args.verbose
+    )
+    print(f"Replaying {len(server.fixtures)} GitHub responses at {server.url} (Ctrl-C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Build-time syntax highlighting for fenced code blocks.
+
+HighlightExtension runs ahead of Markdown's fenced_code extension and
+renders each fenced block with a language through Pygments, as
+<div class="highlight"><pre><code>…</code></pre></div> with one class per
+token. Colours come from one shared stylesheet, docs/highlight.css, which
+write_token_stylesheet() generates from HIGHLIGHT_STYLE.
+
+Highlighted HTML is cached in .build-cache/highlight.json by a hash of the
+block's language and code (and the Pygments version), so unchanged blocks
+are not re-lexed. Without Pygments, blocks render as plain
+<pre><code class="language-…">.
+
+Usage:
+    import markdown
+    from highlight import HighlightExtension
+
+    md = markdown.Markdown(extensions=[HighlightExtension(), "fenced_code"])
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from markdown.extensions import Extension
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from markdown.preprocessors import Preprocessor
+
+try:
+    import pygments
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    pygments = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = BASE_DIR / "docs"
+STYLESHEET = OUTPUT_DIR / "highlight.css"
+CACHE_FILE = BASE_DIR / ".build-cache" / "highlight.json"
+
+# Pygments style the token stylesheet is generated from
+HIGHLIGHT_STYLE = "friendly"
+CSS_CLASS = "highlight"
+
+# Bumped when the highlighted markup changes
+_CACHE_VERSION = 1
+
+_ATTR_LANG = re.compile(r"\.([\w#+-]+)")
+
+_cache = None
+_cache_dirty = False
+_cache_lock = threading.Lock()
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            _cache = json.loads(CACHE_FILE.read_text())
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def save_highlight_cache():
+    """Write highlighted blocks to CACHE_FILE if any were added."""
+    global _cache_dirty
+    with _cache_lock:
+        if not _cache_dirty:
+            return
+        blocks = dict(_cache)
+        _cache_dirty = False
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(blocks, sort_keys=True))
+        tmp_file.replace(CACHE_FILE)
+    except OSError as e:
+        print(f"  ⚠ Warning: could not cache highlighted code: {e}")
+
+
+def _plain_block(code, lang):
+    lang_attr = f' class="language-{html.escape(lang)}"' if lang else ""
+    return f"<pre><code{lang_attr}>{html.escape(code, quote=False)}</code></pre>"
+
+
+def highlight_block(code, lang):
+    """HTML for one code block, from the cache when it was seen before."""
+    global _cache_dirty
+    if not lang or pygments is None:
+        return _plain_block(code, lang)
+
+    key = hashlib.sha256(
+        f"{_CACHE_VERSION}\n{pygments.__version__}\n{lang}\n{code}".encode()
+    ).hexdigest()
+    with _cache_lock:
+        cached = _load_cache().get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        lexer = get_lexer_by_name(lang)
+    except ClassNotFound:
+        return _plain_block(code, lang)
+    block = highlight(code, lexer, HtmlFormatter(cssclass=CSS_CLASS, wrapcode=True)).strip()
+    with _cache_lock:
+        _load_cache()[key] = block
+        _cache_dirty = True
+    return block
+
+
+def write_token_stylesheet():
+    """
+    Write STYLESHEET with the token colours of HIGHLIGHT_STYLE. The file is
+    only rewritten when its content changes, so its fingerprint is stable.
+    """
+    if pygments is None:
+        print("  ⚠ Warning: Pygments not installed; code blocks will not be highlighted")
+        return
+    rules = HtmlFormatter(style=HIGHLIGHT_STYLE).get_token_style_defs(f".{CSS_CLASS}")
+    css = (
+        f"/* Generated by scripts/highlight.py from the Pygments {HIGHLIGHT_STYLE!r} style */\n"
+        + "\n".join(re.sub(r"\s*/\*.*?\*/$", "", rule) for rule in rules)
+        + "\n"
+    )
+    if not STYLESHEET.exists() or STYLESHEET.read_text() != css:
+        STYLESHEET.write_text(css)
+
+
+class HighlightPreprocessor(Preprocessor):
+    """Replace fenced code blocks with highlighted HTML held in the stash."""
+
+    FENCED_BLOCK_RE = FencedBlockPreprocessor.FENCED_BLOCK_RE
+
+    def run(self, lines):
+        text = "\n".join(lines)
+        index = 0
+        while match := self.FENCED_BLOCK_RE.search(text, index):
+            if match.group("attrs"):
+                lang = _ATTR_LANG.search(match.group("attrs"))
+                lang = lang.group(1) if lang else ""
+            else:
+                lang = match.group("lang") or ""
+            placeholder = self.md.htmlStash.store(highlight_block(match.group("code"), lang))
+            text = f"{text[:match.start()]}\n{placeholder}\n{text[match.end():]}"
+            index = match.start() + len(placeholder) + 2
+        return text.split("\n")
+
+
+class HighlightExtension(Extension):
+    """Markdown extension: highlight fenced code blocks at build time."""
+
+    def extendMarkdown(self, md):
+        # Ahead of fenced_code (priority 25), which then finds no fences left
+        md.preprocessors.register(HighlightPreprocessor(md), "highlight", 26)
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Responsive image derivatives for docs/images/.
+
+Each raster image a page shows is resized to a few widths and encoded
+twice: as WebP and, as a fallback, as JPEG (or PNG when the image has
+transparency). Derivatives go to docs/images/derived/ and are named after
+a hash of the source bytes and the encoding parameters, so a derivative
+that exists is current and is never re-encoded. Byte-identical sources
+share one set of derivatives. .build-cache/images.json remembers each
+source's size, mtime and hash, so unchanged sources aren't even re-read.
+
+Templates render images through the ``picture`` macro in
+templates/images.html, which emits <picture> with srcset/sizes from
+image_variants(); derivatives are built there, on first use, so images no
+page shows get none. Without Pillow, the macro falls back to the original.
+After a build, build_images() removes derivatives no page in docs/ links.
+
+add_image_hints() post-processes rendered pages: every local <img> gets
+its intrinsic width/height, read from the file's header alone (no Pillow
+needed), and all but the first image get loading="lazy" and
+decoding="async". Header reads are cached in .build-cache/image_sizes.json
+by file hash.
+
+Usage:
+    python scripts/images.py          # derivatives for the images pages link, remove the rest
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+IMAGES_DIR = BASE_DIR / "docs" / "images"
+DERIVED_DIR = IMAGES_DIR / "derived"
+MANIFEST_FILE = BASE_DIR / ".build-cache" / "images.json"
+SIZE_CACHE_FILE = BASE_DIR / ".build-cache" / "image_sizes.json"
+OUTPUT_DIR = BASE_DIR / "docs"
+
+RASTER_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+# Target widths in CSS pixels × density; sources narrower than a width get
+# one derivative at their own width instead
+WIDTHS = (160, 320, 640, 960)
+
+# Encoder settings; part of every derivative's name
+ENCODINGS = {
+    "webp": {"format": "WEBP", "quality": 80},
+    "jpg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+    "png": {"format": "PNG", "compress_level": 9},
+}
+MIME_TYPES = {"webp": "image/webp", "jpg": "image/jpeg", "png": "image/png"}
+
+# Bumped when resizing changes, so every derivative is regenerated
+_PIPELINE_VERSION = 1
+
+_manifest = None
+_manifest_lock = threading.Lock()
+image_stats = {"encoded": 0, "reused": 0}
+
+_size_cache = None
+_size_cache_dirty = False
+
+
+def load_manifest():
+    """Source name → {size, mtime_ns, sha256, variants} from MANIFEST_FILE."""
+    global _manifest
+    if _manifest is None:
+        try:
+            _manifest = json.loads(MANIFEST_FILE.read_text())
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def save_manifest():
+    """Write the manifest atomically; a failed write only costs re-hashing."""
+    if _manifest is None:
+        return
+    try:
+        MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = MANIFEST_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(_manifest, indent=2, sort_keys=True))
+        tmp_file.replace(MANIFEST_FILE)
+    except OSError as e:
+        print(f"  ⚠ Warning: could not save image manifest: {e}")
+
+
+def fallback_extension(image):
+    """Fallback format: PNG only if some pixel is transparent, else JPEG."""
+    if image.mode == "RGBA" and image.getchannel("A").getextrema()[0] < 255:
+        return "png"
+    return "jpg"
+
+
+def target_widths(source_width):
+    """Derivative widths for a source image, never upscaling."""
+    widths = [width for width in WIDTHS if width < source_width]
+    if len(widths) < len(WIDTHS):
+        widths.append(source_width)
+    return widths
+
+
+def derivative_name(source, sha256, width, ext):
+    """E.g. DCSS-3f2a9c01d4-320w.webp; the hash covers source and settings."""
+    settings = json.dumps([_PIPELINE_VERSION, ext, ENCODINGS[ext]], sort_keys=True)
+    digest = hashlib.sha256(f"{sha256}:{settings}".encode()).hexdigest()[:10]
+    return f"{source.stem}-{digest}-{width}w.{ext}"
+
+
+def _encode(image, width, path, ext):
+    """Resize an opened image to width and write it to path."""
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+    if ext == "jpg" and resized.mode != "RGB":
+        resized = resized.convert("RGB")
+    tmp_file = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    resized.save(tmp_file, **ENCODINGS[ext])
+    tmp_file.replace(path)
+
+
+def _current(entry):
+    """Whether a manifest entry is from this pipeline and all its derivatives exist."""
+    return (
+        entry is not None
+        and entry.get("version") == _PIPELINE_VERSION
+        and all(
+            (DERIVED_DIR / name).exists()
+            for variants in entry["variants"].values()
+            for name, _ in variants
+        )
+    )
+
+
+def source_hash(source):
+    """SHA-256 of a source image, from the manifest when its size and mtime are unchanged."""
+    stat = source.stat()
+    entry = load_manifest().get(source.name)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+    return hashlib.sha256(source.read_bytes()).hexdigest()
+
+
+def build_derivatives(source):
+    """
+    Derivatives for one source image, encoding only those that are missing.
+    A byte-identical source that already has derivatives lends them its
+    own. Returns the manifest entry: intrinsic size and per-format srcset
+    lists.
+    """
+    manifest = load_manifest()
+    stat = source.stat()
+    entry = manifest.get(source.name)
+    if (
+        _current(entry)
+        and entry["size"] == stat.st_size
+        and entry["mtime_ns"] == stat.st_mtime_ns
+    ):
+        with _manifest_lock:
+            image_stats["reused"] += 1
+        return entry
+
+    sha256 = source_hash(source)
+    with _manifest_lock:
+        twin = next(
+            (
+                other
+                for name, other in sorted(manifest.items())
+                if name != source.name and other.get("sha256") == sha256 and _current(other)
+            ),
+            None,
+        )
+        if twin is not None:
+            entry = dict(twin, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            manifest[source.name] = entry
+            image_stats["reused"] += 1
+            return entry
+
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        image.load()
+
+    fallback = fallback_extension(image)
+    variants = {}
+    encoded = 0
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    for ext in ("webp", fallback):
+        variants[ext] = []
+        for width in target_widths(image.width):
+            name = derivative_name(source, sha256, width, ext)
+            if not (DERIVED_DIR / name).exists():
+                _encode(image, width, DERIVED_DIR / name, ext)
+                encoded += 1
+            variants[ext].append([name, width])
+
+    entry = {
+        "version": _PIPELINE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+        "width": image.width,
+        "height": image.height,
+        "fallback": fallback,
+        "variants": variants,
+    }
+    with _manifest_lock:
+        manifest[source.name] = entry
+        image_stats["encoded" if encoded else "reused"] += 1
+    return entry
+
+
+# Fingerprinted copies (name.<hash>.ext, see assets.py) aren't sources
+_FINGERPRINTED_STEM = re.compile(r"\.[0-9a-f]{10}$")
+
+
+def source_images():
+    """Raster images in docs/images/ (derivatives and fingerprinted copies excluded)."""
+    return sorted(
+        path for path in IMAGES_DIR.iterdir()
+        if path.is_file()
+        and path.suffix.lower() in RASTER_SUFFIXES
+        and not _FINGERPRINTED_STEM.search(path.stem)
+    )
+
+
+_DERIVED_REFERENCE = re.compile(r"""images/derived/([^\s"'<>,?#]+)""")
+
+
+def linked_derivatives(output_dir=OUTPUT_DIR):
+    """Names of the derivatives the HTML pages in output_dir link."""
+    linked = set()
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.endswith(".html"):
+                text = Path(root, name).read_text(errors="replace")
+                linked.update(unquote(ref) for ref in _DERIVED_REFERENCE.findall(text))
+    return linked
+
+
+def remove_stale_derivatives(keep):
+    """Delete derivatives whose names aren't in keep; returns how many."""
+    if not DERIVED_DIR.is_dir():
+        return 0
+    removed = 0
+    for path in DERIVED_DIR.iterdir():
+        if path.name not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def build_images(max_workers=4):
+    """
+    After pages are written: make sure every image a page in docs/ shows
+    through the picture macro has its derivatives (one encode per distinct
+    image, in parallel), and delete derivatives no page links. Returns
+    False without Pillow.
+    """
+    if Image is None:
+        print("  ⚠ Warning: Pillow not found, serving original images. Run: pixi add pillow")
+        return False
+
+    linked = linked_derivatives()
+    manifest = load_manifest()
+    existing = {source.name: source for source in source_images()}
+    for name in set(manifest) - set(existing):
+        del manifest[name]
+    # Sources a page shows through the picture macro; an original linked
+    # as-is (e.g. from Markdown) gets no derivatives
+    shown = {
+        name
+        for name, entry in manifest.items()
+        if any(n in linked for variants in entry["variants"].values() for n, _ in variants)
+    }
+
+    # One source per distinct image is encoded; its twins then reuse it
+    sources = [existing[name] for name in sorted(shown)]
+    by_hash = {}
+    for source in sources:
+        by_hash.setdefault(source_hash(source), source)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(build_derivatives, by_hash.values()))
+    entries = [build_derivatives(source) for source in sources]
+
+    keep = set(linked) | {
+        name for entry in entries for variants in entry["variants"].values() for name, _ in variants
+    }
+    removed = remove_stale_derivatives(keep)
+    save_manifest()
+    print(
+        f"  Images: {len(sources)} shown on pages ({len(by_hash)} distinct), "
+        f"{image_stats['encoded']} encoded, {removed} unlinked derivatives removed"
+    )
+    return True
+
+
+def image_variants(name):
+    """
+    Srcset data for docs/images/<name>, for the picture macro: webp and
+    fallback srcset lists, the fallback's MIME type, and intrinsic size.
+    None when Pillow is missing or the image isn't a raster source.
+    """
+    source = IMAGES_DIR / str(name)
+    if Image is None or source.suffix.lower() not in RASTER_SUFFIXES or not source.is_file():
+        return None
+    entry = build_derivatives(source)
+    return {
+        "webp": entry["variants"]["webp"],
+        "fallback": entry["variants"][entry["fallback"]],
+        "fallback_type": MIME_TYPES[entry["fallback"]],
+        "width": entry["width"],
+        "height": entry["height"],
+    }
+
+
+# ============================================================================
+# INTRINSIC SIZES AND LOADING HINTS
+# ============================================================================
+
+# JPEG start-of-frame markers (all SOFn except DHT, JPG and DAC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_orientation(exif):
+    """EXIF orientation (1-8) from an APP1 payload, or 1."""
+    if not exif.startswith(b"Exif\0\0") or len(exif) < 14:
+        return 1
+    tiff = exif[6:]
+    endian = "<" if tiff[:2] == b"II" else ">"
+    (offset,) = struct.unpack(endian + "I", tiff[4:8])
+    if offset + 2 > len(tiff):
+        return 1
+    (count,) = struct.unpack(endian + "H", tiff[offset:offset + 2])
+    for i in range(count):
+        entry = tiff[offset + 2 + 12 * i: offset + 14 + 12 * i]
+        if len(entry) < 12:
+            break
+        tag, _, _, value = struct.unpack(endian + "HHIH", entry[:10])
+        if tag == 0x0112:
+            return value
+    return 1
+
+
+def _jpeg_size(f):
+    """Display size from JPEG segments, honouring EXIF rotation."""
+    orientation = 1
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        (length,) = struct.unpack(">H", f.read(2))
+        if marker[1] in _JPEG_SOF:
+            height, width = struct.unpack(">xHH", f.read(5))
+            return (height, width) if orientation >= 5 else (width, height)
+        if marker[1] == 0xE1 and orientation == 1:
+            orientation = _jpeg_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, 1)
+
+
+def read_image_size(path):
+    """(width, height) from an image file's header, without decoding pixels."""
+    with open(path, "rb") as f:
+        head = f.read(30)
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return width, height
+            return None
+        if head[:2] == b"\xff\xd8":
+            return _jpeg_size(f)
+    return None
+
+
+def _load_size_cache():
+    global _size_cache
+    if _size_cache is None:
+        try:
+            _size_cache = json.loads(SIZE_CACHE_FILE.read_text())
+        except (OSError, ValueError):
+            _size_cache = {}
+        _size_cache.setdefault("files", {})
+        _size_cache.setdefault("sizes", {})
+    return _size_cache
+
+
+def save_size_cache():
+    """Write the size cache if any header was read since the last save."""
+    global _size_cache_dirty
+    if not _size_cache_dirty:
+        return
+    try:
+        SIZE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = SIZE_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(_size_cache, sort_keys=True))
+        tmp_file.replace(SIZE_CACHE_FILE)
+        _size_cache_dirty = False
+    except OSError as e:
+        print(f"  ⚠ Warning: could not save image size cache: {e}")
+
+
+def image_size(path):
+    """
+    Intrinsic (width, height) of an image file, or None if unreadable.
+    Sizes are cached by file hash; a file whose size and mtime are unchanged
+    isn't re-hashed.
+    """
+    global _size_cache_dirty
+    cache = _load_size_cache()
+    stat = path.stat()
+    key = str(path)
+    known = cache["files"].get(key)
+    if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+        sha256 = known[2]
+    else:
+        sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+        cache["files"][key] = [stat.st_size, stat.st_mtime_ns, sha256]
+        _size_cache_dirty = True
+    if sha256 not in cache["sizes"]:
+        try:
+            size = read_image_size(path)
+        except (OSError, struct.error):
+            size = None
+        cache["sizes"][sha256] = list(size) if size else None
+        _size_cache_dirty = True
+    size = cache["sizes"][sha256]
+    return tuple(size) if size else None
+
+
+_IMG_TAG = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+
+
+def _local_image(src, page_file):
+    """The file under docs/ an img src points to, or None for remote/inline."""
+    src = unquote(src.split("#")[0].split("?")[0])
+    if not src or re.match(r"^[a-z][a-z0-9+.-]*:|^//", src, re.IGNORECASE):
+        return None
+    if src.startswith("/"):
+        path = OUTPUT_DIR / src.lstrip("/")
+    else:
+        path = page_file.parent / src
+    path = Path(os.path.normpath(path))
+    return path if path.is_file() else None
+
+
+def add_image_hints(html, page_file):
+    """
+    Give each <img> in a page written to page_file its intrinsic
+    width/height (when it has neither) and, after the first image,
+    loading="lazy" and decoding="async". Images without a src are skipped.
+    """
+    first = True
+
+    def hint(match):
+        nonlocal first
+        tag = match.group(0)
+        attrs = {
+            name.lower(): (value or "").strip("\"'")
+            for name, value in _ATTRIBUTE.findall(tag[4:].rstrip("/>"))
+        }
+        if not attrs.get("src"):
+            return tag
+
+        extra = []
+        if "width" not in attrs and "height" not in attrs:
+            path = _local_image(attrs["src"], page_file)
+            size = image_size(path) if path else None
+            if size:
+                extra.append(f'width="{size[0]}" height="{size[1]}"')
+        if first:
+            first = False
+        else:
+            if "loading" not in attrs:
+                extra.append('loading="lazy"')
+            if "decoding" not in attrs:
+                extra.append('decoding="async"')
+        if not extra:
+            return tag
+        end = "/>" if tag.endswith("/>") else ">"
+        return f"{tag[:-len(end)].rstrip()} {' '.join(extra)}{' /' if end == '/>' else ''}>"
+
+    html = _IMG_TAG.sub(hint, html)
+    save_size_cache()
+    return html
+
+
+if __name__ == "__main__":
+    print("Building image derivatives...")
+    build_images()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+HTML minification and pre-compressed siblings for docs/.
+
+minify_html() is the last step before a page is written. It drops
+comments, collapses whitespace, removes whitespace next to block-level
+tags, and writes &nbsp; as the character itself (the CV's indentation is
+runs of them). <pre>, <textarea>, <script> and <style> elements, and any
+element with the code-output class, are left byte-for-byte as rendered.
+
+compress_site() writes .gz siblings (and .br ones when the brotli package
+is installed) for every HTML, CSS and SVG file in docs/, for hosts that
+serve pre-compressed files. .build-cache/compressed.json records each
+file's hash, so only files whose bytes changed are compressed again;
+siblings whose source is gone are deleted.
+
+Usage:
+    python scripts/minify.py    # compress docs/ without rebuilding
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = BASE_DIR / "docs"
+MANIFEST_FILE = BASE_DIR / ".build-cache" / "compressed.json"
+
+COMPRESSED_SUFFIXES = {".html", ".css", ".svg"}
+
+# Files smaller than this gain nothing from a compressed copy
+MIN_COMPRESS_SIZE = 512
+
+# Elements whose content is kept exactly as rendered
+PRESERVED_TAGS = {"pre", "textarea", "script", "style"}
+PRESERVED_CLASS = "code-output"
+
+# Whitespace next to these tags never renders
+BLOCK_TAGS = {
+    "!doctype", "html", "head", "body", "meta", "link", "title", "base",
+    "header", "footer", "main", "nav", "section", "article", "aside",
+    "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "br",
+    "ul", "ol", "li", "dl", "dt", "dd", "blockquote", "figure", "figcaption",
+    "table", "thead", "tbody", "tfoot", "tr", "th", "td", "caption",
+    "form", "fieldset", "pre",
+}
+
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_TAG = re.compile(r"<(/?)([!a-zA-Z][\w:-]*)[^>]*>")
+_CLASS = re.compile(r"""\bclass\s*=\s*["']?([^"'>]*)""", re.IGNORECASE)
+# HTML whitespace, unlike \s, which would also match U+00A0
+_WHITESPACE = re.compile(r"[ \t\r\n\f]+")
+
+
+def _preserved_spans(html):
+    """(start, end) of each element whose content must not be touched."""
+    spans = []
+    pos = 0
+    while True:
+        match = _TAG.search(html, pos)
+        if not match:
+            return spans
+        closing, name = match.group(1), match.group(2).lower()
+        pos = match.end()
+        if closing:
+            continue
+        class_attr = _CLASS.search(match.group(0))
+        if name not in PRESERVED_TAGS and not (
+            class_attr and PRESERVED_CLASS in class_attr.group(1).split()
+        ):
+            continue
+
+        # Find the matching close tag, counting nested elements of the same name
+        depth = 1
+        nested = re.compile(rf"<(/?){re.escape(name)}\b[^>]*>", re.IGNORECASE)
+        for inner in nested.finditer(html, pos):
+            depth += -1 if inner.group(1) else 1
+            if depth == 0:
+                pos = inner.end()
+                break
+        else:
+            pos = len(html)
+        spans.append((match.start(), pos))
+
+
+def _is_block(tag):
+    match = _TAG.fullmatch(tag) if tag else None
+    return bool(match) and match.group(2).lower() in BLOCK_TAGS
+
+
+def _minify_fragment(html):
+    html = _COMMENT.sub("", html).replace("&nbsp;", "\u00a0")
+    parts = re.split(r"(<[^>]*>)", html)
+    # parts alternates text, tag, text, ...; text at even indices
+    for i in range(0, len(parts), 2):
+        text = parts[i]
+        if not text:
+            continue
+        before = parts[i - 1] if i > 0 else ""
+        after = parts[i + 1] if i + 1 < len(parts) else ""
+        text = _WHITESPACE.sub(" ", text)
+        if _is_block(before):
+            text = text.lstrip(" ")
+        if _is_block(after):
+            text = text.rstrip(" ")
+        parts[i] = text
+    return "".join(parts)
+
+
+def minify_html(html):
+    """html with comments and insignificant whitespace removed."""
+    out = []
+    pos = 0
+    for start, end in _preserved_spans(html):
+        out.append(_minify_fragment(html[pos:start]))
+        out.append(html[start:end])
+        pos = end
+    out.append(_minify_fragment(html[pos:]))
+    return "".join(out).strip() + "\n"
+
+
+def _sibling_paths(path):
+    return {
+        "gz": path.with_name(path.name + ".gz"),
+        "br": path.with_name(path.name + ".br"),
+    }
+
+
+def _compressed(data):
+    """Compressed copies of data by sibling kind."""
+    copies = {"gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies["br"] = brotli.compress(data, quality=11)
+    return copies
+
+
+def compress_site(output_dir=OUTPUT_DIR):
+    """
+    Write .gz/.br siblings for HTML, CSS and SVG files in output_dir whose
+    bytes changed since the last run. Returns (compressed, unchanged).
+    """
+    try:
+        manifest = json.loads(MANIFEST_FILE.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+    kinds = sorted(_compressed(b""))
+
+    sources = {}
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            path = Path(root, name)
+            if path.suffix in COMPRESSED_SUFFIXES:
+                sources[path.relative_to(output_dir).as_posix()] = path
+
+    compressed = unchanged = 0
+    new_manifest = {}
+    for rel, path in sorted(sources.items()):
+        data = path.read_bytes()
+        siblings = _sibling_paths(path)
+        if len(data) < MIN_COMPRESS_SIZE:
+            for sibling in siblings.values():
+                sibling.unlink(missing_ok=True)
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        entry = manifest.get(rel)
+        if entry and entry["sha256"] == digest and entry["kinds"] == kinds and all(
+            siblings[kind].exists() for kind in kinds
+        ):
+            new_manifest[rel] = entry
+            unchanged += 1
+            continue
+        for kind, copy in _compressed(data).items():
+            siblings[kind].write_bytes(copy)
+        for kind in set(siblings) - set(kinds):
+            siblings[kind].unlink(missing_ok=True)
+        new_manifest[rel] = {"sha256": digest, "kinds": kinds}
+        compressed += 1
+
+    # Siblings of files that no longer exist
+    for rel in set(manifest) - set(new_manifest):
+        for sibling in _sibling_paths(output_dir / rel).values():
+            sibling.unlink(missing_ok=True)
+
+    try:
+        MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        MANIFEST_FILE.write_text(json.dumps(new_manifest, indent=2, sort_keys=True))
+    except OSError as e:
+        print(f"  ⚠ Warning: could not save compression manifest: {e}")
+    return compressed, unchanged
+
+
+def report_compression(output_dir=OUTPUT_DIR):
+    """Run compress_site() and print a one-line summary."""
+    compressed, unchanged = compress_site(output_dir)
+    formats = "gzip + brotli" if brotli is not None else "gzip"
+    print(f"Compressed {compressed} files ({formats}), {unchanged} unchanged")
+
+
+if __name__ == "__main__":
+    report_compression()
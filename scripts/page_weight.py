@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Page-weight report and budgets for the built site.
+
+Walks every HTML page in docs/ and resolves what loading it fetches:
+stylesheets (and the fonts and images their url()s pull in), scripts,
+images, preloads, icons and embeds. Local files are sized from disk at
+their transfer size, which is the smallest of the file and its .br/.gz
+sibling, as a host serving those would send it. Third-party URLs are
+counted as requests and listed, since their size is unknown offline.
+
+For each page it reports total and critical-path bytes and request
+counts. The critical path is the HTML plus render-blocking stylesheets,
+synchronous <head> scripts and preloaded resources. For an image with a
+srcset the largest candidate is counted (a wide screen's worst case).
+
+Budgets come from budgets.yml at the repository root: a ``default``
+mapping plus per-page overrides keyed by glob (``blog/*.html``).
+check_budgets() prints the pages over budget and returns False, and the
+site build exits non-zero. Pages whose budget sets ``warn_only`` are
+reported as warnings instead. So are pages older than the build
+(``since``) that it didn't rewrite, if they'd be within budget but for
+their images: a partial build can't swap a page's full-size images for
+derivatives. A page that links a local file that doesn't exist always
+fails, whatever its budget.
+
+Usage:
+    python scripts/page_weight.py            # per-page report, check budgets
+    python scripts/page_weight.py --json     # machine-readable report
+"""
+
+import fnmatch
+import os
+import re
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = BASE_DIR / "docs"
+BUDGETS_FILE = BASE_DIR / "budgets.yml"
+
+# Budget keys → (report field, unit divisor, label)
+BUDGET_FIELDS = {
+    "total_kb": ("total_bytes", 1024, "total"),
+    "critical_kb": ("critical_bytes", 1024, "critical path"),
+    "largest_kb": ("largest_bytes", 1024, "largest file"),
+    "requests": ("requests", 1, "requests"),
+    "critical_requests": ("critical_requests", 1, "critical requests"),
+    "third_party_requests": ("third_party_requests", 1, "third-party requests"),
+}
+
+COMPRESSED_SIBLINGS = (".br", ".gz")
+
+_TAG = re.compile(r"<(link|script|img|source|iframe|video|audio|embed)\b([^>]*)>", re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"""([\w:-]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+_PICTURE = re.compile(r"<picture\b.*?</picture>", re.DOTALL | re.IGNORECASE)
+_HEAD = re.compile(r"<head\b.*?</head>", re.DOTALL | re.IGNORECASE)
+_INLINE_STYLE = re.compile(r"<style\b[^>]*>(.*?)</style>", re.DOTALL | re.IGNORECASE)
+_CSS_URL = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+_CSS_IMPORT = re.compile(r"""@import\s+(["'])([^"']+)\1""")
+_EXTERNAL = re.compile(r"^(?:[a-z][a-z0-9+.-]*:)?//", re.IGNORECASE)
+
+
+def _attributes(text):
+    attrs = {}
+    for name, value in _ATTRIBUTE.findall(text):
+        if value[:1] in "\"'":
+            value = value[1:-1]
+        attrs[name.lower()] = value
+    return attrs
+
+
+def _srcset_urls(srcset):
+    return [candidate.split()[0] for candidate in srcset.split(",") if candidate.strip()]
+
+
+def transfer_size(path):
+    """Bytes a host sends for path: the smallest of it and its compressed siblings."""
+    sizes = [path.stat().st_size]
+    for suffix in COMPRESSED_SIBLINGS:
+        sibling = path.with_name(path.name + suffix)
+        if sibling.is_file():
+            sizes.append(sibling.stat().st_size)
+    return min(sizes)
+
+
+class PageWeight:
+    """The resources one page loads, with their sizes."""
+
+    def __init__(self, page_file, output_dir=OUTPUT_DIR):
+        self.page_file = page_file
+        self.output_dir = output_dir
+        self.page = page_file.relative_to(output_dir).as_posix()
+        # url or docs path → {"kind", "bytes", "critical", "third_party"}
+        self.resources = {}
+        self.missing = []
+        html = page_file.read_text()
+        self._add_html(html)
+
+    def _resolve(self, url, base):
+        """A docs/ file for a URL relative to base, or None if it's external."""
+        if _EXTERNAL.match(url) or url.startswith(("data:", "mailto:", "#")):
+            return None
+        path = unquote(urlsplit(url).path)
+        if not path:
+            return None
+        if path.startswith("/"):
+            return self.output_dir / path.lstrip("/")
+        return Path(os.path.normpath(base.parent / path))
+
+    def add(self, url, kind, critical=False, base=None):
+        """Count one fetched resource; returns its local path if it has one."""
+        if not url or url.startswith(("data:", "#")):
+            return None
+        path = self._resolve(url, base or self.page_file)
+        key = url if path is None else path.as_posix()
+        existing = self.resources.get(key)
+        if existing:
+            existing["critical"] = existing["critical"] or critical
+            return None
+        if path is None:
+            if _EXTERNAL.match(url):
+                self.resources[key] = {
+                    "kind": kind, "bytes": 0, "critical": critical, "third_party": True,
+                }
+            return None
+        if not path.is_file():
+            self.missing.append(url)
+            return None
+        self.resources[key] = {
+            "kind": kind, "bytes": transfer_size(path), "critical": critical, "third_party": False,
+        }
+        return path
+
+    def _add_css(self, css, base):
+        for _, url in _CSS_IMPORT.findall(css):
+            self._add_stylesheet(url, critical=False, base=base)
+        for _, url in _CSS_URL.findall(css):
+            suffix = Path(urlsplit(url).path).suffix.lower()
+            kind = "font" if suffix in (".woff2", ".woff", ".ttf", ".otf") else "image"
+            self.add(url, kind, base=base)
+
+    def _add_stylesheet(self, url, critical, base=None):
+        path = self.add(url, "stylesheet", critical=critical, base=base)
+        if path is not None:
+            self._add_css(path.read_text(errors="replace"), base=path)
+
+    def _add_image(self, urls):
+        """Count the largest of an image's candidate URLs."""
+        best, best_size = None, -1
+        for url in urls:
+            path = self._resolve(url, self.page_file)
+            size = path.stat().st_size if path is not None and path.is_file() else 0
+            if size > best_size:
+                best, best_size = url, size
+        if best:
+            self.add(best, "image")
+
+    def _add_html(self, html):
+        self.resources[self.page] = {
+            "kind": "html",
+            "bytes": transfer_size(self.page_file),
+            "critical": True,
+            "third_party": False,
+        }
+        head = _HEAD.search(html)
+        head_end = head.end() if head else 0
+
+        # <picture>: the browser fetches one candidate, from the first
+        # <source> it supports (WebP here), else from the <img>
+        for picture in _PICTURE.findall(html):
+            candidates = [_attributes(m.group(2)) for m in _TAG.finditer(picture)]
+            chosen = next((a for a in candidates if a.get("srcset")), None)
+            if chosen:
+                self._add_image(_srcset_urls(chosen["srcset"]))
+            else:
+                self._add_image([a["src"] for a in candidates if a.get("src")][:1])
+        body_html = _PICTURE.sub("", html)
+
+        for css in _INLINE_STYLE.findall(html):
+            self._add_css(css, base=self.page_file)
+
+        for match in _TAG.finditer(body_html):
+            tag, attrs = match.group(1).lower(), _attributes(match.group(2))
+            in_head = match.start() < head_end
+            if tag == "link":
+                rel = attrs.get("rel", "").lower().split()
+                href = attrs.get("href", "")
+                if "stylesheet" in rel:
+                    blocking = attrs.get("media", "all") not in ("print",)
+                    self._add_stylesheet(href, critical=blocking)
+                elif "preload" in rel:
+                    kind = attrs.get("as", "other")
+                    if kind == "style":
+                        self._add_stylesheet(href, critical=True)
+                    else:
+                        self.add(href, kind, critical=True)
+                elif "icon" in rel:
+                    self.add(href, "icon")
+            elif tag == "script" and attrs.get("src"):
+                blocking = in_head and not ({"async", "defer"} & attrs.keys()) and (
+                    attrs.get("type", "") != "module"
+                )
+                self.add(attrs["src"], "script", critical=blocking)
+            elif tag == "img":
+                self._add_image(_srcset_urls(attrs.get("srcset", "")) or [attrs.get("src", "")])
+            elif tag in ("iframe", "embed", "audio") and attrs.get("src"):
+                self.add(attrs["src"], tag)
+            elif tag == "video":
+                self.add(attrs.get("poster", ""), "image")
+                self.add(attrs.get("src", ""), "video")
+
+    def summary(self):
+        resources = self.resources.values()
+        critical = [r for r in resources if r["critical"]]
+        others = [r["bytes"] for r in resources if r["kind"] != "image"]
+        third_party = sorted(k for k, r in self.resources.items() if r["third_party"])
+        return {
+            "page": self.page,
+            "total_bytes": sum(r["bytes"] for r in resources),
+            "critical_bytes": sum(r["bytes"] for r in critical),
+            "largest_bytes": max((r["bytes"] for r in resources), default=0),
+            "image_bytes": sum(r["bytes"] for r in resources if r["kind"] == "image"),
+            "largest_non_image_bytes": max(others, default=0),
+            "requests": len(self.resources),
+            "critical_requests": len(critical),
+            "third_party_requests": len(third_party),
+            "third_party": third_party,
+            "missing": self.missing,
+        }
+
+
+def analyze_site(output_dir=OUTPUT_DIR):
+    """A summary for every HTML page under output_dir, sorted by page."""
+    pages = []
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(".html"):
+                pages.append(PageWeight(Path(root, name), output_dir).summary())
+    return sorted(pages, key=lambda p: p["page"])
+
+
+def load_budgets(budgets_file=BUDGETS_FILE):
+    """(default budget, [(page glob, budget)]) from budgets_file, if it exists."""
+    try:
+        config = yaml.safe_load(budgets_file.read_text()) or {}
+    except FileNotFoundError:
+        return {}, []
+    overrides = [(pattern, budget or {}) for pattern, budget in (config.get("pages") or {}).items()]
+    return config.get("default") or {}, overrides
+
+
+def page_budget(page, default, overrides):
+    budget = dict(default)
+    for pattern, values in overrides:
+        if fnmatch.fnmatchcase(page, pattern):
+            budget.update(values)
+    return budget
+
+
+def budget_violations(summary, budget):
+    """Human-readable budget overruns for one page summary."""
+    violations = []
+    budget = {key: limit for key, limit in budget.items() if key != "warn_only"}
+    for key, limit in budget.items():
+        if key not in BUDGET_FIELDS or limit is None:
+            continue
+        field, divisor, label = BUDGET_FIELDS[key]
+        value = summary[field] / divisor
+        if value > limit:
+            unit = " KB" if divisor > 1 else ""
+            violations.append(f"{label} {value:,.0f}{unit} > {limit:,}{unit}")
+    return violations
+
+
+def without_images(summary):
+    """A page summary with image bytes left out of its byte totals."""
+    return {
+        **summary,
+        "total_bytes": summary["total_bytes"] - summary["image_bytes"],
+        "largest_bytes": summary["largest_non_image_bytes"],
+    }
+
+
+def _kb(n):
+    return f"{n / 1024:,.0f} KB"
+
+
+def print_report(pages):
+    print(f"  {'page':<40} {'total':>9} {'critical':>9} {'requests':>9} {'3rd-party':>9}")
+    for p in pages:
+        requests = f"{p['requests']} ({p['critical_requests']})"
+        print(
+            f"  {p['page']:<40} {_kb(p['total_bytes']):>9} {_kb(p['critical_bytes']):>9} "
+            f"{requests:>9} {p['third_party_requests']:>9}"
+        )
+    print("  (transfer sizes; critical requests in parentheses)")
+
+
+def check_budgets(output_dir=OUTPUT_DIR, budgets_file=BUDGETS_FILE, verbose=False, since=None):
+    """
+    Measure every page and compare it with its budget. Prints a summary,
+    or the full report when verbose, and returns False if any page is over.
+
+    Overruns only warn for pages whose budget sets warn_only. When since
+    (a timestamp) is given, they also only warn for pages last written
+    before it that are within budget without their images: a build that
+    skipped them (e.g. ``build_site.py cv``) can't swap their full-size
+    images for derivatives. Any other overrun, and any link to a missing
+    local file, counts against the page.
+    """
+    pages = analyze_site(output_dir)
+    default, overrides = load_budgets(budgets_file)
+    if verbose:
+        print_report(pages)
+
+    over = warned = 0
+    for p in pages:
+        failed = bool(p["missing"])
+        for url in p["missing"]:
+            print(f"  ✗ {p['page']}: links missing file {url}")
+        budget = page_budget(p["page"], default, overrides)
+        violations = budget_violations(p, budget)
+        if violations:
+            if budget.get("warn_only"):
+                warned += 1
+                print(f"  ⚠ Warning: {p['page']} (warn_only): {'; '.join(violations)}")
+            elif (
+                since is not None
+                and (output_dir / p["page"]).stat().st_mtime < since
+                and not budget_violations(without_images(p), budget)
+            ):
+                warned += 1
+                print(f"  ⚠ Warning: {p['page']} (not rebuilt, images): {'; '.join(violations)}")
+            else:
+                failed = True
+                print(f"  ✗ {p['page']}: {'; '.join(violations)}")
+            for url in p["third_party"]:
+                print(f"      third-party: {url}")
+        over += failed
+
+    heaviest = max(pages, key=lambda p: p["total_bytes"], default=None)
+    if heaviest:
+        print(
+            f"Page weight: {len(pages)} pages, {over} over budget or broken, {warned} warned "
+            f"(heaviest: {heaviest['page']}, {_kb(heaviest['total_bytes'])})"
+        )
+    return over == 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Report page weight and check budgets")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.json:
+        print(json.dumps(analyze_site(), indent=2))
+    elif not check_budgets(verbose=True):
+        exit(1)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Local preview server for docs/ that behaves like the production host.
+
+Unlike ``python -m http.server``, it:
+
+- handles requests on a fixed pool of worker threads;
+- serves the .br or .gz sibling written by scripts/minify.py when the
+  client's Accept-Encoding allows it (with Vary: Accept-Encoding);
+- sends an ETag with every file and answers If-None-Match with 304;
+- supports single byte-range requests (Range / If-Range);
+- applies the Cache-Control rules in docs/_headers (fingerprinted assets
+  are immutable); everything else gets ``no-cache`` so it is revalidated.
+  GitHub Pages ignores _headers and sends max-age=600 for every file, so
+  this shows how a host that honours it would cache the site;
+- logs each request with its status, encoding, size and latency.
+
+Usage:
+    python scripts/preview.py                 # http://127.0.0.1:8080/
+    python scripts/preview.py --port 8000 --workers 32
+"""
+
+import email.utils
+import fnmatch
+import mimetypes
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = BASE_DIR / "docs"
+HEADERS_FILE = OUTPUT_DIR / "_headers"
+
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+# Sibling suffix for each content coding, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+CHUNK_SIZE = 64 * 1024
+
+mimetypes.add_type("font/woff2", ".woff2")
+mimetypes.add_type("font/woff", ".woff")
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/svg+xml", ".svg")
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def load_header_rules(headers_file=HEADERS_FILE):
+    """
+    [(path pattern, {header: value})] from a Netlify-style _headers file:
+    an unindented path line followed by indented "Name: value" lines.
+    """
+    rules = []
+    try:
+        lines = headers_file.read_text().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if not line[0].isspace():
+            rules.append((line.strip(), {}))
+        elif rules and ":" in line:
+            name, value = line.split(":", 1)
+            rules[-1][1][name.strip()] = value.strip()
+    return rules
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0), from Accept-Encoding."""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q\s*=\s*([\d.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to serve the
+    whole file, or "unsatisfiable".
+    """
+    match = _RANGE.match((header or "").strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "preview"
+    # Idle keep-alive connections give their worker back after this long
+    timeout = 15
+
+    def do_GET(self):
+        self._started = time.perf_counter()
+        self._encoding = "-"
+        self._sent = 0
+        self.serve(head_only=False)
+
+    def do_HEAD(self):
+        self._started = time.perf_counter()
+        self._encoding = "-"
+        self._sent = 0
+        self.serve(head_only=True)
+
+    def resolve(self):
+        """The file under the root a request path names, or None."""
+        root = self.server.root
+        path = unquote(urlsplit(self.path).path)
+        target = (root / path.lstrip("/")).resolve()
+        if target != root and root not in target.parents:
+            return None
+        if target.is_dir():
+            target = target / "index.html"
+        if not target.is_file() and not target.suffix:
+            target = target.with_suffix(".html")
+        return target if target.is_file() else None
+
+    def cache_headers(self, url_path):
+        headers = {"Cache-Control": DEFAULT_CACHE_CONTROL}
+        for pattern, values in self.server.header_rules:
+            if fnmatch.fnmatchcase(url_path, pattern):
+                headers.update(values)
+        return headers
+
+    def serve(self, head_only):
+        target = self.resolve()
+        if target is None:
+            self.send_plain(HTTPStatus.NOT_FOUND, head_only)
+            return
+
+        stat = target.stat()
+        range_header = self.headers.get("Range")
+        body_file, encoding = target, None
+        # Ranges are served from the identity representation only
+        if not range_header:
+            accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+            for coding, suffix in ENCODINGS.items():
+                sibling = target.with_name(target.name + suffix)
+                if coding in accepted and sibling.is_file():
+                    if sibling.stat().st_mtime_ns >= stat.st_mtime_ns:
+                        body_file, encoding = sibling, coding
+                        break
+
+        body_stat = body_file.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        url_path = "/" + target.relative_to(self.server.root).as_posix()
+        content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        headers = {
+            "Content-Type": content_type,
+            "ETag": etag,
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+            **self.cache_headers(url_path),
+        }
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            self._encoding = encoding
+
+        if self.etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name in ("ETag", "Cache-Control", "Vary"):
+                self.send_header(name, headers[name])
+            self.end_headers()
+            return
+
+        size = body_stat.st_size
+        start, end, status = 0, size - 1, HTTPStatus.OK
+        if range_header and self.if_range_holds(etag):
+            byte_range = parse_range(range_header, size)
+            if byte_range == "unsatisfiable":
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = HTTPStatus.PARTIAL_CONTENT
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        length = max(end - start + 1, 0)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        if head_only:
+            return
+        with body_file.open("rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+                self._sent += len(chunk)
+
+    @staticmethod
+    def etag_matches(header, etag):
+        if not header:
+            return False
+        if header.strip() == "*":
+            return True
+        # Weak comparison, as If-None-Match requires
+        tags = (tag.strip().removeprefix("W/") for tag in header.split(","))
+        return etag in tags
+
+    def if_range_holds(self, etag):
+        """Whether a Range request's If-Range (if any) still matches."""
+        if_range = self.headers.get("If-Range")
+        return if_range is None or if_range.strip() == etag
+
+    def send_plain(self, status, head_only):
+        page = self.server.root / "404.html"
+        if status == HTTPStatus.NOT_FOUND and page.is_file():
+            body, content_type = page.read_bytes(), "text/html; charset=utf-8"
+        else:
+            body, content_type = f"{status.value} {status.phrase}\n".encode(), "text/plain"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+            self._sent = len(body)
+
+    def log_request(self, code="-", size="-"):
+        # Logged once the response is complete (see handle_one_request)
+        self._status = getattr(code, "value", code)
+
+    def handle_one_request(self):
+        self._status = None
+        super().handle_one_request()
+        if self._status is not None and hasattr(self, "_started"):
+            elapsed = (time.perf_counter() - self._started) * 1000
+            sys.stderr.write(
+                f"{self.command} {self.path} {self._status} {self._encoding} "
+                f"{self._sent / 1024:.1f} KB {elapsed:.1f} ms\n"
+            )
+            del self._started
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a fixed pool of threads."""
+
+    def __init__(self, address, handler, root, workers):
+        super().__init__(address, handler)
+        self.root = root.resolve()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+        self._headers_mtime = None
+        self._header_rules = []
+
+    @property
+    def header_rules(self):
+        """_headers rules, reloaded when a build rewrites the file."""
+        headers_file = self.root / "_headers"
+        try:
+            mtime = headers_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._headers_mtime:
+            self._header_rules = load_header_rules(headers_file)
+            self._headers_mtime = mtime
+        return self._header_rules
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(root=OUTPUT_DIR, bind="127.0.0.1", port=8080, workers=16):
+    with PooledHTTPServer((bind, port), PreviewHandler, root, workers) as server:
+        print(f"Serving {root} at http://{bind}:{port}/ ({workers} workers)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Preview the built site in docs/")
+    parser.add_argument("--bind", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=16, help="worker threads")
+    parser.add_argument("--directory", type=Path, default=OUTPUT_DIR, help="directory to serve")
+    args = parser.parse_args()
+    serve(args.directory, args.bind, args.port, args.workers)
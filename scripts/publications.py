@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Publication index shared by the CV and the site pages.
+
+Compiled once per build from the publication lists in records/cv.md (and
+records/cv.d/), then cached in .build-cache/publications.json, keyed on a
+hash of those files' text. A build that finds the index current loads it
+without parsing any YAML. Dates are stored as tagged ISO strings and
+parsed back, so a cached index holds the same types as a compiled one.
+
+The index is indexed by type, year and featured flag. A record is featured
+on the home and research pages when it has ``featured: true``; its ``web``
+mapping overrides the display fields derived from the record (title, venue,
+authors) and adds page-only ones (meta, image, href, description, and the
+home page's short_title and short_meta).
+
+Usage:
+    from publications import load_publication_index
+
+    publications = load_publication_index()
+    publications.featured("book")
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+
+import records_cache
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RECORDS_DIR = BASE_DIR / "records"
+INDEX_FILE = BASE_DIR / ".build-cache" / "publications.json"
+
+# Publication type → records key holding its list
+PUBLICATION_TYPES = {
+    "book": "books",
+    "article": "articles",
+    "chapter": "chapters",
+    "special_issue": "issues",
+    "report": "reports",
+    "misc": "misc",
+}
+
+# Bumped when the compiled entry format changes
+_INDEX_VERSION = 2
+
+_AUTHOR_SEPARATOR = re.compile(r",\s*(?:and\s+)?|\s+and\s+")
+
+
+def _plain(text):
+    """Record text without markdown emphasis or surrounding space."""
+    return re.sub(r"[*_]", "", str(text or "")).strip()
+
+
+def _author_names(authors):
+    """Author names from a CV authors string, e.g. "A, *B*, and C" → [A, B, C]."""
+    names = (_plain(name) for name in _AUTHOR_SEPARATOR.split(str(authors or "")))
+    return [name for name in names if name]
+
+
+def _venue(kind, record):
+    """Where a publication appeared, with its year: "Social Networks · 2023"."""
+    outlet = record.get("journal") or record.get("press") or record.get("book") or record.get("client")
+    return " · ".join(str(part) for part in (_plain(outlet), record.get("year")) if part)
+
+
+def compile_entry(kind, position, record):
+    """One index entry: display fields first, the CV record under "record"."""
+    web = record.get("web") or {}
+    entry = {
+        "type": kind,
+        "position": position,
+        "year": record.get("year"),
+        "featured": bool(record.get("featured")),
+        "title": _plain(record.get("title") or record.get("theme") or record.get("report")),
+        "venue": _venue(kind, record),
+        "authors": " · ".join(_author_names(record.get("authors") or record.get("editors"))),
+    }
+    entry.update(web)
+    entry["record"] = {key: value for key, value in record.items() if key != "web"}
+    return entry
+
+
+class PublicationIndex:
+    """
+    Publications in CV order, with lookups by type, year and featured flag.
+    Lookups hold positions into entries, so they serialize to JSON as-is.
+    """
+
+    def __init__(self, entries, by_type=None, by_year=None, featured=None):
+        self.entries = entries
+        if by_type is None:
+            by_type, by_year, featured = {}, {}, []
+            for i, entry in enumerate(entries):
+                by_type.setdefault(entry["type"], []).append(i)
+                by_year.setdefault(str(entry["year"]), []).append(i)
+                if entry["featured"]:
+                    featured.append(i)
+        self._by_type = by_type
+        self._by_year = by_year
+        self._featured = featured
+
+    @classmethod
+    def from_records(cls, records):
+        """Compile the index from CV records (a dict or records_cache.CVRecords)."""
+        entries = []
+        for kind, key in PUBLICATION_TYPES.items():
+            for position, record in enumerate(records.get(key) or []):
+                if isinstance(record, dict):
+                    entries.append(compile_entry(kind, position, record))
+        return cls(entries)
+
+    def _select(self, positions, kind=None):
+        return [
+            self.entries[i] for i in positions if kind is None or self.entries[i]["type"] == kind
+        ]
+
+    def of_type(self, kind):
+        """All publications of one type ("book", "article", ...), in CV order."""
+        return self._select(self._by_type.get(kind, []))
+
+    def in_year(self, year, kind=None):
+        """Publications from one year, optionally of one type."""
+        return self._select(self._by_year.get(str(year), []), kind)
+
+    def featured(self, kind=None):
+        """Publications flagged for the home and research pages."""
+        return self._select(self._featured, kind)
+
+    def years(self):
+        """Years with publications, newest first."""
+        return sorted(self._by_year, reverse=True)
+
+    def to_json(self, key):
+        return {
+            "key": key,
+            "entries": self.entries,
+            "by_type": self._by_type,
+            "by_year": self._by_year,
+            "featured": self._featured,
+        }
+
+
+def _encode_value(value):
+    """
+    JSON for the YAML types JSON lacks: dates become tagged ISO strings, so
+    a cached load gives back the same types as compiling from YAML.
+    """
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"cannot cache {type(value).__name__} in the publication index")
+
+
+def _decode_object(obj):
+    """Inverse of _encode_value() for one decoded JSON object."""
+    if len(obj) == 1:
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+        if "$datetime" in obj:
+            return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def _source_files(records_dir):
+    """The files the index is compiled from: cv.md plus any cv.d publication files."""
+    files = [records_dir / "cv.md"]
+    for key in PUBLICATION_TYPES.values():
+        for suffix in (".yml", ".yaml"):
+            path = records_dir / "cv.d" / f"{key}{suffix}"
+            if path.exists():
+                files.append(path)
+    return files
+
+
+def source_key(records_dir=RECORDS_DIR):
+    """Hash of the index's source files and format, read without parsing."""
+    digest = hashlib.sha256(f"{_INDEX_VERSION}".encode())
+    for path in _source_files(records_dir):
+        digest.update(f"\n{path.name}\n".encode())
+        digest.update(path.read_bytes() if path.exists() else b"")
+    return digest.hexdigest()
+
+
+def load_publication_index(records=None, records_dir=RECORDS_DIR):
+    """
+    The publication index, from INDEX_FILE when it's current, otherwise
+    compiled from records (loaded from records_dir if not given) and saved.
+    """
+    key = source_key(records_dir)
+    try:
+        cached = json.loads(INDEX_FILE.read_text(), object_hook=_decode_object)
+        if cached["key"] == key:
+            return PublicationIndex(
+                cached["entries"], cached["by_type"], cached["by_year"], cached["featured"]
+            )
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if records is None:
+        records = records_cache.CVRecords(
+            records_dir / "cv.md", records_dir / "cv.d", root=records_dir.parent
+        )
+    index = PublicationIndex.from_records(records)
+    try:
+        INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = INDEX_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(index.to_json(key), default=_encode_value))
+        tmp_file.replace(INDEX_FILE)
+    except (OSError, TypeError) as e:
+        print(f"  ⚠ Warning: could not cache publication index: {e}")
+    return index
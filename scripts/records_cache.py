@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+YAML loading for records and content frontmatter.
+
+Parses with libyaml's CSafeLoader when PyYAML was built against libyaml
+(falling back to the pure-Python SafeLoader), and keeps the parsed
+structure in .build-cache/records/, keyed on a hash of the YAML text, so
+unchanged files skip parsing entirely on the next build.
+
+CVRecords combines records/cv.md with the per-key YAML files of
+records/cv.d/, parsing those files only when their keys are read.
+
+Usage:
+    from records_cache import parse_frontmatter
+
+    data, body = parse_frontmatter(path.read_text(), cache_name="records/cv.md")
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:
+    print("Error: pyyaml package not found. Run: pixi add pyyaml")
+    exit(1)
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+RECORDS_CACHE_DIR = Path(__file__).resolve().parent.parent / ".build-cache" / "records"
+
+# Part of every cache key: a new PyYAML or loader may parse differently
+_CACHE_SALT = f"1:{yaml.__version__}:{SafeLoader.__name__}"
+
+# Tallies for the build trace; "seconds" covers parsing and cache reads
+load_stats = {"parsed": 0, "cached": 0, "seconds": 0.0}
+
+# One (cache_name, milliseconds, source) tuple per cached load
+load_log = []
+
+# CVRecords.prefetch() loads on worker threads, which all record here
+_stats_lock = threading.Lock()
+
+
+def _record(cache_name, start, source):
+    """Add one load to load_stats (and load_log, for cached loads)."""
+    seconds = time.perf_counter() - start
+    with _stats_lock:
+        load_stats["cached" if source == "records cache" else "parsed"] += 1
+        load_stats["seconds"] += seconds
+        if cache_name is not None:
+            load_log.append((cache_name, seconds * 1000, source))
+
+
+def load_yaml(text):
+    """Parse YAML text with the fastest safe loader available."""
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def _cache_path(cache_name):
+    """Cache file for a source, e.g. "records/cv.md" → records__cv.md.pickle."""
+    return RECORDS_CACHE_DIR / (cache_name.replace("/", "__") + ".pickle")
+
+
+def load_yaml_cached(text, cache_name):
+    """
+    Parse YAML text, reusing the structure cached under cache_name when the
+    text is unchanged. Returns (data, from_cache).
+    """
+    start = time.perf_counter()
+    key = hashlib.sha256(f"{_CACHE_SALT}\n{text}".encode()).hexdigest()
+    cache_file = _cache_path(cache_name)
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached = pickle.load(f)
+        if cached["key"] == key:
+            _record(cache_name, start, "records cache")
+            return cached["data"], True
+    except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+        pass
+
+    data = load_yaml(text)
+    try:
+        RECORDS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump({"key": key, "data": data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_file.replace(cache_file)
+    except OSError as e:
+        print(f"  ⚠ Warning: could not cache parsed {cache_name}: {e}")
+
+    _record(cache_name, start, SafeLoader.__name__)
+    return data, False
+
+
+def parse_frontmatter(content, cache_name=None):
+    """
+    Split YAML frontmatter from a markdown file's content and parse it.
+    Returns (frontmatter, body); frontmatter is None when the content has
+    none. With cache_name the parsed frontmatter is cached on disk.
+    """
+    if content.startswith("---"):
+        parts = content.split("---", 2)
+        if len(parts) >= 3:
+            if cache_name is None:
+                start = time.perf_counter()
+                frontmatter = load_yaml(parts[1])
+                _record(None, start, SafeLoader.__name__)
+            else:
+                frontmatter, _ = load_yaml_cached(parts[1], cache_name)
+            return frontmatter, parts[2]
+    return None, content
+
+
+def describe_load_stats():
+    """One-line summary of YAML loading for the build trace."""
+    return (
+        f"{load_stats['parsed']} parsed with {SafeLoader.__name__}, "
+        f"{load_stats['cached']} from the records cache, "
+        f"{load_stats['seconds'] * 1000:.1f} ms"
+    )
+
+
+class CVRecords:
+    """
+    CV data from the frontmatter of records/cv.md plus records/cv.d/.
+
+    Each records/cv.d/<key>.yml (or .yaml) file holds the value of one
+    top-level key and takes precedence over that key in cv.md, so sections
+    can move out of cv.md one at a time. extra_files maps further keys to
+    standalone YAML files (e.g. records/teaching.yml).
+
+    Files are read and parsed, through the records cache, only when their
+    key is first accessed or prefetched; fingerprint() identifies a key's
+    value from the file's text alone, without parsing it.
+    """
+
+    def __init__(self, cv_file, cv_dir=None, extra_files=None, root=None):
+        self.root = Path(root) if root else Path(cv_file).resolve().parent.parent
+        self.data = {}
+        if cv_file.exists():
+            frontmatter, _ = parse_frontmatter(cv_file.read_text(), self._cache_name(cv_file))
+            self.data = frontmatter or {}
+
+        self.files = {
+            key: path for key, path in (extra_files or {}).items() if Path(path).exists()
+        }
+        if cv_dir is not None and cv_dir.is_dir():
+            for path in sorted(cv_dir.iterdir()):
+                if path.suffix in (".yml", ".yaml") and not path.name.startswith(("_", ".")):
+                    self.files[path.stem] = path
+
+        self._texts = {}
+        self._values = {}
+
+    def _cache_name(self, path):
+        """Records cache name: the path relative to root where possible."""
+        try:
+            return Path(path).relative_to(self.root).as_posix()
+        except ValueError:
+            return hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()[:16]
+
+    def _text(self, key):
+        if key not in self._texts:
+            self._texts[key] = self.files[key].read_text()
+        return self._texts[key]
+
+    def get(self, key, default=None):
+        if key not in self.files:
+            return self.data.get(key, default)
+        if key not in self._values:
+            value, _ = load_yaml_cached(self._text(key), self._cache_name(self.files[key]))
+            self._values[key] = value
+        value = self._values[key]
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in self.files and key not in self.data:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key):
+        return key in self.files or key in self.data
+
+    def keys(self):
+        return set(self.data) | set(self.files)
+
+    def fingerprint(self, key):
+        """
+        A JSON-serializable stand-in for a key's value: the value itself
+        for cv.md keys, a hash of the file's text for file-backed keys.
+        """
+        if key not in self.files:
+            return self.data.get(key)
+        digest = hashlib.sha256(self._text(key).encode()).hexdigest()
+        return {"file": self._cache_name(self.files[key]), "sha256": digest}
+
+    def prefetch(self, keys, max_workers=8):
+        """Parse the files behind keys in parallel; returns how many were parsed."""
+        pending = sorted({key for key in keys if key in self.files and key not in self._values})
+        if len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+                list(pool.map(self.get, pending))
+        elif pending:
+            self.get(pending[0])
+        return len(pending)
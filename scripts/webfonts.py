@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Self-hosted, subset webfonts.
+
+Pages link Instrument Sans from Google Fonts by default. To serve fonts
+from docs/ instead, put the font files (.ttf, .otf, .woff or .woff2; a
+variable font covers its whole weight range) in fonts/. After each build,
+self_host_fonts():
+
+1. collects every character used in the text of docs/**/*.html (plus
+   printable ASCII and any CSS `content:` strings), so fonts stay usable
+   when a page is rebuilt on its own;
+2. subsets each font to those glyphs as docs/fonts/<name>.<hash>.woff2
+   (.woff without the brotli package), cached in .build-cache/fonts/ by
+   (font hash, glyph set hash);
+3. replaces each page's Google Fonts links with inline @font-face rules
+   (font-display: swap) and preload hints for the upright faces.
+
+Needs fontTools; without it, or without files in fonts/, pages keep the
+Google Fonts links.
+
+Usage:
+    python scripts/webfonts.py    # subset and relink without rebuilding
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from pathlib import Path
+
+try:
+    from fontTools import subset
+    from fontTools import version as fonttools_version
+except ImportError:
+    subset = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FONTS_DIR = BASE_DIR / "fonts"
+OUTPUT_DIR = BASE_DIR / "docs"
+WEBFONTS_DIR = OUTPUT_DIR / "fonts"
+CACHE_DIR = BASE_DIR / ".build-cache" / "fonts"
+
+FONT_SUFFIXES = {".ttf", ".otf", ".woff", ".woff2"}
+
+# Always kept, so text added without a full rebuild still renders
+BASELINE_GLYPHS = "".join(chr(c) for c in range(0x20, 0x7F)) + "\u00a0–—‘’“”…·•→←×"
+
+FONT_DISPLAY = "swap"
+
+_GOOGLE_FONTS_LINK = re.compile(
+    r"""<link\b[^>]*\bhref=["']?https://fonts\.(?:googleapis|gstatic)\.com[^>]*>\s*"""
+)
+_WEBFONT_BLOCK = re.compile(
+    r"""<link\b[^>]*\bdata-webfont\b[^>]*>\s*|<style data-webfont>.*?</style>\s*""", re.DOTALL
+)
+_BODY = re.compile(r"<body\b.*?(?:</body>|$)", re.DOTALL | re.IGNORECASE)
+_NON_TEXT = re.compile(r"<(script|style)\b.*?</\1>|<[^>]*>", re.DOTALL | re.IGNORECASE)
+_CSS_CONTENT = re.compile(r"""\bcontent\s*:\s*(["'])(.*?)\1""")
+
+
+def source_fonts():
+    """Font files supplied in FONTS_DIR."""
+    if not FONTS_DIR.is_dir():
+        return []
+    return sorted(p for p in FONTS_DIR.iterdir() if p.suffix.lower() in FONT_SUFFIXES)
+
+
+def _pages(output_dir):
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(".html"):
+                yield Path(root, name)
+
+
+def used_glyphs(output_dir=OUTPUT_DIR):
+    """Every character in the rendered text of the site's pages, sorted."""
+    glyphs = set(BASELINE_GLYPHS)
+    for page in _pages(output_dir):
+        body = _BODY.search(page.read_text())
+        if body:
+            glyphs.update(html.unescape(_NON_TEXT.sub(" ", body.group(0))))
+    for stylesheet in output_dir.glob("*.css"):
+        for _, text in _CSS_CONTENT.findall(stylesheet.read_text()):
+            glyphs.update(text)
+    return "".join(sorted(glyphs - set("\t\n\r\f")))
+
+
+def font_face(path):
+    """(family, style, weight) of a font file, read from its tables."""
+    font = subset.load_font(str(path), subset.Options(), dontLoadGlyphNames=True)
+    name = font["name"]
+    family = str(name.getDebugName(16) or name.getDebugName(1))
+    italic = bool(font["OS/2"].fsSelection & 1) or font["post"].italicAngle != 0
+    weight = str(font["OS/2"].usWeightClass)
+    if "fvar" in font:
+        for axis in font["fvar"].axes:
+            if axis.axisTag == "wght":
+                weight = f"{axis.minValue:g} {axis.maxValue:g}"
+    font.close()
+    return family, "italic" if italic else "normal", weight
+
+
+def subset_font(path, glyphs):
+    """
+    Bytes of path subset to glyphs, from the cache when this font and glyph
+    set were seen before.
+    """
+    flavor = "woff2" if brotli is not None else "woff"
+    font_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+    glyph_hash = hashlib.sha256(glyphs.encode()).hexdigest()
+    key = hashlib.sha256(
+        f"{fonttools_version}\n{flavor}\n{font_hash}\n{glyph_hash}".encode()
+    ).hexdigest()[:32]
+    cache_file = CACHE_DIR / f"{key}.{flavor}"
+    if cache_file.exists():
+        return cache_file.read_bytes(), flavor
+
+    options = subset.Options()
+    options.flavor = flavor
+    font = subset.load_font(str(path), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=glyphs)
+    subsetter.subset(font)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    subset.save_font(font, str(tmp_file), options)
+    font.close()
+    tmp_file.replace(cache_file)
+    return cache_file.read_bytes(), flavor
+
+
+def build_webfonts(glyphs):
+    """
+    Subset each source font into WEBFONTS_DIR, removing files from earlier
+    subsets. Returns the faces as dicts with family, style, weight, file and
+    format.
+    """
+    faces = []
+    for path in source_fonts():
+        family, style, weight = font_face(path)
+        data, flavor = subset_font(path, glyphs)
+        name = f"{path.stem}.{hashlib.sha256(data).hexdigest()[:10]}.{flavor}"
+        WEBFONTS_DIR.mkdir(parents=True, exist_ok=True)
+        if not (WEBFONTS_DIR / name).exists():
+            (WEBFONTS_DIR / name).write_bytes(data)
+        faces.append(
+            {"family": family, "style": style, "weight": weight, "file": name, "format": flavor}
+        )
+
+    current = {face["file"] for face in faces}
+    for path in WEBFONTS_DIR.glob("*"):
+        if path.is_file() and path.name not in current:
+            path.unlink()
+    return faces
+
+
+def font_head(faces, page_file):
+    """Preload links and @font-face rules for one page's <head>."""
+    fonts_url = Path(os.path.relpath(WEBFONTS_DIR, page_file.parent)).as_posix()
+    links = "".join(
+        f'<link rel="preload" href="{fonts_url}/{face["file"]}" as="font" '
+        f'type="font/{face["format"]}" crossorigin data-webfont>'
+        for face in faces
+        if face["style"] == "normal"
+    )
+    rules = "".join(
+        f'@font-face{{font-family:{json.dumps(face["family"])};font-style:{face["style"]};'
+        f'font-weight:{face["weight"]};font-display:{FONT_DISPLAY};'
+        f'src:url({fonts_url}/{face["file"]}) format("{face["format"]}")}}'
+        for face in faces
+    )
+    return f"{links}<style data-webfont>{rules}</style>"
+
+
+def relink_page(page_file, faces):
+    """
+    Swap a page's Google Fonts links (or an earlier self-hosted block) for
+    faces. Returns whether the page changed.
+    """
+    original = page_file.read_text()
+    head, sep, rest = original.partition("</head>")
+    if not sep:
+        return False
+    matches = list(_GOOGLE_FONTS_LINK.finditer(head)) + list(_WEBFONT_BLOCK.finditer(head))
+    if not matches:
+        return False
+
+    # The new block goes where the first of the old links was
+    position = min(match.start() for match in matches)
+    remainder = _WEBFONT_BLOCK.sub("", _GOOGLE_FONTS_LINK.sub("", head[position:]))
+    updated = head[:position] + font_head(faces, page_file) + remainder + sep + rest
+    if updated == original:
+        return False
+    page_file.write_text(updated)
+    return True
+
+
+def self_host_fonts(output_dir=OUTPUT_DIR):
+    """Subset the fonts in FONTS_DIR and point every page at them."""
+    fonts = source_fonts()
+    if not fonts:
+        return
+    if subset is None:
+        print("⚠ Warning: fontTools not installed; pages keep linking Google Fonts")
+        return
+
+    glyphs = used_glyphs(output_dir)
+    faces = build_webfonts(glyphs)
+    updated = sum(relink_page(page, faces) for page in _pages(output_dir))
+    total = sum((WEBFONTS_DIR / face["file"]).stat().st_size for face in faces)
+    print(
+        f"Fonts: {len(faces)} faces subset to {len(glyphs)} glyphs "
+        f"({total / 1024:.0f} KB), {updated} pages relinked"
+    )
+
+
+if __name__ == "__main__":
+    from minify import report_compression
+
+    self_host_fonts()
+    # Relinked pages need fresh .gz/.br siblings
+    report_compression()
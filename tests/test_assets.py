@@ -0,0 +1,60 @@
+"""
+Fingerprinted copies are tracked by docs/asset-manifest.json, so a build
+from a fresh clone (no .build-cache) still cleans up stale ones.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import assets  # noqa: E402
+import css_prune  # noqa: E402
+import images  # noqa: E402
+import webfonts  # noqa: E402
+
+
+@pytest.fixture
+def docs(tmp_path, monkeypatch):
+    """An empty docs/ in tmp_path, with no .build-cache."""
+    docs = tmp_path / "docs"
+    (docs / "images").mkdir(parents=True)
+    monkeypatch.setattr(assets, "OUTPUT_DIR", docs)
+    monkeypatch.setattr(assets, "ASSET_MANIFEST_FILE", docs / "asset-manifest.json")
+    monkeypatch.setattr(assets, "HEADERS_FILE", docs / "_headers")
+    monkeypatch.setattr(assets, "FINGERPRINTS_FILE", tmp_path / ".build-cache" / "fingerprints.json")
+    monkeypatch.setattr(assets, "_fingerprints", None)
+    monkeypatch.setattr(assets, "_fingerprints_dirty", False)
+    monkeypatch.setattr(images, "DERIVED_DIR", docs / "images" / "derived")
+    monkeypatch.setattr(css_prune, "PRUNED_DIR", docs / "css")
+    monkeypatch.setattr(webfonts, "WEBFONTS_DIR", docs / "fonts")
+    return docs
+
+
+def test_stylesheets_are_not_fingerprinted(docs):
+    (docs / "styles.css").write_text("body { color: black; }")
+    assert assets.asset_url("styles.css") == "styles.css"
+    assert list(docs.glob("styles.*.css")) == []
+
+
+def test_fresh_clone_removes_copies_the_manifest_no_longer_lists(docs):
+    (docs / "styles.css").write_text("body { color: black; }")
+    (docs / "images" / "cover.jpg").write_bytes(b"new cover")
+    # What an earlier build committed: a stylesheet copy and an older cover
+    old_files = ["styles.0123456789.css", "styles.0123456789.css.br", "images/cover.abcdefabcd.jpg"]
+    for name in old_files:
+        (docs / name).write_text("old")
+    (docs / "asset-manifest.json").write_text(
+        json.dumps({"styles.css": old_files[0], "images/cover.jpg": old_files[2]})
+    )
+
+    copy = assets.asset_url("images/cover.jpg")
+    assets.save_asset_manifest()
+
+    assert (docs / copy).read_bytes() == b"new cover"
+    assert json.loads((docs / "asset-manifest.json").read_text()) == {"images/cover.jpg": copy}
+    for name in old_files:
+        assert not (docs / name).exists(), name
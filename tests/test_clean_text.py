@@ -0,0 +1,97 @@
+"""
+The one-pass clean_text() formatter gives the same HTML as the original
+pass-per-construct _clean_text_reference(), over every string in
+records/cv.md and over hand-written markup.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+import build_cv  # noqa: E402
+import records_cache  # noqa: E402
+
+# Markup the single scan handles itself (no fallback to the reference)
+FAST_PATH = [
+    "21^st^ century",
+    "^a^ and ^b^",
+    "**bold** and more **bold**",
+    "*italics* and *more*",
+    "a * b * c",
+    "x ** y ** z",
+    "[site](https://example.org)",
+    "[a](b) and [c](d)",
+    "use `pip install` now",
+    "`a^b^`",
+    "[a^2^](u)",
+    "**a^2^**",
+    "*x^2^*",
+    "*",
+    "**",
+    "a*b",
+    "^^",
+    "^a b^",
+    "[x](y",
+    "`x",
+    "  padded *text*  ",
+]
+
+# Markup where pass order matters, so the formatter defers to the reference
+ORDER_DEPENDENT = [
+    "\\newline Hi",
+    "A\\vspace{2pt}B",
+    "\\ind Item",
+    "\\footnotesize small \\newline",
+    "**bold *it* bold**",
+    "*it **b** it*",
+    "***both***",
+    "[a*b*](u)",
+    "*a* [b](c)",
+    "[`x`](u)",
+    "`*`",
+    "[*](u)",
+    "**[link](u)**",
+]
+
+
+@pytest.fixture(scope="module")
+def cv_strings(tmp_path_factory):
+    cache_dir = tmp_path_factory.mktemp("records")
+    original = records_cache.RECORDS_CACHE_DIR
+    records_cache.RECORDS_CACHE_DIR = cache_dir
+    try:
+        strings, _ = build_cv.check_clean_text(build_cv.load_cv_records(BASE_DIR))
+    finally:
+        records_cache.RECORDS_CACHE_DIR = original
+    return sorted(strings)
+
+
+def test_every_cv_string_matches_reference(cv_strings):
+    assert cv_strings
+    for text in cv_strings:
+        assert build_cv._clean_text(text) == build_cv._clean_text_reference(text), text
+
+
+@pytest.mark.parametrize("text", FAST_PATH + ORDER_DEPENDENT)
+def test_markup_matches_reference(text):
+    assert build_cv._clean_text(text) == build_cv._clean_text_reference(text)
+
+
+def test_fast_path_cases_skip_the_reference():
+    for text in FAST_PATH:
+        assert not build_cv._depends_on_pass_order(text), text
+    for text in ORDER_DEPENDENT:
+        assert build_cv._depends_on_pass_order(text), text
+
+
+def test_fast_path_output():
+    assert build_cv.clean_text("21^st^ *Century* **Sociology**") == (
+        "21<sup>st</sup> <em>Century</em> <strong>Sociology</strong>"
+    )
+    assert build_cv.clean_text("see [docs](https://x.org) and `dcss`") == (
+        'see <a href="https://x.org">docs</a> and <code>dcss</code>'
+    )
@@ -0,0 +1,86 @@
+"""
+Per-page stylesheet pruning: which pruned files survive a build.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import css_prune  # noqa: E402
+
+STYLES = """
+.card { color: red; }
+.toc { color: blue; }
+.lightbox { color: green; }
+"""
+
+
+@pytest.fixture
+def docs(tmp_path, monkeypatch):
+    """A docs/ with styles.css, and an empty .build-cache."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "styles.css").write_text(STYLES)
+    monkeypatch.setattr(css_prune, "OUTPUT_DIR", docs)
+    monkeypatch.setattr(css_prune, "PRUNED_DIR", docs / "css")
+    monkeypatch.setattr(css_prune, "CACHE_DIR", tmp_path / ".build-cache" / "css")
+    monkeypatch.setattr(css_prune, "_parsed", {})
+    monkeypatch.setattr(css_prune, "_pruned", {})
+    return docs
+
+
+def write_page(docs, page, body):
+    page_file = docs / page
+    page_file.parent.mkdir(parents=True, exist_ok=True)
+    html = f'<html><head><link rel="stylesheet" href="{"../" * page.count("/")}styles.css"></head>'
+    page_file.write_text(css_prune.prune_page_css(html + f"<body>{body}</body></html>", page_file))
+
+
+def pruned_files(docs):
+    return {path.name for path in (docs / "css").iterdir()}
+
+
+def test_partial_build_on_empty_cache_keeps_other_pages_stylesheets(docs):
+    # A full build
+    write_page(docs, "index.html", '<div class="card"></div>')
+    write_page(docs, "books/dcss.html", '<div class="lightbox"></div>')
+    write_page(docs, "cv.html", '<nav class="toc"></nav>')
+    assert len(pruned_files(docs)) == 3
+
+    # A fresh clone (no .build-cache) that rebuilds only the CV
+    shutil.rmtree(css_prune.CACHE_DIR)
+    css_prune._pruned.clear()
+    write_page(docs, "cv.html", '<nav class="toc"></nav><div class="card"></div>')
+    assert css_prune.remove_unlinked_css(docs) == 1
+
+    # The old CV stylesheet is gone; everything any page links still exists
+    assert pruned_files(docs) == css_prune.linked_css(docs)
+    assert len(pruned_files(docs)) == 3
+
+
+def test_unlinked_stylesheets_and_their_siblings_are_removed(docs):
+    write_page(docs, "index.html", '<div class="card"></div>')
+    (docs / "css" / "styles.0123456789.css").write_text("old")
+    (docs / "css" / "styles.0123456789.css.br").write_bytes(b"old")
+    assert css_prune.remove_unlinked_css(docs) == 2
+    assert sorted(p.name for p in (docs / "css").iterdir()) == sorted(css_prune.linked_css(docs))
+
+
+def test_selector_lists_split_only_on_top_level_commas():
+    css = '.card:is(.a, .b), [title="x,y"] p, .toc:not(.c, .d) { color: red; }'
+    assert css_prune.parse_stylesheet(css) == [
+        ("rule", [".card:is(.a, .b)", '[title="x,y"] p', ".toc:not(.c, .d)"], "color: red;")
+    ]
+
+
+def test_pseudo_class_arguments_are_ignored_when_matching(docs):
+    tokens = {"<nav", ".toc"}
+    assert css_prune.selector_matches(".toc:not(.open, .closed) > nav", tokens)
+    assert css_prune.selector_matches("nav:where(:not(.a), .b)::before", tokens)
+    assert not css_prune.selector_matches(":is(.a, .b) .card", tokens)
+    pruned = css_prune.prune_css(".card:is(.a, .b), .toc:not(.a, .b) { color: red; }", tokens)
+    assert pruned.strip() == ".toc:not(.a, .b) { color: red; }"
@@ -0,0 +1,166 @@
+"""
+GitHub cache round trips through build_cv.fetch_github_info(), served by
+the replay stand-in (scripts/github_replay.py).
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import build_cv  # noqa: E402
+from github_client import GitHubClient  # noqa: E402
+from github_replay import ReplayServer  # noqa: E402
+
+REPO_URL = "https://github.com/octo/widget"
+COMMITS_ETAG = '"commits-v1"'
+STALE = "2020-01-01T00:00:00+00:00"
+
+
+def fixture(status, body, headers=()):
+    return {"status": status, "headers": list(headers), "body": json.dumps(body)}
+
+
+def commit(sha, date):
+    return {"sha": sha, "commit": {"committer": {"date": date}}}
+
+
+FIXTURES = {
+    "/repos/octo/widget": fixture(
+        200,
+        {
+            "stargazers_count": 7,
+            "forks_count": 2,
+            "open_issues_count": 1,
+            "description": "A widget",
+            "topics": ["widgets"],
+            "license": {"spdx_id": "MIT"},
+            "created_at": "2019-05-01T00:00:00Z",
+            "updated_at": "2026-09-30T00:00:00Z",
+        },
+    ),
+    "/repos/octo/widget/releases/latest": fixture(200, {"tag_name": "v1.2.0"}),
+    "/repos/octo/widget/commits?per_page=1": fixture(
+        200,
+        [commit("abcdef1234567", "2026-09-30T12:00:00Z")],
+        [
+            ["ETag", COMMITS_ETAG],
+            ["Link", '<https://api.github.com/repositories/1/commits?per_page=1&page=42>; rel="last"'],
+        ],
+    ),
+    "/repos/octo/widget/commits?per_page=1&page=42": fixture(
+        200, [commit("0000000111111", "2019-05-01T09:00:00Z")]
+    ),
+    "/repos/octo/widget/contributors?per_page=100": fixture(
+        200, [{"login": "alice"}, {"login": "bob"}]
+    ),
+}
+
+
+@pytest.fixture
+def fixtures():
+    return FIXTURES
+
+
+@pytest.fixture
+def github(tmp_path, monkeypatch, fixtures):
+    """A replay server and a build_cv wired to it, with a cache in tmp_path."""
+    server = ReplayServer(("127.0.0.1", 0), fixtures)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(build_cv, "CACHE_FILE", tmp_path / "github_cache.json")
+    monkeypatch.setattr(build_cv, "_github_client", GitHubClient(base_url=server.url))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def commits_not_modified():
+    endpoint = build_cv.get_github_client().telemetry.as_dict()["endpoints"]
+    return endpoint["/repos/{owner}/{repo}/commits"]["not_modified"]
+
+
+def make_stale():
+    cache = build_cv.load_github_cache()
+    cache["octo/widget"]["last_fetched"] = STALE
+    build_cv.save_github_cache(cache)
+
+
+def test_stripped_cache_survives_a_304(github):
+    first = build_cv.fetch_github_info(REPO_URL)
+    assert first["total_commits"] == 42
+    assert build_cv.load_github_cache()["octo/widget"]["commits_etag"] == COMMITS_ETAG
+
+    # The saved entry goes through strip_cache_entry(), as does cache gc
+    cache = build_cv.load_github_cache()
+    compacted, _ = build_cv.compact_github_cache(cache, {"octo/widget"})
+    build_cv.save_github_cache(compacted)
+    make_stale()
+
+    second = build_cv.fetch_github_info(REPO_URL)
+    assert commits_not_modified() == 1
+    for field in ("total_commits", "first_commit_date", "contributors", "stars", "version"):
+        assert second[field] == first[field], field
+    assert build_cv.load_github_cache()["octo/widget"]["total_commits"] == 42
+
+
+def test_entry_stripped_by_older_build_is_refetched(github):
+    # What an older build's strip_cache_entry() left behind
+    build_cv.save_github_cache(
+        {
+            "octo/widget": {
+                "version": "v1.2.0",
+                "last_commit_date": "2026-09-30",
+                "last_commit_sha": "abcdef1",
+                "first_commit_date": "2019-05-01",
+                "commits_etag": COMMITS_ETAG,
+                "last_fetched": STALE,
+            }
+        }
+    )
+
+    result = build_cv.fetch_github_info(REPO_URL)
+    assert commits_not_modified() == 0
+    assert result["total_commits"] == 42
+    assert result["contributor_count"] == 2
+    assert build_cv.load_github_cache()["octo/widget"]["total_commits"] == 42
+
+
+EMPTY_OR_HUGE = {
+    **FIXTURES,
+    # An empty repository, and one too large to list contributors for
+    "/repos/octo/widget/commits?per_page=1": fixture(409, {"message": "Git Repository is empty."}),
+    "/repos/octo/widget/contributors?per_page=100": fixture(
+        403, {"message": "The history or contributor list is too large to list contributors"}
+    ),
+}
+
+
+@pytest.mark.parametrize("fixtures", [EMPTY_OR_HUGE])
+def test_error_answers_from_commits_and_contributors_are_no_data(github):
+    result = build_cv.fetch_github_info(REPO_URL)
+    assert not result["stale"]
+    assert result["stars"] == 7
+    assert result["total_commits"] == 0
+    assert result["contributors"] == []
+    assert build_cv.load_github_cache()["octo/widget"]["version"] == "v1.2.0"
+
+
+SERVER_ERROR = {
+    **FIXTURES,
+    "/repos/octo/widget/contributors?per_page=100": fixture(502, {"message": "Bad gateway"}),
+}
+
+
+@pytest.mark.parametrize("fixtures", [SERVER_ERROR])
+def test_server_error_keeps_the_cached_entry(github):
+    build_cv.save_github_cache(
+        {"octo/widget": {"stars": 3, "contributors": ["alice"], "last_fetched": STALE}}
+    )
+    result = build_cv.fetch_github_info(REPO_URL)
+    assert result["stale"]
+    assert result["stars"] == 3
+    assert build_cv.load_github_cache()["octo/widget"]["contributors"] == ["alice"]
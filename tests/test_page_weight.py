@@ -0,0 +1,63 @@
+"""
+Budget checks fail a build only for pages it wrote and can fix.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import page_weight  # noqa: E402
+
+CDN_PAGE = '<html><head><script src="https://cdn.example.com/lib.js"></script></head></html>'
+
+
+def site(tmp_path, budgets):
+    docs = tmp_path / "docs"
+    (docs / "blog").mkdir(parents=True)
+    (docs / "index.html").write_text(CDN_PAGE)
+    (docs / "blog" / "old.html").write_text(CDN_PAGE)
+    (tmp_path / "budgets.yml").write_text(budgets)
+    return docs, tmp_path / "budgets.yml"
+
+
+def test_warn_only_pages_do_not_fail(tmp_path):
+    docs, budgets = site(
+        tmp_path,
+        "default:\n  third_party_requests: 0\npages:\n  blog/*.html:\n    warn_only: true\n",
+    )
+    assert not page_weight.check_budgets(docs, budgets)
+    (docs / "index.html").write_text("<html></html>")
+    assert page_weight.check_budgets(docs, budgets)
+
+
+def test_pages_the_build_did_not_write_only_warn_about_images(tmp_path):
+    docs, budgets = site(tmp_path, "default:\n  third_party_requests: 0\n  total_kb: 10\n")
+    (docs / "big.jpg").write_bytes(b"x" * 20 * 1024)
+    (docs / "big.js").write_bytes(b"x" * 20 * 1024)
+
+    def old_page(html):
+        (docs / "index.html").write_text(html)
+        (docs / "blog" / "old.html").unlink(missing_ok=True)
+        os.utime(docs / "index.html", (1_000_000, 1_000_000))
+        return page_weight.check_budgets(docs, budgets, since=2_000_000)
+
+    # Full-size images are for a pages build to fix
+    assert old_page('<html><body><img src="big.jpg"></body></html>')
+    # Anything else still fails, rebuilt or not
+    assert not old_page('<html><body><script src="big.js"></script></body></html>')
+    assert not old_page(CDN_PAGE)
+
+
+def test_missing_local_files_fail_any_page(tmp_path):
+    docs, budgets = site(
+        tmp_path, "default:\n  third_party_requests: 5\npages:\n  blog/*.html:\n    warn_only: true\n"
+    )
+    assert page_weight.check_budgets(docs, budgets)
+
+    broken = '<html><head><link rel="stylesheet" href="../css/styles.0123456789.css"></head></html>'
+    (docs / "blog" / "old.html").write_text(broken)
+    os.utime(docs / "blog" / "old.html", (1_000_000, 1_000_000))
+    # Neither warn_only nor having been written before the build excuses it
+    assert not page_weight.check_budgets(docs, budgets, since=2_000_000)
@@ -0,0 +1,42 @@
+"""
+The publication index gives the same entries whether it is compiled from
+the records or loaded from its cache.
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import publications  # noqa: E402
+
+RECORDS = {
+    "articles": [
+        {
+            "title": "*Networks* and text",
+            "journal": "Social Networks",
+            "year": 2023,
+            "authors": "A. Author and B. Author",
+            "featured": True,
+            "web": {"published": date(2023, 5, 1), "updated": datetime(2024, 1, 2, 3, 4, 5)},
+        },
+        {"title": "Another paper", "journal": "Sociological Methods", "year": 2021},
+    ],
+    "books": [{"title": "A book", "press": "Sage", "year": 2021, "published": date(2021, 3, 9)}],
+}
+
+
+def test_cached_index_matches_compiled(tmp_path, monkeypatch):
+    monkeypatch.setattr(publications, "INDEX_FILE", tmp_path / "publications.json")
+    (tmp_path / "cv.md").write_text("---\n---\n")
+
+    cold = publications.load_publication_index(records=RECORDS, records_dir=tmp_path)
+    assert (tmp_path / "publications.json").exists()
+    warm = publications.load_publication_index(records_dir=tmp_path)
+
+    assert warm.entries == cold.entries
+    assert warm.featured()[0]["published"] == date(2023, 5, 1)
+    assert isinstance(warm.featured()[0]["updated"], datetime)
+    assert warm.of_type("book")[0]["record"]["published"] == date(2021, 3, 9)
+    assert [e["title"] for e in warm.in_year(2021)] == ["A book", "Another paper"]